@@ -0,0 +1,18 @@
+"""Performance benchmarks for the processing pipeline.
+
+``generator`` writes deterministic synthetic Moodle logs (10k, 1M and 10M
+rows, English or PT-BR headers, any supported timestamp format), and
+``test_pipeline_benchmarks`` measures the throughput and peak memory of
+each pipeline stage and of whole jobs with pytest-benchmark (CSV export
+once per writer backend). ``test_rule_benchmarks`` compares indexed and
+linear rule dispatch as the rule count grows. Generated logs are cached
+in BENCH_DATA_DIR (default: <tmp>/moodlelogsmart-bench).
+
+Usage (from backend/):
+    PYTHONPATH=src pytest benchmarks --rows 10k,1m --benchmark-autosave
+    PYTHONPATH=src pytest benchmarks --rows 10k --benchmark-compare --benchmark-compare-fail=min:10%
+    PYTHONPATH=src pytest benchmarks --rows 10k --benchmark-json results.json
+
+Saved runs (.benchmarks/) are keyed by commit and can be compared with
+``pytest-benchmark compare``.
+"""
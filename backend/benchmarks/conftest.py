@@ -0,0 +1,96 @@
+"""Fixtures and options for the benchmark suite."""
+
+import os
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from benchmarks.generator import SIZES, cached_log, parse_size
+
+DEFAULT_DATA_DIR = Path(tempfile.gettempdir()) / "moodlelogsmart-bench"
+
+# Per-stage benchmarks load the whole log in memory; above this many rows
+# only the streaming end-to-end run is measured
+STAGE_MAX_ROWS = 1_000_000
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("moodlelogsmart benchmarks")
+    group.addoption(
+        "--rows",
+        default="10k",
+        help=f"Comma-separated log sizes to benchmark: {', '.join(SIZES)} or a row count",
+    )
+    group.addoption(
+        "--bench-data",
+        default=os.getenv("BENCH_DATA_DIR", str(DEFAULT_DATA_DIR)),
+        help="Directory where generated logs are cached between runs",
+    )
+    group.addoption(
+        "--bench-rounds",
+        type=int,
+        default=3,
+        help="Rounds per benchmark for logs under 1M rows (larger logs run once)",
+    )
+
+
+def pytest_generate_tests(metafunc):
+    if "rows" in metafunc.fixturenames:
+        sizes = [parse_size(s.strip()) for s in metafunc.config.getoption("rows").split(",")]
+        if metafunc.definition.get_closest_marker("stage"):
+            sizes = [s for s in sizes if s <= STAGE_MAX_ROWS]
+        metafunc.parametrize("rows", sizes, ids=[f"{s:_}rows" for s in sizes], scope="session")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "stage: benchmark of a single pipeline stage")
+
+
+@pytest.fixture(scope="session")
+def data_dir(request) -> Path:
+    path = Path(request.config.getoption("bench_data"))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+@pytest.fixture(scope="session")
+def log_file(data_dir, rows) -> Path:
+    """English log with the most common timestamp format."""
+    return cached_log(data_dir, rows)
+
+
+@pytest.fixture
+def rounds(request, rows) -> int:
+    return request.config.getoption("bench_rounds") if rows < 1_000_000 else 1
+
+
+@pytest.fixture
+def run(benchmark, rounds, rows):
+    """Benchmark ``target(*args)`` and record throughput and peak memory.
+
+    ``setup`` (optional) builds fresh arguments for every round. The peak
+    memory comes from one extra untimed run under tracemalloc, so it does
+    not slow down the timed rounds; it covers Python and numpy/pandas
+    allocations but not Arrow's memory pool.
+    """
+
+    def runner(target, *args, setup=None, memory=True):
+        make_args = setup or (lambda: (args, {}))
+        result = benchmark.pedantic(target, setup=make_args, rounds=rounds, iterations=1)
+
+        benchmark.extra_info["rows"] = rows
+        benchmark.extra_info["rows_per_second"] = round(rows / benchmark.stats.stats.min)
+        if memory:
+            call_args, call_kwargs = make_args()
+            tracemalloc.start()
+            try:
+                target(*call_args, **call_kwargs)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            benchmark.extra_info["peak_memory_mb"] = round(peak / 2**20, 1)
+        return result
+
+    return runner
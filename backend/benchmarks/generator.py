@@ -0,0 +1,332 @@
+"""Deterministic synthetic Moodle log generator.
+
+Writes Moodle "Logs" report exports with the same seed always producing
+the same bytes. Headers come from ColumnMapper.COLUMN_ALIASES (English or
+PT-BR), timestamps from any of TimestampDetector.COMMON_FORMATS, and the
+component/event mix follows a typical course: mostly course and resource
+views, then forum, quiz and assignment activity, with a small tail of
+wiki, workshop, glossary, database and chat events plus some events no
+rule classifies.
+
+Rows are generated and written in chunks, so 10M-row files need little
+memory.
+
+Usage:
+    PYTHONPATH=src python -m benchmarks.generator 1m /tmp/moodle_1m.csv --language pt
+"""
+
+import argparse
+import csv
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from moodlelogsmart.core.auto_detect.timestamp_detector import TimestampDetector
+
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+# Header per internal column: first English and first PT-BR alias of
+# ColumnMapper.COLUMN_ALIASES (what Moodle itself writes)
+HEADERS = {
+    "en": [
+        "Time", "User full name", "Affected user", "Event context",
+        "Component", "Event name", "Description", "Origin", "IP address",
+    ],
+    "pt": [
+        "Hora", "Nome completo", "Usuário afetado", "Contexto do Evento",
+        "Componente", "Nome do evento", "Descrição", "Origem", "endereço IP",
+    ],
+}
+
+# (component, event name, relative weight). Moodle translates
+# "Course viewed" in PT-BR exports; the other names stay in English.
+EVENTS: List[Tuple[str, str, float]] = [
+    ("System", "Course viewed", 24.0),
+    ("File", "Course module viewed", 14.0),
+    ("Page", "Course module viewed", 6.0),
+    ("URL", "Course module viewed", 3.0),
+    ("Folder", "Course module viewed", 1.5),
+    ("Book", "Course module viewed", 1.5),
+    ("Forum", "Course module viewed", 6.0),
+    ("Forum", "Discussion viewed", 5.0),
+    ("Forum", "Post created", 1.5),
+    ("Forum", "Discussion created", 0.5),
+    ("Quiz", "Course module viewed", 4.0),
+    ("Quiz", "Quiz attempt started", 3.0),
+    ("Quiz", "Quiz attempt submitted", 2.5),
+    ("Quiz", "Quiz attempt reviewed", 2.0),
+    ("Questionnaire", "Response submitted", 0.5),
+    ("Assignment", "Course module viewed", 4.0),
+    ("Assignment", "Submission status viewed", 3.0),
+    ("Assignment", "Submission created", 1.5),
+    ("Assignment", "A submission has been submitted.", 1.0),
+    ("Wiki", "Page created", 0.3),
+    ("Wiki", "Page updated", 0.4),
+    ("Workshop", "Submission assessed", 0.3),
+    ("Glossary", "Entry created", 0.3),
+    ("Database", "Record created", 0.3),
+    ("Chat", "Message sent", 0.6),
+    ("System", "User graded", 2.0),
+    ("System", "Grade user report viewed", 2.0),
+    ("Logs", "Log report viewed", 0.5),
+    ("System", "Course updated", 0.3),
+]
+
+ORIGINS = np.array(["web", "ws", "cli", "restore"])
+ORIGIN_WEIGHTS = np.array([0.93, 0.05, 0.015, 0.005])
+
+FIRST_NAMES = [
+    "Ana", "Bruno", "Carla", "Diego", "Elisa", "Felipe", "Gabriela", "Hugo",
+    "Isabela", "João", "Karina", "Lucas", "Mariana", "Nicolas", "Olivia",
+    "Pedro", "Rafaela", "Samuel", "Tatiana", "Vitor",
+]
+LAST_NAMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Lima", "Pereira", "Costa",
+    "Ferreira", "Almeida", "Rodrigues", "Gomes", "Martins", "Araújo", "Barbosa",
+]
+
+SEMESTER_START = datetime(2024, 2, 5)
+SEMESTER_DAYS = 140
+
+# Share of the day's activity per hour: quiet at night, busy afternoons/evenings
+HOURLY_ACTIVITY = np.array([
+    1, 0.5, 0.3, 0.2, 0.2, 0.3, 0.8, 2, 4, 6, 7, 7,
+    6, 7, 8, 8, 7, 6, 6, 7, 8, 7, 5, 2.5,
+])
+
+
+def parse_size(size: Union[str, int]) -> int:
+    """Return the row count of a size name ("10k", "1m", "10m") or number."""
+    if isinstance(size, int):
+        return size
+    return SIZES.get(size.lower()) or int(size.replace("_", ""))
+
+
+def _split_format(fmt: str) -> Tuple[str, str]:
+    """Split a timestamp format into its date and time-of-day parts."""
+    for directive in ("%H", "%I"):
+        index = fmt.find(directive)
+        if index >= 0:
+            return fmt[:index], fmt[index:]
+    raise ValueError(f"Timestamp format without time of day: {fmt}")
+
+
+def _format_tables(fmt: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Pre-format every day of the semester and every second of the day.
+
+    A timestamp is then two table lookups and one concatenation instead of
+    a strftime call per row.
+    """
+    date_fmt, time_fmt = _split_format(fmt)
+    days = np.array([
+        (SEMESTER_START + timedelta(days=d)).strftime(date_fmt)
+        for d in range(SEMESTER_DAYS + 1)
+    ])
+    midnight = datetime(2000, 1, 1)
+    times = [(midnight + timedelta(seconds=s)).strftime(time_fmt) for s in range(86400)]
+    if time_fmt.endswith("%f"):
+        times = [t[:-3] for t in times]  # Milliseconds, like 13:43:23.000
+    return days, np.array(times)
+
+
+class MoodleLogGenerator:
+    """Generates Moodle log rows with a fixed seed.
+
+    Args:
+        language: Header language, "en" or "pt" (PT-BR)
+        timestamp_format: One of TimestampDetector.COMMON_FORMATS
+        seed: Random seed; the same seed and options give the same file
+        users: Number of distinct students (default: scales with the row count)
+        courses: Number of distinct courses in the event context
+    """
+
+    def __init__(
+        self,
+        language: str = "en",
+        timestamp_format: str = TimestampDetector.COMMON_FORMATS[0],
+        seed: int = 42,
+        users: int = 0,
+        courses: int = 20,
+    ):
+        if language not in HEADERS:
+            raise ValueError(f"Unknown language {language!r}, expected one of {sorted(HEADERS)}")
+        if timestamp_format not in TimestampDetector.COMMON_FORMATS:
+            raise ValueError(f"Unsupported timestamp format: {timestamp_format}")
+
+        self.language = language
+        self.timestamp_format = timestamp_format
+        self.seed = seed
+        self.users = users
+        self.courses = courses
+
+        course_viewed = "Curso visto" if language == "pt" else "Course viewed"
+        self._components = np.array([c for c, _, _ in EVENTS], dtype=object)
+        self._event_names = np.array(
+            [course_viewed if e == "Course viewed" else e for _, e, _ in EVENTS], dtype=object
+        )
+        weights = np.array([w for _, _, w in EVENTS])
+        self._event_weights = weights / weights.sum()
+        self._days, self._times = _format_tables(timestamp_format)
+
+        hourly = HOURLY_ACTIVITY / HOURLY_ACTIVITY.sum()
+        self._second_weights = np.repeat(hourly / 3600, 3600)
+
+    @property
+    def header(self) -> List[str]:
+        """Column names of the generated file."""
+        return HEADERS[self.language]
+
+    def write(self, path: Union[str, Path], rows: int, chunk_rows: int = 200_000) -> Path:
+        """Write ``rows`` events to a CSV file.
+
+        Args:
+            path: Output file
+            rows: Number of events
+            chunk_rows: Rows generated per chunk
+
+        Returns:
+            Path of the written file
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        rng = np.random.default_rng(self.seed)
+        users = self._user_names(rng, self.users or max(50, min(20_000, rows // 200)))
+        courses = self._course_names(self.courses)
+
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(",".join(self.header) + "\n")
+            for start in range(0, rows, chunk_rows):
+                size = min(chunk_rows, rows - start)
+                # Moodle exports newest first: each chunk covers older days
+                newest = SEMESTER_DAYS - round(SEMESTER_DAYS * start / rows)
+                oldest = min(newest - 1, SEMESTER_DAYS - round(SEMESTER_DAYS * (start + size) / rows))
+                chunk = self._chunk(rng, size, users, courses, (max(0, oldest), max(1, newest)))
+                chunk.to_csv(f, header=False, index=False, quoting=csv.QUOTE_MINIMAL)
+        return path
+
+    def _chunk(
+        self,
+        rng: np.random.Generator,
+        rows: int,
+        users: np.ndarray,
+        courses: np.ndarray,
+        day_range: Tuple[int, int],
+    ) -> pd.DataFrame:
+        """Generate one chunk of rows dated within ``day_range`` (end exclusive)."""
+        # Zipf-like activity: a few students generate most of the events
+        user_ids = np.minimum(rng.zipf(1.3, rows) - 1, len(users) - 1)
+        user_ids = rng.permutation(len(users))[user_ids]
+        event_ids = rng.choice(len(self._event_weights), rows, p=self._event_weights)
+        course_ids = rng.integers(0, len(courses), rows)
+        days = rng.integers(day_range[0], day_range[1], rows)
+        seconds = rng.choice(86400, rows, p=self._second_weights)
+
+        order = np.lexsort((-seconds, -days))
+        days, seconds = days[order], seconds[order]
+
+        moodle_ids = (user_ids + 100).astype(str).astype(object)
+        descriptions = (
+            "The user with id '" + moodle_ids + "' triggered '"
+            + self._event_names[event_ids] + "' in the course with id '"
+            + (course_ids + 2).astype(str).astype(object) + "'."
+        )
+        ip_suffix = (user_ids % 250 + 1).astype(str).astype(object)
+
+        return pd.DataFrame({
+            "time": np.char.add(self._days[days], self._times[seconds]),
+            "user": users[user_ids],
+            "affected": "-",
+            "context": courses[course_ids],
+            "component": self._components[event_ids],
+            "event": self._event_names[event_ids],
+            "description": descriptions,
+            "origin": rng.choice(ORIGINS, rows, p=ORIGIN_WEIGHTS),
+            "ip": "10.20.0." + ip_suffix,
+        })
+
+    @staticmethod
+    def _user_names(rng: np.random.Generator, count: int) -> np.ndarray:
+        """Distinct student names, numbered once first/last combinations run out."""
+        names = [
+            f"{FIRST_NAMES[i % len(FIRST_NAMES)]} {LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]}"
+            for i in range(count)
+        ]
+        combinations = len(FIRST_NAMES) * len(LAST_NAMES)
+        names = [
+            name if i < combinations else f"{name} {i // combinations + 1}"
+            for i, name in enumerate(names)
+        ]
+        return np.array(names, dtype=object)[rng.permutation(count)]
+
+    def _course_names(self, count: int) -> np.ndarray:
+        """Course contexts as Moodle labels them."""
+        label = "Curso" if self.language == "pt" else "Course"
+        return np.array([f"{label}: Disciplina {i + 1:02d}" for i in range(count)], dtype=object)
+
+
+def generate_log(
+    path: Union[str, Path],
+    rows: Union[str, int],
+    language: str = "en",
+    timestamp_format: str = TimestampDetector.COMMON_FORMATS[0],
+    seed: int = 42,
+) -> Path:
+    """Write a synthetic Moodle log (see MoodleLogGenerator).
+
+    Args:
+        path: Output file
+        rows: Number of events, or a size name ("10k", "1m", "10m")
+        language: Header language, "en" or "pt"
+        timestamp_format: One of TimestampDetector.COMMON_FORMATS
+        seed: Random seed
+
+    Returns:
+        Path of the written file
+    """
+    generator = MoodleLogGenerator(language=language, timestamp_format=timestamp_format, seed=seed)
+    return generator.write(path, parse_size(rows))
+
+
+def cached_log(
+    cache_dir: Union[str, Path],
+    rows: Union[str, int],
+    language: str = "en",
+    timestamp_format: str = TimestampDetector.COMMON_FORMATS[0],
+    seed: int = 42,
+) -> Path:
+    """Return a generated log from ``cache_dir``, generating it on first use.
+
+    Generated files are deterministic, so they can be reused across runs.
+    """
+    rows = parse_size(rows)
+    fmt_index = TimestampDetector.COMMON_FORMATS.index(timestamp_format)
+    path = Path(cache_dir) / f"moodle_{rows}_{language}_f{fmt_index}_s{seed}.csv"
+    if not path.exists():
+        partial = path.with_suffix(".tmp")
+        generate_log(partial, rows, language, timestamp_format, seed)
+        partial.replace(path)
+    return path
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic Moodle log CSV")
+    parser.add_argument("rows", help="Row count or size name (10k, 1m, 10m)")
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--language", choices=sorted(HEADERS), default="en")
+    parser.add_argument(
+        "--format", type=int, default=0, dest="fmt",
+        help="Index into TimestampDetector.COMMON_FORMATS (0-11)",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    fmt = TimestampDetector.COMMON_FORMATS[args.fmt]
+    path = generate_log(args.output, args.rows, args.language, fmt, args.seed)
+    print(f"Wrote {parse_size(args.rows):,} rows to {path} ({path.stat().st_size / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
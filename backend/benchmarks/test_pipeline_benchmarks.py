@@ -0,0 +1,227 @@
+"""Throughput and peak memory of each pipeline stage and of whole jobs.
+
+Each stage is timed on the output of the previous stages, computed once
+per log size. Results carry ``rows``, ``rows_per_second`` and
+``peak_memory_mb`` in their ``extra_info``.
+"""
+
+import asyncio
+import csv
+import io
+import os
+import shutil
+import uuid
+
+import pandas as pd
+import pytest
+
+from benchmarks.generator import cached_log
+from moodlelogsmart.core.auto_detect.column_mapper import ColumnMapper
+from moodlelogsmart.core.auto_detect.csv_detector import CSVDetector
+from moodlelogsmart.core.auto_detect.timestamp_detector import TimestampDetector
+from moodlelogsmart.core.clean.data_cleaner import DataCleaner
+from moodlelogsmart.core.export import exporter
+from moodlelogsmart.core.export.exporter import (
+    HAS_PYARROW,
+    CSVExporter,
+    ParquetExporter,
+    XESExporter,
+)
+from moodlelogsmart.core.export.zip_package import ResultPackage
+from moodlelogsmart.core.pipeline.runner import run_pipeline
+from moodlelogsmart.core.rules.bloom_classifier import BloomClassifier
+
+pytest.importorskip("pytest_benchmark")
+
+_stage_cache = {}
+
+
+def load(path) -> pd.DataFrame:
+    """Stage "map": read the CSV and rename its columns to the internal schema."""
+    csv_format = CSVDetector().detect(str(path))
+    df = pd.read_csv(path, encoding=csv_format.encoding, delimiter=csv_format.delimiter)
+    mapper = ColumnMapper()
+    columns = df.columns.tolist()
+    return df.rename(columns=mapper.rename_dataframe_columns(columns, mapper.map_columns(columns)))
+
+
+def parse_timestamps(df: pd.DataFrame) -> pd.DataFrame:
+    """Stage "timestamp": detect the format and convert the time column."""
+    detector = TimestampDetector()
+    converted, _ = detector.convert_column(df, detector.detect_series_format(df["time"]))
+    return converted
+
+
+def clean(df: pd.DataFrame) -> pd.DataFrame:
+    """Stage "clean", on the DataFrame as the pipeline does."""
+    return DataCleaner().clean_frame(df)
+
+
+def classify(df: pd.DataFrame) -> pd.DataFrame:
+    """Stage "classify" with a cold classifier, as in a new job."""
+    return BloomClassifier().apply_rules(df)
+
+
+STEPS = [("map", load), ("timestamp", parse_timestamps), ("clean", clean), ("classify", classify)]
+
+
+def stage_output(log_file, stage: str) -> pd.DataFrame:
+    """Output of a stage for a log, computed once per session."""
+    data = log_file
+    for name, step in STEPS:
+        if (log_file, name) not in _stage_cache:
+            _stage_cache[(log_file, name)] = step(data)
+        data = _stage_cache[(log_file, name)]
+        if name == stage:
+            return data
+    raise ValueError(f"Unknown stage: {stage}")
+
+
+@pytest.fixture
+def package(tmp_path):
+    package = ResultPackage(tmp_path / "package")
+    yield package
+    shutil.rmtree(package.output_dir, ignore_errors=True)
+
+
+@pytest.mark.stage
+def test_detect(run, log_file):
+    run(CSVDetector().detect, str(log_file))
+
+
+@pytest.mark.stage
+@pytest.mark.parametrize("language", ["en", "pt"])
+def test_map(run, data_dir, rows, language):
+    run(load, cached_log(data_dir, rows, language=language))
+
+
+@pytest.mark.stage
+@pytest.mark.parametrize(
+    "fmt", TimestampDetector.COMMON_FORMATS, ids=range(len(TimestampDetector.COMMON_FORMATS))
+)
+def test_timestamp(run, data_dir, rows, fmt):
+    df = load(cached_log(data_dir, rows, timestamp_format=fmt))
+    run(parse_timestamps, setup=lambda: ((df.copy(),), {}))
+
+
+@pytest.mark.stage
+def test_clean(run, log_file):
+    run(clean, stage_output(log_file, "timestamp"))
+
+
+@pytest.mark.stage
+def test_classify(run, log_file):
+    run(classify, stage_output(log_file, "clean"))
+
+
+@pytest.mark.stage
+@pytest.mark.parametrize("writer", ["arrow", "pandas", "dictwriter"])
+def test_export_csv(run, log_file, package, monkeypatch, writer):
+    """CSV export with each CSVStreamWriter backend and the old row loop."""
+    df = stage_output(log_file, "classify")
+
+    if writer == "arrow" and not exporter.HAS_PYARROW:
+        pytest.skip("pyarrow not installed")
+    if writer == "pandas":
+        monkeypatch.setattr(exporter, "HAS_PYARROW", False)
+
+    if writer == "dictwriter":
+        events = df.to_dict("records")
+
+        def export():
+            # Row-by-row writer used before export_frame()
+            with package.open("enriched_log.csv") as out:
+                text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+                rows = csv.DictWriter(text, fieldnames=list(events[0].keys()))
+                rows.writeheader()
+                rows.writerows(events)
+                text.flush()
+                text.detach()
+    else:
+        def export():
+            with package.open("enriched_log.csv") as out:
+                CSVExporter().export_frame(df, out)
+
+    run(export)
+
+
+@pytest.mark.stage
+@pytest.mark.skipif(not HAS_PYARROW, reason="pyarrow not installed")
+def test_export_parquet(run, log_file, package):
+    df = stage_output(log_file, "classify")
+
+    def export():
+        with package.open("enriched_log.parquet") as out:
+            ParquetExporter.write_parquet(ParquetExporter.to_table(df), out)
+
+    run(export)
+
+
+@pytest.mark.stage
+def test_export_xes(run, log_file, package):
+    df = stage_output(log_file, "classify")
+
+    def export():
+        with package.open("enriched_log.xes") as out:
+            XESExporter().export_frame(df, out)
+
+    run(export)
+
+
+@pytest.mark.stage
+def test_zip(run, log_file, package, tmp_path):
+    df = stage_output(log_file, "classify")
+    with package.open("enriched_log.csv") as out:
+        CSVExporter().export_frame(df, out)
+    with package.open("enriched_log.xes") as out:
+        XESExporter().export_frame(df, out)
+
+    run(package.assemble, tmp_path / "results.zip")
+
+
+@pytest.mark.parametrize("streaming", [False, True], ids=["in_memory", "streaming"])
+def test_pipeline(run, benchmark, log_file, rows, streaming, tmp_path):
+    """End to end in this process; per-stage seconds of the last run are kept."""
+    if not streaming and rows > 1_000_000:
+        pytest.skip("In-memory mode is only used for small files")
+
+    def pipeline():
+        work_dir = tmp_path / uuid.uuid4().hex
+        work_dir.mkdir()
+        try:
+            return run_pipeline("bench", str(log_file), work_dir, streaming=streaming)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    result = run(pipeline, memory=rows <= 1_000_000)
+    benchmark.extra_info["stage_seconds"] = {
+        stage: round(seconds, 4) for stage, seconds in result.stage_seconds.items()
+    }
+
+
+def test_process_job(run, log_file):
+    """End to end through the job manager and the worker pool, like an upload.
+
+    The pipeline runs in a worker process, so tracemalloc cannot see its
+    memory and only throughput is recorded.
+    """
+    os.environ.setdefault("API_KEYS", "benchmark-key")
+    from moodlelogsmart import main
+
+    def upload():
+        # process_job deletes its input, so every round gets its own link
+        job_id = main.job_manager.create_job()
+        input_path = main.TEMP_DIR / f"{job_id}_input.csv"
+        try:
+            os.link(log_file, input_path)
+        except OSError:
+            shutil.copyfile(log_file, input_path)
+        return (job_id, str(input_path)), {}
+
+    def process(job_id, input_path):
+        asyncio.run(main.process_job(job_id, input_path))
+        job = main.job_manager.get_job(job_id)
+        assert job.status == "completed", job.error
+        main.job_manager.cleanup_job(job_id)
+
+    run(process, setup=upload, memory=False)
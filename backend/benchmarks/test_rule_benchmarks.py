@@ -0,0 +1,86 @@
+"""Per-event cost of RuleEngine.evaluate as the rule count grows.
+
+Compares the hash-indexed dispatch against a linear scan of all rules,
+using the shipped bloom_taxonomy.yaml plus generated per-department rules.
+Results are grouped by rule count and carry ``us_per_event`` in their
+``extra_info``. The event count is fixed, so these run once whatever
+``--rows`` is.
+"""
+
+import random
+
+import pytest
+
+from moodlelogsmart.core.rules.rule_engine import RuleEngine, Rule, RuleCondition, RuleAction
+
+pytest.importorskip("pytest_benchmark")
+
+RULE_COUNTS = [13, 100, 300, 1000]
+EVENTS = 20000
+DEPARTMENTS = 50
+
+
+def build_rules(count):
+    """Shipped rules plus ``count - 13`` generated department rules."""
+    shipped = RuleEngine().rules
+    rules = [r for r in shipped if r.conditions]
+    default = [r for r in shipped if not r.conditions]
+
+    for i in range(max(0, count - len(shipped))):
+        rules.append(Rule(
+            id=f"D{i}",
+            name=f"Department rule {i}",
+            priority=20 + i,
+            conditions=[
+                RuleCondition(field="component", operator="equals", value=f"Dept{i % DEPARTMENTS}"),
+                RuleCondition(field="event_name", operator="in", values=[f"Event {i}", f"Alt {i}"]),
+            ],
+            action=RuleAction(activity_type=f"Dept_{i}", bloom_level="Apply", is_active=True),
+        ))
+
+    for rule in default:
+        rule.priority = 10 ** 6  # Keep catch-all last
+    return rules + default
+
+
+def build_events(count, rng):
+    """Events mixing shipped components and department rules."""
+    components = ["File", "Page", "Forum", "Quiz", "Assignment", "System"]
+    names = ["Course module viewed", "Post created", "Quiz attempt started", "Course viewed"]
+    events = []
+    for _ in range(EVENTS):
+        if rng.random() < 0.5:
+            events.append({"component": rng.choice(components), "event_name": rng.choice(names)})
+        else:
+            i = rng.randrange(max(1, count))
+            events.append({"component": f"Dept{i % DEPARTMENTS}", "event_name": f"Event {i}"})
+    return events
+
+
+def linear_evaluate(engine, event):
+    """Baseline: check every rule in priority order."""
+    for rule in engine.rules:
+        if engine._matches_all_conditions(event, rule.conditions):
+            return engine._apply_action(event, rule.action)
+    return engine._apply_default(event)
+
+
+@pytest.mark.parametrize("dispatch", ["indexed", "linear"])
+@pytest.mark.parametrize("rule_count", RULE_COUNTS)
+def test_rule_dispatch(benchmark, request, rule_count, dispatch):
+    engine = RuleEngine(rules=build_rules(rule_count))
+    events = build_events(rule_count, random.Random(42))
+    if dispatch == "indexed":
+        evaluate = engine.evaluate
+    else:
+        def evaluate(event):
+            return linear_evaluate(engine, event)
+
+    def evaluate_all():
+        for event in events:
+            evaluate(event)
+
+    benchmark.group = f"rule dispatch: {len(engine.rules)} rules"
+    rounds = request.config.getoption("bench_rounds")
+    benchmark.pedantic(evaluate_all, rounds=rounds, iterations=1)
+    benchmark.extra_info["us_per_event"] = round(benchmark.stats.stats.min / EVENTS * 1e6, 3)
@@ -0,0 +1,290 @@
+"""Streaming classification of events, without jobs or ZIP packages.
+
+The request body (CSV or NDJSON) is parsed as it arrives and each row is
+sent back with activity_type, bloom_level and is_active as soon as the
+network chunk holding it has been classified. Rows are classified by the
+API key's ruleset from the process-wide ruleset cache: its rules are
+compiled once and its memo of rule-field combinations is shared by all
+requests, so after warm-up a row costs a dictionary lookup. Only the
+current chunk and at most one incomplete record are held in memory,
+whatever the size of the body.
+"""
+
+import codecs
+import csv
+import io
+import json
+import logging
+import os
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from moodlelogsmart.core.auto_detect.column_mapper import ColumnMapper
+from moodlelogsmart.core.rules.bloom_classifier import BloomClassifier
+from moodlelogsmart.core.rules.ruleset_cache import get_ruleset_cache
+
+logger = logging.getLogger(__name__)
+
+# Longest record accepted; bounds memory on an unterminated quote or line
+CLASSIFY_MAX_RECORD_KB = int(os.getenv("CLASSIFY_MAX_RECORD_KB", "1024"))
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+OUTPUT_COLUMNS = ("activity_type", "bloom_level", "is_active")
+CSV_DELIMITERS = (",", ";", "\t", "|")
+
+
+def is_ndjson(content_type: Optional[str]) -> bool:
+    """Whether a Content-Type header announces newline-delimited JSON."""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return media_type in NDJSON_TYPES
+
+
+def body_encoding(content_type: Optional[str]) -> str:
+    """Charset of the body (default UTF-8; a BOM is skipped)."""
+    for param in (content_type or "").split(";")[1:]:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "charset" and value.strip():
+            charset = value.strip().strip('"')
+            try:
+                codecs.lookup(charset)
+            except LookupError:
+                raise ValueError(f"Codificação não suportada: {charset}")
+            return "utf-8-sig" if charset.lower().replace("_", "-") == "utf-8" else charset
+    return "utf-8-sig"
+
+
+def detect_delimiter(line: str) -> str:
+    """Most frequent candidate delimiter of a header line."""
+    return max(CSV_DELIMITERS, key=line.count)
+
+
+class RecordSplitter:
+    """Splits text arriving in arbitrary pieces into complete records.
+
+    Records end at a newline. For CSV, a newline inside a quoted field does
+    not end the record. As in ``csv.reader``, a quote only opens a quoted
+    field at the start of a field; elsewhere (``5" screen``) it is literal.
+    Inside a quoted field a doubled quote is an escaped quote and a single
+    one closes the field. The delimiter is taken from the first record.
+
+    Args:
+        quoted: Honour CSV quoting
+        max_record_bytes: Longest record accepted
+    """
+
+    def __init__(self, quoted: bool, max_record_bytes: int = CLASSIFY_MAX_RECORD_KB * 1024):
+        self.quoted = quoted
+        self.max_record_bytes = max_record_bytes
+        self.delimiter: Optional[str] = None
+        self._tail = ""  # Text after the last newline
+        self._lines: List[str] = []  # Lines of a record with an open quote
+        self._partial_size = 0
+        self._in_quotes = False
+
+    def feed(self, text: str) -> List[str]:
+        """Add text and return the records it completes.
+
+        Raises:
+            ValueError: If a record grows beyond ``max_record_bytes``
+        """
+        lines = (self._tail + text).split("\n")
+        self._tail = lines.pop()
+
+        records = []
+        for line in lines:
+            if self.quoted:
+                if self.delimiter is None:
+                    self.delimiter = detect_delimiter(line)
+                if '"' in line or self._in_quotes:
+                    self._in_quotes = self._ends_in_quotes(line, self._in_quotes)
+                if self._in_quotes:
+                    self._lines.append(line)
+                    self._partial_size += len(line) + 1
+                    continue
+            if self._lines:
+                self._lines.append(line)
+                line = "\n".join(self._lines)
+                self._lines = []
+                self._partial_size = 0
+            records.append(line.rstrip("\r"))
+
+        if self._partial_size + len(self._tail) > self.max_record_bytes:
+            raise ValueError(f"Registro maior que {CLASSIFY_MAX_RECORD_KB} KB")
+        return records
+
+    def _ends_in_quotes(self, line: str, in_quotes: bool) -> bool:
+        """Whether a quoted field is still open at the end of a line.
+
+        Args:
+            line: Line without its newline
+            in_quotes: Whether a quoted field was open at the start of the line
+        """
+        position = line.find('"')
+        while position != -1:
+            if in_quotes:
+                if line.startswith('""', position):  # Escaped quote
+                    position = line.find('"', position + 2)
+                    continue
+                in_quotes = False
+            elif position == 0 or line[position - 1] == self.delimiter:
+                in_quotes = True
+            # Otherwise a literal quote inside an unquoted field
+            position = line.find('"', position + 1)
+        return in_quotes
+
+    def close(self) -> List[str]:
+        """Return the last record (body without a trailing newline)."""
+        pending = "\n".join(self._lines + [self._tail])
+        self._lines, self._tail = [], ""
+        return [pending.rstrip("\r")] if pending.strip() else []
+
+
+class _CSVClassifier:
+    """Classifies CSV records; the first record is the header."""
+
+    def __init__(self, classifier: BloomClassifier):
+        self.classifier = classifier
+        self.fields: List[Tuple[str, int]] = []
+        self.delimiter = ","
+        self.header: Optional[List[str]] = None
+        self.rows = 0
+
+    def process(self, records: List[str]) -> bytes:
+        if not records:
+            return b""
+
+        out = io.StringIO()
+        writer = None
+        if self.header is None:
+            self._read_header(records[0])
+            records = records[1:]
+            writer = csv.writer(out, delimiter=self.delimiter)
+            writer.writerow(self.header + list(OUTPUT_COLUMNS))
+
+        writer = writer or csv.writer(out, delimiter=self.delimiter)
+        try:
+            for row in csv.reader(records, delimiter=self.delimiter):
+                if not row:
+                    continue
+                event = {field: row[i] if i < len(row) else None for field, i in self.fields}
+                enriched = self.classifier.classify(event)
+                writer.writerow(row + [enriched[column] for column in OUTPUT_COLUMNS])
+                self.rows += 1
+        except csv.Error as e:
+            raise ValueError(f"CSV inválido após a linha {self.rows + 1}: {e}") from e
+        return out.getvalue().encode("utf-8")
+
+    def _read_header(self, line: str) -> None:
+        """Detect the delimiter and locate the rule fields.
+
+        Raises:
+            ValueError: If a field used by the rules has no column
+        """
+        self.delimiter = detect_delimiter(line)
+        self.header = next(csv.reader([line], delimiter=self.delimiter))
+
+        mapper = ColumnMapper()
+        for field in self.classifier.fields:
+            column = mapper.find_column(self.header, field)
+            if column is None:
+                aliases = ColumnMapper.COLUMN_ALIASES.get(field, [field])
+                raise ValueError(
+                    f"Coluna obrigatória não encontrada: {field}. "
+                    f"Esperado um dos: {', '.join(aliases)}"
+                )
+            self.fields.append((field, self.header.index(column)))
+
+
+class _NDJSONClassifier:
+    """Classifies one JSON object per line.
+
+    Keys may be internal field names or Moodle column names; the mapping
+    is resolved once per distinct set of keys. Lines that are not JSON
+    objects produce an ``{"line": n, "error": ...}`` object instead.
+    """
+
+    MAX_KEY_SETS = 64
+
+    def __init__(self, classifier: BloomClassifier):
+        self.classifier = classifier
+        self.mapper = ColumnMapper()
+        self._key_fields: Dict[Tuple[str, ...], List[Tuple[str, str]]] = {}
+        self.rows = 0
+        self.line = 0
+
+    def process(self, records: List[str]) -> bytes:
+        out = []
+        for record in records:
+            self.line += 1
+            if not record.strip():
+                continue
+            try:
+                obj = json.loads(record)
+                if not isinstance(obj, dict):
+                    raise ValueError("expected a JSON object")
+            except ValueError as e:
+                out.append(json.dumps({"line": self.line, "error": str(e)}))
+                continue
+
+            event = {field: obj.get(key) for field, key in self._fields_for(obj)}
+            enriched = self.classifier.classify(event)
+            for column in OUTPUT_COLUMNS:
+                obj[column] = enriched[column]
+            out.append(json.dumps(obj, ensure_ascii=False, default=str))
+            self.rows += 1
+        return ("\n".join(out) + "\n").encode("utf-8") if out else b""
+
+    def _fields_for(self, obj: Dict) -> List[Tuple[str, str]]:
+        """(rule field, key in the object) pairs for this object's keys."""
+        keys = tuple(obj)
+        fields = self._key_fields.get(keys)
+        if fields is None:
+            if len(self._key_fields) >= self.MAX_KEY_SETS:
+                self._key_fields.clear()
+            fields = []
+            for field in self.classifier.fields:
+                key = self.mapper.find_column(list(keys), field)
+                fields.append((field, key if key is not None else field))
+            self._key_fields[keys] = fields
+        return fields
+
+
+async def classify_stream(
+    chunks: AsyncIterator[bytes],
+    content_type: Optional[str],
+    classifier: Optional[BloomClassifier] = None,
+) -> AsyncIterator[bytes]:
+    """Classify a CSV or NDJSON body as it is received.
+
+    For CSV, the first item yielded is the output header, so header errors
+    surface before any output is produced.
+
+    Args:
+        chunks: Request body chunks
+        content_type: Content-Type of the body (NDJSON types, otherwise CSV)
+        classifier: Classifier to use (default: the cached default ruleset)
+
+    Yields:
+        Enriched rows, as the body's format (UTF-8)
+
+    Raises:
+        ValueError: If the CSV header lacks a rule field, a record is too
+                    long or malformed, or the charset is unknown
+    """
+    ndjson = is_ndjson(content_type)
+    decoder = codecs.getincrementaldecoder(body_encoding(content_type))(errors="replace")
+    splitter = RecordSplitter(quoted=not ndjson)
+    classifier = classifier or get_ruleset_cache().get().classifier
+    processor = _NDJSONClassifier(classifier) if ndjson else _CSVClassifier(classifier)
+
+    async for chunk in chunks:
+        output = processor.process(splitter.feed(decoder.decode(chunk)))
+        if output:
+            yield output
+
+    output = processor.process(splitter.feed(decoder.decode(b"", final=True)) + splitter.close())
+    if output:
+        yield output
+
+    if not ndjson and processor.header is None:
+        raise ValueError("Corpo da requisição vazio")
+    logger.info(f"Classified {processor.rows} streamed events")
@@ -1,11 +1,16 @@
-"""In-memory job management for processing tracking."""
+"""Job management for processing tracking."""
 
 import uuid
 from datetime import datetime
-from typing import Dict, Optional
+from typing import List, Optional
 from dataclasses import dataclass, field
 from pathlib import Path
 import logging
+import shutil
+
+from moodlelogsmart import metrics
+from moodlelogsmart.api.job_store import JobStore, create_job_store
+from moodlelogsmart.api.progress import ProgressTracker
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +20,7 @@ class Job:
     """Represents a single processing job."""
 
     job_id: str
-    status: str = "processing"  # processing, completed, failed
+    status: str = "processing"  # queued, processing, completed, failed
     progress: int = 0  # 0-100
     error: Optional[str] = None
     created_at: datetime = field(default_factory=datetime.now)
@@ -23,14 +28,25 @@ class Job:
     input_file: Optional[Path] = None
     output_file: Optional[Path] = None
     owner: Optional[str] = None  # Hashed API key for ownership
+    leader_job_id: Optional[str] = None  # Identical in-flight job whose results are reused
+    process_id: Optional[str] = None  # API process that queues and runs the job
+    started_at: Optional[datetime] = None  # When processing started
+    stage: Optional[str] = None  # Pipeline stage being run
+    rows_processed: int = 0
+    total_rows: int = 0
 
 
 class JobManager:
-    """Manages in-memory job tracking."""
+    """Manages job tracking on top of a JobStore backend."""
 
-    def __init__(self):
-        """Initialize job manager."""
-        self.jobs: Dict[str, Job] = {}
+    def __init__(self, store: Optional[JobStore] = None):
+        """Initialize job manager.
+
+        Args:
+            store: Job storage backend (default: configured by JOB_STORE)
+        """
+        self.store = store or create_job_store()
+        self.tracker = ProgressTracker()  # Live progress for event streams
 
     def create_job(self) -> str:
         """Create a new job and return its ID.
@@ -39,7 +55,7 @@ class JobManager:
             str: Unique job ID (UUID)
         """
         job_id = str(uuid.uuid4())
-        self.jobs[job_id] = Job(job_id=job_id)
+        self.store.add(Job(job_id=job_id, process_id=self.store.process_id))
         logger.info(f"Created job {job_id}")
         return job_id
 
@@ -52,19 +68,82 @@ class JobManager:
         Returns:
             Job object if exists, None otherwise
         """
-        return self.jobs.get(job_id)
+        return self.store.get(job_id)
+
+    def list_jobs(self, owner: Optional[str] = None, status: Optional[str] = None) -> List[Job]:
+        """List jobs, optionally filtered by owner and status.
 
-    def update_progress(self, job_id: str, progress: int) -> None:
+        Args:
+            owner: Hashed API key to filter by
+            status: Job status to filter by
+
+        Returns:
+            Matching jobs
+        """
+        return self.store.list(owner=owner, status=status)
+
+    def delete_job(self, job_id: str) -> None:
+        """Remove a job record (files are removed by cleanup_job).
+
+        Args:
+            job_id: Job identifier
+        """
+        self.store.delete(job_id)
+        self.tracker.forget(job_id)
+
+    def update_progress(
+        self,
+        job_id: str,
+        progress: int,
+        stage: Optional[str] = None,
+        rows_processed: Optional[int] = None,
+        total_rows: Optional[int] = None,
+    ) -> None:
         """Update job progress.
 
+        The stage and row counts are stored with the job too, so streams
+        served by another API process can report them.
+
         Args:
             job_id: Job identifier
             progress: Progress percentage (0-100)
+            stage: Pipeline stage being run (optional)
+            rows_processed: Rows through the pipeline so far (optional)
+            total_rows: Rows in the input (optional)
         """
-        job = self.get_job(job_id)
-        if job:
-            job.progress = min(100, max(0, progress))
-            logger.debug(f"Job {job_id} progress: {job.progress}%")
+        progress = min(100, max(0, progress))
+        details = {}
+        if stage is not None:
+            details["stage"] = stage
+        if rows_processed is not None:
+            details["rows_processed"] = rows_processed
+        if total_rows:
+            details["total_rows"] = total_rows
+        self.store.update_progress(job_id, progress, **details)
+        self.tracker.update(job_id, progress, stage, rows_processed, total_rows)
+        logger.debug(f"Job {job_id} progress: {progress}% ({stage})")
+
+    def set_status(self, job_id: str, status: str) -> None:
+        """Set the status of a job that has not finished yet.
+
+        Args:
+            job_id: Job identifier
+            status: New status ("queued" or "processing")
+        """
+        if status == "processing":
+            self.store.update(job_id, status=status, started_at=datetime.now())
+        else:
+            self.store.update(job_id, status=status)
+        logger.debug(f"Job {job_id} status: {status}")
+
+    def set_leader(self, job_id: str, leader_job_id: str) -> None:
+        """Attach a job to an identical in-flight job.
+
+        Args:
+            job_id: Job identifier
+            leader_job_id: Job whose results will be reused
+        """
+        self.store.update(job_id, leader_job_id=leader_job_id)
 
     def mark_completed(self, job_id: str, output_file: Optional[Path] = None) -> None:
         """Mark job as completed.
@@ -73,13 +152,16 @@ class JobManager:
             job_id: Job identifier
             output_file: Path to output ZIP file
         """
-        job = self.get_job(job_id)
-        if job:
-            job.status = "completed"
-            job.progress = 100
-            job.completed_at = datetime.now()
-            job.output_file = output_file
-            logger.info(f"Job {job_id} completed")
+        self.store.update(
+            job_id,
+            status="completed",
+            progress=100,
+            completed_at=datetime.now(),
+            output_file=output_file,
+        )
+        self.tracker.finish(job_id, "completed")
+        metrics.JOBS.labels(outcome="completed").inc()
+        logger.info(f"Job {job_id} completed")
 
     def mark_failed(self, job_id: str, error: str) -> None:
         """Mark job as failed.
@@ -88,12 +170,37 @@ class JobManager:
             job_id: Job identifier
             error: Error message
         """
-        job = self.get_job(job_id)
-        if job:
-            job.status = "failed"
-            job.error = error
-            job.completed_at = datetime.now()
-            logger.error(f"Job {job_id} failed: {error}")
+        self.store.update(job_id, status="failed", error=error, completed_at=datetime.now())
+        self.tracker.finish(job_id, "failed")
+        metrics.JOBS.labels(outcome="failed").inc()
+        logger.error(f"Job {job_id} failed: {error}")
+
+    def fail_orphaned_jobs(self) -> int:
+        """Mark failed the unfinished jobs of API processes that stopped.
+
+        A job queued or processing when its API process exited or restarted
+        is never finished by anyone: it would report its status forever and
+        keep its input file. Such jobs are marked failed and their input
+        files deleted; cleanup then removes them like any failed job.
+
+        Returns:
+            Number of jobs marked failed
+        """
+        live = self.store.live_processes()
+        orphaned = [
+            job
+            for status in ("queued", "processing")
+            for job in self.list_jobs(status=status)
+            if job.process_id not in live
+        ]
+        for job in orphaned:
+            self.mark_failed(job.job_id, "Interrupted: the API process running the job stopped")
+            if job.input_file:
+                try:
+                    job.input_file.unlink(missing_ok=True)
+                except OSError as e:
+                    logger.warning(f"Job {job.job_id}: Failed to delete input: {e}")
+        return len(orphaned)
 
     def set_input_file(self, job_id: str, file_path: Path) -> None:
         """Set input file path for job.
@@ -102,9 +209,7 @@ class JobManager:
             job_id: Job identifier
             file_path: Path to input file
         """
-        job = self.get_job(job_id)
-        if job:
-            job.input_file = file_path
+        self.store.update(job_id, input_file=file_path)
 
     def set_owner(self, job_id: str, owner: str) -> None:
         """Set job owner (hashed API key).
@@ -113,10 +218,8 @@ class JobManager:
             job_id: Job identifier
             owner: Hashed API key
         """
-        job = self.get_job(job_id)
-        if job:
-            job.owner = owner
-            logger.debug(f"Job {job_id} owner set to {owner}")
+        self.store.update(job_id, owner=owner)
+        logger.debug(f"Job {job_id} owner set to {owner}")
 
     def verify_ownership(self, job_id: str, owner: str) -> bool:
         """Verify job ownership.
@@ -154,10 +257,13 @@ class JobManager:
             except Exception as e:
                 logger.warning(f"Failed to delete input file: {e}")
 
-        # Delete output file (ZIP)
+        # Delete output file (ZIP, or package directory if not prebuilt)
         if job.output_file and job.output_file.exists():
             try:
-                job.output_file.unlink()
+                if job.output_file.is_dir():
+                    shutil.rmtree(job.output_file)
+                else:
+                    job.output_file.unlink()
                 files_deleted += 1
                 logger.debug(f"Deleted output file: {job.output_file}")
             except Exception as e:
@@ -165,7 +271,6 @@ class JobManager:
 
         # Delete output directory if exists
         import tempfile
-        import shutil
         output_dir = Path(tempfile.gettempdir()) / "moodlelogsmart" / f"{job_id}_output"
         if output_dir.exists():
             try:
@@ -0,0 +1,335 @@
+"""Storage backends for job records.
+
+The in-memory store keeps jobs in a per-process dict and is the default;
+it supports a single API process.
+
+The SQLite store keeps them in a shared database file (WAL mode), so every
+API process (``uvicorn --workers``, gunicorn) sees the same jobs and they
+survive restarts. The same database holds the state that must be shared
+between API processes: the job queue and its limits (SharedJobScheduler),
+single-flight tracking of identical uploads (ResultCache) and the stage
+and row counts streamed as live progress. Each API process sends a
+heartbeat, so the queued jobs and in-flight uploads of a process that
+stopped can be recognized and dropped.
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import fields
+from datetime import datetime
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Set
+import logging
+import os
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Store configuration
+JOB_STORE = os.getenv("JOB_STORE", "memory")  # memory or sqlite
+JOB_DB_PATH = os.getenv(
+    "JOB_DB_PATH", str(Path(tempfile.gettempdir()) / "moodlelogsmart" / "jobs.db")
+)
+PROCESS_HEARTBEAT_SECONDS = float(os.getenv("PROCESS_HEARTBEAT_SECONDS", "5"))
+PROCESS_TIMEOUT_SECONDS = float(os.getenv("PROCESS_TIMEOUT_SECONDS", "30"))
+
+_process_id = (None, "")
+
+
+def current_process_id() -> str:
+    """Return the ID of this API process (host, PID and start time).
+
+    Recomputed after a fork, so processes forked from a preloaded app get
+    their own ID.
+    """
+    global _process_id
+    pid = os.getpid()
+    if _process_id[0] != pid:
+        _process_id = (pid, f"{socket.gethostname()}:{pid}:{int(time.time() * 1000)}")
+    return _process_id[1]
+
+
+class JobStore(ABC):
+    """Interface shared by job storage backends.
+
+    The process methods have single-process defaults; a backend shared by
+    several API processes overrides them.
+    """
+
+    @abstractmethod
+    def add(self, job) -> None:
+        """Store a new job."""
+
+    @abstractmethod
+    def get(self, job_id: str):
+        """Return the job with this ID, or None."""
+
+    @abstractmethod
+    def update(self, job_id: str, **changes: Any) -> None:
+        """Set fields of a stored job."""
+
+    @abstractmethod
+    def update_progress(self, job_id: str, progress: int, **details: Any) -> None:
+        """Set progress (and stage or row counts) of a job that has not finished yet."""
+
+    @abstractmethod
+    def delete(self, job_id: str) -> None:
+        """Remove a job record."""
+
+    @abstractmethod
+    def list(self, owner: Optional[str] = None, status: Optional[str] = None) -> List:
+        """Return jobs, optionally filtered by owner and status."""
+
+    @property
+    def process_id(self) -> str:
+        """ID of this API process, recorded on the jobs it creates."""
+        return current_process_id()
+
+    def heartbeat(self) -> None:
+        """Record that this API process is alive."""
+
+    def live_processes(self) -> Set[str]:
+        """Return the IDs of API processes that sent a recent heartbeat."""
+        return {self.process_id}
+
+
+class InMemoryJobStore(JobStore):
+    """Job store backed by a dict (single process only)."""
+
+    def __init__(self):
+        """Initialize in-memory store."""
+        self.jobs: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def add(self, job) -> None:
+        with self._lock:
+            self.jobs[job.job_id] = job
+
+    def get(self, job_id: str):
+        return self.jobs.get(job_id)
+
+    def update(self, job_id: str, **changes: Any) -> None:
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job:
+                for name, value in changes.items():
+                    setattr(job, name, value)
+
+    def update_progress(self, job_id: str, progress: int, **details: Any) -> None:
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job and job.completed_at is None:
+                job.progress = progress
+                for name, value in details.items():
+                    setattr(job, name, value)
+
+    def delete(self, job_id: str) -> None:
+        with self._lock:
+            self.jobs.pop(job_id, None)
+
+    def list(self, owner: Optional[str] = None, status: Optional[str] = None) -> List:
+        return [
+            job
+            for job in list(self.jobs.values())
+            if (owner is None or job.owner == owner)
+            and (status is None or job.status == status)
+        ]
+
+
+class SQLiteJobStore(JobStore):
+    """Job store backed by a SQLite database that survives restarts.
+
+    Each thread gets its own connection. Columns are derived from the Job
+    dataclass; fields added to Job later are added to existing databases
+    with ALTER TABLE on startup. Other components sharing state between API
+    processes keep their tables in the same database (see ``transaction()``).
+    """
+
+    TABLE = "jobs"
+    PROCESSES_TABLE = "api_processes"
+
+    def __init__(self, db_path: str, job_class=None):
+        """Initialize SQLite store.
+
+        Args:
+            db_path: Path to the database file (created if missing)
+            job_class: Dataclass used for job records (default: Job)
+        """
+        if job_class is None:
+            from moodlelogsmart.api.job_manager import Job
+
+            job_class = Job
+
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.job_class = job_class
+        self.columns = [f.name for f in fields(job_class)]
+        self._types = {f.name: f.type for f in fields(job_class)}
+        self._local = threading.local()
+        self._create_schema()
+        self.heartbeat()
+
+    def connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run statements in one write transaction (BEGIN IMMEDIATE).
+
+        The write lock is taken at the start, so a read-then-write sequence
+        is not interleaved with another process doing the same.
+        """
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _create_schema(self) -> None:
+        """Create the jobs table and indexes, adding any missing columns."""
+        conn = self.connection()
+        columns = ", ".join(
+            f"{name} TEXT PRIMARY KEY" if name == "job_id" else name for name in self.columns
+        )
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {self.TABLE} ({columns})")
+
+        existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({self.TABLE})")}
+        for name in self.columns:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {self.TABLE} ADD COLUMN {name}")
+                logger.info(f"Job store: added column {name}")
+
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_jobs_owner ON {self.TABLE} (owner)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_jobs_status ON {self.TABLE} (status)")
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.PROCESSES_TABLE} "
+            "(process_id TEXT PRIMARY KEY, heartbeat REAL)"
+        )
+
+    @staticmethod
+    def _to_db(value: Any) -> Any:
+        """Convert a field value to a SQLite value."""
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, Path):
+            return str(value)
+        return value
+
+    def _from_row(self, row: sqlite3.Row):
+        """Build a job object from a database row."""
+        values = {}
+        for name in self.columns:
+            value = row[name]
+            field_type = str(self._types[name])
+            if value is not None and "datetime" in field_type:
+                value = datetime.fromisoformat(value)
+            elif value is not None and "Path" in field_type:
+                value = Path(value)
+            values[name] = value
+        return self.job_class(**values)
+
+    def add(self, job) -> None:
+        placeholders = ", ".join("?" for _ in self.columns)
+        self.connection().execute(
+            f"INSERT INTO {self.TABLE} ({', '.join(self.columns)}) VALUES ({placeholders})",
+            [self._to_db(getattr(job, name)) for name in self.columns],
+        )
+
+    def get(self, job_id: str):
+        row = self.connection().execute(
+            f"SELECT * FROM {self.TABLE} WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        return self._from_row(row) if row else None
+
+    def update(self, job_id: str, **changes: Any) -> None:
+        unknown = set(changes) - set(self.columns)
+        if unknown:
+            raise ValueError(f"Unknown job fields: {sorted(unknown)}")
+
+        assignments = ", ".join(f"{name} = ?" for name in changes)
+        self.connection().execute(
+            f"UPDATE {self.TABLE} SET {assignments} WHERE job_id = ?",
+            [self._to_db(value) for value in changes.values()] + [job_id],
+        )
+
+    def update_progress(self, job_id: str, progress: int, **details: Any) -> None:
+        unknown = set(details) - set(self.columns)
+        if unknown:
+            raise ValueError(f"Unknown job fields: {sorted(unknown)}")
+
+        # Single statement, so a late progress message cannot reopen a finished job
+        assignments = "".join(f", {name} = ?" for name in details)
+        self.connection().execute(
+            f"UPDATE {self.TABLE} SET progress = ?{assignments} "
+            "WHERE job_id = ? AND completed_at IS NULL",
+            [progress] + [self._to_db(value) for value in details.values()] + [job_id],
+        )
+
+    def delete(self, job_id: str) -> None:
+        self.connection().execute(f"DELETE FROM {self.TABLE} WHERE job_id = ?", (job_id,))
+
+    def list(self, owner: Optional[str] = None, status: Optional[str] = None) -> List:
+        query = f"SELECT * FROM {self.TABLE} WHERE 1 = 1"
+        params: List[Any] = []
+        if owner is not None:
+            query += " AND owner = ?"
+            params.append(owner)
+        if status is not None:
+            query += " AND status = ?"
+            params.append(status)
+        return [self._from_row(row) for row in self.connection().execute(query, params)]
+
+    def heartbeat(self) -> None:
+        now = time.time()
+        conn = self.connection()
+        conn.execute(
+            f"INSERT OR REPLACE INTO {self.PROCESSES_TABLE} (process_id, heartbeat) VALUES (?, ?)",
+            (self.process_id, now),
+        )
+        conn.execute(
+            f"DELETE FROM {self.PROCESSES_TABLE} WHERE heartbeat < ?",
+            (now - 10 * PROCESS_TIMEOUT_SECONDS,),
+        )
+
+    def live_processes(self) -> Set[str]:
+        rows = self.connection().execute(
+            f"SELECT process_id FROM {self.PROCESSES_TABLE} WHERE heartbeat >= ?",
+            (time.time() - PROCESS_TIMEOUT_SECONDS,),
+        )
+        return {row["process_id"] for row in rows} | {self.process_id}
+
+
+def create_job_store(kind: str = JOB_STORE, db_path: str = JOB_DB_PATH) -> JobStore:
+    """Create the job store selected by configuration.
+
+    Args:
+        kind: Backend name ("memory" or "sqlite")
+        db_path: Database path for the SQLite backend
+
+    Returns:
+        JobStore instance
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    if kind == "memory":
+        return InMemoryJobStore()
+    if kind == "sqlite":
+        logger.info(f"Using SQLite job store at {db_path}")
+        return SQLiteJobStore(db_path)
+    raise ValueError(f"Unknown JOB_STORE: {kind}")
@@ -10,19 +10,25 @@ class UploadResponse(BaseModel):
     """Response from upload endpoint."""
 
     job_id: str = Field(..., description="Unique job identifier (UUID)")
-    status: Literal["processing", "completed", "failed"] = Field(
+    status: Literal["queued", "processing", "completed", "failed"] = Field(
         default="processing", description="Current job status"
     )
     message: str = Field(default="File uploaded and processing started")
+    queue_position: Optional[int] = Field(
+        default=None, ge=1, description="Position in the job queue if status is queued"
+    )
 
 
 class StatusResponse(BaseModel):
     """Response from status endpoint."""
 
     job_id: str = Field(..., description="Unique job identifier")
-    status: Literal["processing", "completed", "failed"] = Field(
+    status: Literal["queued", "processing", "completed", "failed"] = Field(
         ..., description="Current job status"
     )
+    queue_position: Optional[int] = Field(
+        default=None, ge=1, description="Position in the job queue if status is queued"
+    )
     progress: int = Field(default=0, ge=0, le=100, description="Progress percentage (0-100)")
     error: Optional[str] = Field(default=None, description="Error message if status is failed")
     created_at: Optional[datetime] = Field(default=None, description="Job creation timestamp")
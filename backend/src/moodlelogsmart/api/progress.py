@@ -0,0 +1,187 @@
+"""Live progress of running jobs, pushed to Server-Sent Events streams.
+
+Workers report the current stage and the number of rows processed; the
+tracker derives throughput (rows/s) and an ETA from those reports and wakes
+up the streams following the job. Tracking is per API process; a stream
+served by another process builds its events from the progress, stage and
+row counts stored with the job (see ``event_from_job``) each time it polls.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ProgressEvent:
+    """Snapshot of a job's progress, sent as one SSE message."""
+
+    job_id: str
+    status: str = "processing"
+    progress: int = 0
+    stage: Optional[str] = None
+    rows_processed: int = 0
+    total_rows: int = 0
+    rows_per_second: Optional[float] = None
+    eta_seconds: Optional[float] = None
+    seq: int = 0
+    started_at: float = field(default_factory=time.monotonic, repr=False)
+
+    def to_dict(self) -> Dict:
+        """Return the fields sent to clients."""
+        data = asdict(self)
+        data.pop("started_at")
+        return data
+
+
+class ProgressTracker:
+    """Keeps the latest progress event per job and notifies subscribers."""
+
+    def __init__(self):
+        """Initialize progress tracker."""
+        self._events: Dict[str, ProgressEvent] = {}
+        self._waiters: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+        # Updated from worker listener threads, read from event loops
+        self._lock = threading.Lock()
+
+    def update(
+        self,
+        job_id: str,
+        progress: int,
+        stage: Optional[str] = None,
+        rows_processed: Optional[int] = None,
+        total_rows: Optional[int] = None,
+    ) -> None:
+        """Record a progress report from a running job.
+
+        Args:
+            job_id: Job identifier
+            progress: Progress percentage (0-100)
+            stage: Pipeline stage being run
+            rows_processed: Rows through the pipeline so far
+            total_rows: Rows in the input (estimate)
+        """
+        with self._lock:
+            event = self._events.get(job_id)
+            if event is None:
+                event = ProgressEvent(job_id=job_id, started_at=time.monotonic())
+                self._events[job_id] = event
+            elif event.status != "processing":
+                return  # Late report of a finished job
+
+            event.progress = progress
+            event.stage = stage or event.stage
+            if total_rows:
+                event.total_rows = total_rows
+            if rows_processed is not None:
+                event.rows_processed = rows_processed
+
+            elapsed = time.monotonic() - event.started_at
+            if event.rows_processed and elapsed > 0:
+                event.rows_per_second = round(event.rows_processed / elapsed, 1)
+                remaining = max(0, event.total_rows - event.rows_processed)
+                event.eta_seconds = round(remaining / event.rows_per_second, 1)
+
+            event.seq += 1
+        self._notify(job_id)
+
+    def finish(self, job_id: str, status: str) -> None:
+        """Mark a job as completed or failed and wake up its streams.
+
+        Args:
+            job_id: Job identifier
+            status: Final status
+        """
+        with self._lock:
+            event = self._events.setdefault(job_id, ProgressEvent(job_id=job_id))
+            event.status = status
+            if status == "completed":
+                event.progress = 100
+                event.eta_seconds = 0.0
+            event.seq += 1
+        self._notify(job_id)
+
+    def get(self, job_id: str) -> Optional[ProgressEvent]:
+        """Return a copy of the latest event of a job, or None."""
+        with self._lock:
+            event = self._events.get(job_id)
+            return ProgressEvent(**asdict(event)) if event else None
+
+    def forget(self, job_id: str) -> None:
+        """Drop the state of a job (called when the job is deleted)."""
+        with self._lock:
+            self._events.pop(job_id, None)
+
+    async def wait(self, job_id: str, after_seq: int, timeout: float) -> None:
+        """Wait until a job has an event newer than ``after_seq``, or timeout.
+
+        Args:
+            job_id: Job identifier
+            after_seq: Sequence number of the last event seen
+            timeout: Seconds to wait at most
+        """
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            event = self._events.get(job_id)
+            if event is not None and event.seq > after_seq:
+                return
+            self._waiters.setdefault(job_id, set()).add(waiter)
+
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(job_id)
+                if waiters is not None:
+                    waiters.discard(waiter)
+                    if not waiters:
+                        del self._waiters[job_id]
+
+    def _notify(self, job_id: str) -> None:
+        """Wake up the streams waiting on a job."""
+        with self._lock:
+            waiters: List = list(self._waiters.get(job_id, ()))
+        for loop, ready in waiters:
+            try:
+                loop.call_soon_threadsafe(ready.set)
+            except RuntimeError:
+                pass  # Event loop of the stream is gone
+
+
+
+def event_from_job(job) -> ProgressEvent:
+    """Build a progress event from a stored job record.
+
+    Used for jobs running in another API process, whose reports reach this
+    process only through the job store. Throughput and ETA are derived from
+    the time processing started.
+
+    Args:
+        job: Job record
+
+    Returns:
+        ProgressEvent with sequence number 0
+    """
+    event = ProgressEvent(
+        job_id=job.job_id,
+        status=job.status,
+        progress=job.progress,
+        stage=job.stage,
+        rows_processed=job.rows_processed or 0,
+        total_rows=job.total_rows or 0,
+    )
+    if job.started_at is not None and event.rows_processed:
+        elapsed = (datetime.now() - job.started_at).total_seconds()
+        if elapsed > 0:
+            event.rows_per_second = round(event.rows_processed / elapsed, 1)
+            remaining = max(0, event.total_rows - event.rows_processed)
+            event.eta_seconds = round(remaining / event.rows_per_second, 1)
+    return event
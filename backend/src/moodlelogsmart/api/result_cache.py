@@ -0,0 +1,348 @@
+"""Result cache keyed by upload content.
+
+Results are stored as ZIP files named after a key derived from the
+SHA-256 of the uploaded CSV, the ruleset version and the processing
+options. A repeated upload reuses the stored ZIP instead of rerunning the
+pipeline, and an upload identical to one still being processed waits for
+that job (single flight) instead of starting another.
+
+The cache directory can be shared by several API processes. Single-flight
+tracking is per process unless a SQLite job store is given: in-flight keys
+are then recorded in its database, and a job attached to a leader running
+in another API process polls that record until the leader finishes.
+"""
+
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from moodlelogsmart import metrics
+from moodlelogsmart.api.job_store import SQLiteJobStore
+from moodlelogsmart.core.export.zip_package import ResultPackage
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+RESULT_CACHE_DIR = os.getenv(
+    "RESULT_CACHE_DIR", str(Path(tempfile.gettempdir()) / "moodlelogsmart" / "cache")
+)
+RESULT_CACHE_MAX_MB = int(os.getenv("RESULT_CACHE_MAX_MB", "1024"))
+RESULT_CACHE_MAX_AGE_HOURS = int(os.getenv("RESULT_CACHE_MAX_AGE_HOURS", "24"))
+RESULT_CACHE_POLL_SECONDS = float(os.getenv("RESULT_CACHE_POLL_SECONDS", "1"))
+
+# Bump when the content of the results ZIP changes for the same input
+RESULT_FORMAT_VERSION = 1
+
+
+class ResultCache:
+    """File-based cache of result ZIPs with single-flight deduplication."""
+
+    INFLIGHT_TABLE = "inflight_results"
+
+    def __init__(
+        self,
+        cache_dir: str = RESULT_CACHE_DIR,
+        max_bytes: int = RESULT_CACHE_MAX_MB * 1024 * 1024,
+        max_age_seconds: float = RESULT_CACHE_MAX_AGE_HOURS * 3600,
+        store: Optional[SQLiteJobStore] = None,
+        poll_seconds: float = RESULT_CACHE_POLL_SECONDS,
+    ):
+        """Initialize result cache.
+
+        Args:
+            cache_dir: Directory holding cached ZIPs
+            max_bytes: Total size above which least recently used entries go
+            max_age_seconds: Age after which an entry is discarded
+            store: SQLite job store shared by the API processes (optional)
+            poll_seconds: Interval at which a leader in another process is polled
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self.joins = 0
+        self.evictions = 0
+        self._inflight: Dict[str, Tuple[str, Future]] = {}
+        self._lock = threading.Lock()
+        self.store = store
+        self.poll_seconds = poll_seconds
+        if store is not None:
+            store.connection().execute(
+                f"CREATE TABLE IF NOT EXISTS {self.INFLIGHT_TABLE} ("
+                "key TEXT PRIMARY KEY, leader_job_id TEXT, process_id TEXT, "
+                "finished_at REAL, zip_path TEXT, error TEXT)"
+            )
+
+    @staticmethod
+    def key(content_hash: str, ruleset: str, options: Optional[Dict[str, Any]] = None) -> str:
+        """Build the cache key for an upload.
+
+        Args:
+            content_hash: SHA-256 hex digest of the uploaded file
+            ruleset: Ruleset version (see CompiledRuleset.version)
+            options: Processing options that change the results
+
+        Returns:
+            Hex digest identifying the results
+        """
+        material = json.dumps(
+            [RESULT_FORMAT_VERSION, content_hash, ruleset, options or {}], sort_keys=True
+        )
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.zip"
+
+    def get(self, key: str) -> Optional[Path]:
+        """Return the cached ZIP for a key, counting a hit or a miss.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Path to the cached ZIP, or None
+        """
+        path = self._path(key)
+        try:
+            age = time.time() - path.stat().st_mtime
+        except FileNotFoundError:
+            age = None
+
+        if age is None or age > self.max_age_seconds:
+            self.misses += 1
+            metrics.CACHE_REQUESTS.labels(result="miss").inc()
+            return None
+
+        os.utime(path)  # Mark as recently used
+        self.hits += 1
+        metrics.CACHE_REQUESTS.labels(result="hit").inc()
+        logger.info(f"Result cache hit: {key[:12]}")
+        return path
+
+    def put(self, key: str, zip_path: Path) -> Path:
+        """Store a result ZIP under a key.
+
+        Args:
+            key: Cache key
+            zip_path: ZIP produced by the pipeline, or its package directory
+                      when the ZIP was not prebuilt
+
+        Returns:
+            Path to the cached copy
+        """
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        if Path(zip_path).is_dir():
+            ResultPackage(zip_path).assemble(tmp)
+        else:
+            _link_or_copy(zip_path, tmp)
+        os.replace(tmp, path)
+        logger.info(f"Result cache stored: {key[:12]} ({path.stat().st_size} bytes)")
+        self.evict()
+        return path
+
+    @staticmethod
+    def materialize(cached: Path, destination: Path) -> Path:
+        """Give a job its own file for a cached ZIP.
+
+        Job cleanup deletes the job's file, so it must not be the cache entry.
+
+        Args:
+            cached: Path returned by ``get()``
+            destination: Path for the job's ZIP
+
+        Returns:
+            destination
+        """
+        _link_or_copy(cached, destination)
+        return destination
+
+    def join(self, key: str, job_id: str) -> Optional[Tuple[str, Future]]:
+        """Register a job as processing a key, or find the job already doing it.
+
+        Args:
+            key: Cache key
+            job_id: Job that would process the upload
+
+        Returns:
+            (leader job ID, future resolving to the leader's ZIP path) if the
+            key is already in flight, None if ``job_id`` is now the leader
+        """
+        leader = None
+        if self.store is not None:
+            leader = self._join_shared(key, job_id)
+
+        with self._lock:
+            inflight = self._inflight.get(key)
+            if inflight is None and leader is None:
+                self._inflight[key] = (job_id, Future())
+                return None
+            self.joins += 1
+            metrics.CACHE_REQUESTS.labels(result="join").inc()
+            if inflight is not None:
+                return inflight
+
+        # Leader runs in another API process
+        future: Future = Future()
+        threading.Thread(
+            target=self._watch, args=(key, leader, future), name="result-cache-watch", daemon=True
+        ).start()
+        return leader, future
+
+    def _join_shared(self, key: str, job_id: str) -> Optional[str]:
+        """Record ``job_id`` as leader of a key in the shared table.
+
+        Returns:
+            Leader job ID if another job already leads the key, None otherwise
+        """
+        with self.store.transaction() as conn:
+            row = conn.execute(
+                f"SELECT * FROM {self.INFLIGHT_TABLE} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and (
+                row["finished_at"] is not None
+                or row["process_id"] not in self.store.live_processes()
+            ):
+                conn.execute(f"DELETE FROM {self.INFLIGHT_TABLE} WHERE key = ?", (key,))
+                row = None
+            if row is not None:
+                return row["leader_job_id"]
+            conn.execute(
+                f"INSERT INTO {self.INFLIGHT_TABLE} (key, leader_job_id, process_id) "
+                "VALUES (?, ?, ?)",
+                (key, job_id, self.store.process_id),
+            )
+        return None
+
+    def _watch(self, key: str, leader_job_id: str, future: Future) -> None:
+        """Resolve ``future`` once a leader in another API process finishes."""
+        conn = self.store.connection()
+        while True:
+            time.sleep(self.poll_seconds)
+            row = conn.execute(
+                f"SELECT * FROM {self.INFLIGHT_TABLE} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row["leader_job_id"] != leader_job_id:
+                future.set_exception(RuntimeError("Leader job was abandoned"))
+                return
+            if row["finished_at"] is not None:
+                if row["zip_path"]:
+                    future.set_result(Path(row["zip_path"]))
+                else:
+                    future.set_exception(RuntimeError(row["error"] or "Processing failed"))
+                return
+            if row["process_id"] not in self.store.live_processes():
+                future.set_exception(RuntimeError("API process running the leader job stopped"))
+                return
+
+    def finish(
+        self, key: str, zip_path: Optional[Path] = None, error: Optional[str] = None
+    ) -> None:
+        """Complete an in-flight key and wake up the jobs waiting on it.
+
+        Args:
+            key: Cache key
+            zip_path: Cached ZIP if the leader succeeded
+            error: Error message if the leader failed
+        """
+        with self._lock:
+            inflight = self._inflight.pop(key, None)
+        if inflight is None:
+            return
+
+        if self.store is not None:
+            # Kept for attached jobs of other processes; replaced by the next join
+            self.store.connection().execute(
+                f"UPDATE {self.INFLIGHT_TABLE} SET finished_at = ?, zip_path = ?, error = ? "
+                "WHERE key = ? AND leader_job_id = ?",
+                (time.time(), str(zip_path) if zip_path else None, error, key, inflight[0]),
+            )
+
+        _, future = inflight
+        if zip_path is not None:
+            future.set_result(zip_path)
+        else:
+            future.set_exception(RuntimeError(error or "Processing failed"))
+
+    def evict(self) -> None:
+        """Remove expired entries, then least recently used ones over max_bytes."""
+        now = time.time()
+        if self.store is not None:
+            self.store.connection().execute(
+                f"DELETE FROM {self.INFLIGHT_TABLE} WHERE finished_at < ?",
+                (now - self.max_age_seconds,),
+            )
+        entries = []
+        for path in self.cache_dir.glob("*.zip"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime > self.max_age_seconds:
+                self._remove(path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path: Path) -> None:
+        path.unlink(missing_ok=True)
+        self.evictions += 1
+        logger.debug(f"Result cache evicted: {path.name}")
+
+    def stats(self) -> Dict[str, int]:
+        """Return cache counters."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "joins": self.joins,
+            "evictions": self.evictions,
+            "inflight": len(self._inflight),
+        }
+
+
+def _link_or_copy(source: Path, destination: Path) -> None:
+    """Hard-link a file, copying when linking is not possible."""
+    destination.unlink(missing_ok=True)
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+# Global result cache instance
+_result_cache: Optional[ResultCache] = None
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Get or create global result cache instance.
+
+    Single-flight tracking is shared through the job database when the
+    SQLite job store is used.
+
+    Returns:
+        ResultCache, or None when RESULT_CACHE_ENABLED is false
+    """
+    global _result_cache
+    if _result_cache is None and RESULT_CACHE_ENABLED:
+        from moodlelogsmart.api.job_manager import get_job_manager
+
+        store = get_job_manager().store
+        _result_cache = ResultCache(store=store if isinstance(store, SQLiteJobStore) else None)
+    return _result_cache
@@ -0,0 +1,376 @@
+"""Admission control and ordering for processing jobs.
+
+At most MAX_CONCURRENT_JOBS pipelines run at once; further jobs wait in a
+bounded queue. When a slot frees up the next job is chosen by:
+
+1. jobs waiting longer than SCHEDULER_MAX_WAIT_SECONDS (no starvation)
+2. owners (API keys) with the fewest running jobs (fairness)
+3. the smallest input by CSV line count (shortest job first)
+4. arrival order
+
+JobScheduler keeps the queue in memory, for a single API process. With
+the SQLite job store, SharedJobScheduler keeps it in the job database so
+the limits and the ordering apply to all API processes together.
+"""
+
+import asyncio
+import itertools
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from moodlelogsmart import metrics
+from moodlelogsmart.api.job_store import SQLiteJobStore
+from moodlelogsmart.api.worker_pool import WORKER_POOL_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Scheduler configuration
+MAX_CONCURRENT_JOBS = int(os.getenv("MAX_CONCURRENT_JOBS", str(max(1, WORKER_POOL_SIZE))))
+MAX_QUEUED_JOBS = int(os.getenv("MAX_QUEUED_JOBS", "50"))
+SCHEDULER_MAX_WAIT_SECONDS = int(os.getenv("SCHEDULER_MAX_WAIT_SECONDS", "600"))
+QUEUE_RETRY_AFTER_SECONDS = int(os.getenv("QUEUE_RETRY_AFTER_SECONDS", "30"))
+SCHEDULER_POLL_SECONDS = float(os.getenv("SCHEDULER_POLL_SECONDS", "0.5"))  # Shared queue
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is full."""
+
+
+@dataclass
+class _Entry:
+    """A job admitted to the scheduler."""
+
+    job_id: str
+    owner: Optional[str]
+    cost: int
+    seq: int
+    loop: asyncio.AbstractEventLoop
+    ready: asyncio.Future
+    queued_at: float = field(default_factory=time.monotonic)
+
+
+class JobScheduler:
+    """Limits concurrent jobs and orders the waiting ones."""
+
+    def __init__(
+        self,
+        max_concurrent: int = MAX_CONCURRENT_JOBS,
+        max_queued: int = MAX_QUEUED_JOBS,
+        max_wait_seconds: float = SCHEDULER_MAX_WAIT_SECONDS,
+    ):
+        """Initialize scheduler.
+
+        Args:
+            max_concurrent: Jobs allowed to run at the same time
+            max_queued: Jobs allowed to wait for a slot
+            max_wait_seconds: Wait after which a job skips the SJF ordering
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.max_wait_seconds = max_wait_seconds
+        self._queued: Dict[str, _Entry] = {}
+        self._running: Dict[str, _Entry] = {}
+        self._seq = itertools.count()
+        # Requests may run on different event loops (threads), e.g. in tests
+        self._lock = threading.Lock()
+
+    def is_full(self) -> bool:
+        """Whether a new job would be rejected right now."""
+        with self._lock:
+            return not self._has_slot() and len(self._queued) >= self.max_queued
+
+    def admit(self, job_id: str, owner: Optional[str], cost: int) -> bool:
+        """Register a job, starting it at once if a slot is free.
+
+        Must be called from the event loop that will await ``run()``.
+
+        Args:
+            job_id: Job identifier
+            owner: Hashed API key of the job owner
+            cost: Estimated size of the job (CSV line count)
+
+        Returns:
+            True if the job got a slot, False if it is queued
+
+        Raises:
+            QueueFullError: If no slot is free and the queue is full
+        """
+        loop = asyncio.get_running_loop()
+        entry = _Entry(
+            job_id=job_id,
+            owner=owner,
+            cost=cost,
+            seq=next(self._seq),
+            loop=loop,
+            ready=loop.create_future(),
+        )
+
+        with self._lock:
+            if not self._has_slot() and len(self._queued) >= self.max_queued:
+                raise QueueFullError(f"Job queue is full ({self.max_queued} jobs)")
+
+            self._queued[job_id] = entry
+            self._dispatch()
+            started = job_id in self._running
+
+        logger.info(
+            f"Job {job_id}: {'started' if started else 'queued'} "
+            f"(cost={cost}, running={len(self._running)}, queued={len(self._queued)})"
+        )
+        return started
+
+    async def run(self, job_id: str, job: Callable[[], Awaitable[None]]) -> None:
+        """Wait for the job's slot, run it and release the slot.
+
+        Args:
+            job_id: Job identifier previously passed to ``admit()``
+            job: Coroutine function processing the job
+        """
+        with self._lock:
+            entry = self._queued.get(job_id) or self._running.get(job_id)
+        if entry is None:
+            raise KeyError(f"Job {job_id} was not admitted")
+
+        try:
+            await entry.ready
+            await job()
+        finally:
+            self.release(job_id)
+
+    def release(self, job_id: str) -> None:
+        """Forget a job and hand its slot to the next waiting one.
+
+        Args:
+            job_id: Job identifier
+        """
+        with self._lock:
+            self._queued.pop(job_id, None)
+            self._running.pop(job_id, None)
+            self._dispatch()
+
+    def position(self, job_id: str) -> Optional[int]:
+        """Return the 1-based queue position of a waiting job.
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            Position in the queue, or None if the job is not waiting here
+        """
+        with self._lock:
+            if job_id not in self._queued:
+                return None
+            order = sorted(self._queued.values(), key=self._priority)
+        return next(i for i, entry in enumerate(order, 1) if entry.job_id == job_id)
+
+    def stats(self) -> Dict[str, int]:
+        """Return running and queued job counts."""
+        return {"running": len(self._running), "queued": len(self._queued)}
+
+    def _has_slot(self) -> bool:
+        return len(self._running) < self.max_concurrent
+
+    def _priority(self, entry: _Entry):
+        """Sort key for waiting jobs (lower runs first)."""
+        starving = time.monotonic() - entry.queued_at > self.max_wait_seconds
+        running_for_owner = sum(1 for e in self._running.values() if e.owner == entry.owner)
+        return (not starving, running_for_owner, entry.cost, entry.seq)
+
+    def _dispatch(self) -> None:
+        """Move waiting jobs into free slots (caller holds the lock)."""
+        while self._queued and self._has_slot():
+            entry = min(self._queued.values(), key=self._priority)
+            del self._queued[entry.job_id]
+            try:
+                entry.loop.call_soon_threadsafe(_resolve, entry.ready)
+            except RuntimeError:
+                # Event loop of the waiting request is gone; nothing will run the job
+                logger.warning(f"Job {entry.job_id}: dropped, its event loop is closed")
+                continue
+            self._running[entry.job_id] = entry
+
+        metrics.QUEUE_DEPTH.set(len(self._queued))
+        metrics.ACTIVE_JOBS.set(len(self._running))
+
+
+def _resolve(future: asyncio.Future) -> None:
+    """Wake up a job waiting for its slot."""
+    if not future.done():
+        future.set_result(None)
+
+
+class SharedJobScheduler(JobScheduler):
+    """JobScheduler whose queue is a table of the SQLite job database.
+
+    Every API process admits jobs into the same table, so the limits and
+    the ordering are global. Any process may hand a free slot to any queued
+    job (on admit, release or poll); the process that admitted a job polls
+    its row and starts the job once it is marked running. Rows of API
+    processes that stopped sending heartbeats are dropped, freeing their
+    slots.
+    """
+
+    TABLE = "job_queue"
+
+    def __init__(
+        self,
+        store: SQLiteJobStore,
+        max_concurrent: int = MAX_CONCURRENT_JOBS,
+        max_queued: int = MAX_QUEUED_JOBS,
+        max_wait_seconds: float = SCHEDULER_MAX_WAIT_SECONDS,
+        poll_seconds: float = SCHEDULER_POLL_SECONDS,
+    ):
+        """Initialize shared scheduler.
+
+        Args:
+            store: SQLite job store whose database holds the queue
+            max_concurrent: Jobs allowed to run at the same time (all processes)
+            max_queued: Jobs allowed to wait for a slot (all processes)
+            max_wait_seconds: Wait after which a job skips the SJF ordering
+            poll_seconds: Interval at which a queued job checks for its slot
+        """
+        super().__init__(max_concurrent, max_queued, max_wait_seconds)
+        self.store = store
+        self.poll_seconds = poll_seconds
+        store.connection().execute(
+            f"CREATE TABLE IF NOT EXISTS {self.TABLE} ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT UNIQUE, owner TEXT, "
+            "cost INTEGER, queued_at REAL, running INTEGER DEFAULT 0, process_id TEXT)"
+        )
+
+    def is_full(self) -> bool:
+        running, queued = self._split(self._rows(self.store.connection()))
+        return len(running) >= self.max_concurrent and len(queued) >= self.max_queued
+
+    def admit(self, job_id: str, owner: Optional[str], cost: int) -> bool:
+        with self.store.transaction() as conn:
+            running, queued = self._split(self._purge(conn))
+            if len(running) >= self.max_concurrent and len(queued) >= self.max_queued:
+                raise QueueFullError(f"Job queue is full ({self.max_queued} jobs)")
+
+            conn.execute(
+                f"INSERT INTO {self.TABLE} (job_id, owner, cost, queued_at, process_id) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (job_id, owner, cost, time.time(), self.store.process_id),
+            )
+            started = job_id in self._dispatch_rows(conn)
+
+        logger.info(
+            f"Job {job_id}: {'started' if started else 'queued'} "
+            f"(cost={cost}, shared queue)"
+        )
+        return started
+
+    async def run(self, job_id: str, job: Callable[[], Awaitable[None]]) -> None:
+        try:
+            while not await asyncio.to_thread(self._claimed, job_id):
+                await asyncio.sleep(self.poll_seconds)
+            await job()
+        finally:
+            await asyncio.to_thread(self.release, job_id)
+
+    def release(self, job_id: str) -> None:
+        with self.store.transaction() as conn:
+            conn.execute(f"DELETE FROM {self.TABLE} WHERE job_id = ?", (job_id,))
+            self._purge(conn)
+            self._dispatch_rows(conn)
+
+    def position(self, job_id: str) -> Optional[int]:
+        running, queued = self._split(self._rows(self.store.connection()))
+        now = time.time()
+        order = sorted(queued, key=lambda row: self._row_priority(row, running, now))
+        return next((i for i, row in enumerate(order, 1) if row["job_id"] == job_id), None)
+
+    def stats(self) -> Dict[str, int]:
+        running, queued = self._split(self._rows(self.store.connection()))
+        return {"running": len(running), "queued": len(queued)}
+
+    def _claimed(self, job_id: str) -> bool:
+        """Whether a job got its slot, handing out free slots first.
+
+        Raises:
+            KeyError: If the job is not in the queue (never admitted, or
+                      dropped because this process missed its heartbeats)
+        """
+        conn = self.store.connection()
+        row = conn.execute(
+            f"SELECT running FROM {self.TABLE} WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(f"Job {job_id} was not admitted")
+        if row["running"]:
+            return True
+
+        with self.store.transaction() as conn:
+            self._purge(conn)
+            return job_id in self._dispatch_rows(conn)
+
+    def _rows(self, conn) -> List:
+        return conn.execute(f"SELECT * FROM {self.TABLE}").fetchall()
+
+    @staticmethod
+    def _split(rows: List):
+        """Split queue rows into (running, queued)."""
+        return [r for r in rows if r["running"]], [r for r in rows if not r["running"]]
+
+    def _purge(self, conn) -> List:
+        """Drop rows of API processes that stopped; return the remaining rows."""
+        live = self.store.live_processes()
+        rows = self._rows(conn)
+        for process_id in {r["process_id"] for r in rows} - live:
+            conn.execute(f"DELETE FROM {self.TABLE} WHERE process_id = ?", (process_id,))
+            logger.warning(f"Scheduler: dropped jobs of stopped API process {process_id}")
+        return [r for r in rows if r["process_id"] in live]
+
+    def _row_priority(self, row, running: List, now: float):
+        """Sort key for a waiting row (lower runs first), as in ``_priority``."""
+        starving = now - row["queued_at"] > self.max_wait_seconds
+        running_for_owner = sum(1 for r in running if r["owner"] == row["owner"])
+        return (not starving, running_for_owner, row["cost"], row["seq"])
+
+    def _dispatch_rows(self, conn) -> List[str]:
+        """Mark the best waiting rows running while slots are free.
+
+        Returns:
+            IDs of all running jobs
+        """
+        running, queued = self._split(self._rows(conn))
+        now = time.time()
+        while queued and len(running) < self.max_concurrent:
+            row = min(queued, key=lambda r: self._row_priority(r, running, now))
+            queued.remove(row)
+            running.append(row)
+            conn.execute(f"UPDATE {self.TABLE} SET running = 1 WHERE job_id = ?", (row["job_id"],))
+
+        metrics.QUEUE_DEPTH.set(len(queued))
+        metrics.ACTIVE_JOBS.set(len(running))
+        return [r["job_id"] for r in running]
+
+
+# Global scheduler instance
+_scheduler: Optional[JobScheduler] = None
+
+
+def get_scheduler() -> JobScheduler:
+    """Get or create global scheduler instance.
+
+    The queue is shared through the job database when the SQLite job store
+    is used.
+
+    Returns:
+        JobScheduler: Global scheduler
+    """
+    global _scheduler
+    if _scheduler is None:
+        from moodlelogsmart.api.job_manager import get_job_manager
+
+        store = get_job_manager().store
+        if isinstance(store, SQLiteJobStore):
+            _scheduler = SharedJobScheduler(store)
+        else:
+            _scheduler = JobScheduler()
+    return _scheduler
@@ -0,0 +1,165 @@
+"""Streaming reception of multipart CSV uploads.
+
+The upload endpoint parses the request body itself instead of letting
+Starlette spool the whole form before the endpoint runs. The CSV part is
+validated, hashed and written to the job's input file as it arrives, so
+a file with a bad name or header is rejected after its first chunk and
+the body is written to disk exactly once. Other form fields are skipped
+without being buffered.
+"""
+
+import hashlib
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterable, Dict, Optional
+
+import aiofiles
+from fastapi import HTTPException
+from python_multipart.multipart import MultipartParser, parse_options_header
+from python_multipart.exceptions import MultipartParseError
+
+from moodlelogsmart.api.validators import CSVStreamValidator
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_FIELD = b"file"  # Form field carrying the CSV
+
+
+@dataclass
+class ReceivedUpload:
+    """CSV file received from a multipart upload."""
+
+    filename: str
+    """Client-side file name"""
+
+    size: int
+    """Bytes written"""
+
+    sha256: str
+    """SHA-256 hex digest of the file"""
+
+
+class MultipartCSVReceiver:
+    """Writes the CSV part of a multipart/form-data body to disk as it arrives.
+
+    The parser's callbacks only collect state; validation and file writes
+    happen between network chunks. File data is handed to the validator
+    and written in pieces of ``chunk_size`` bytes, so the first validated
+    piece holds the header and the first rows of the CSV.
+    """
+
+    def __init__(self, content_type: Optional[str], max_bytes: int, chunk_size: int):
+        """Initialize receiver.
+
+        Args:
+            content_type: Content-Type header of the request
+            max_bytes: Maximum accepted file size in bytes
+            chunk_size: Bytes of file data validated and written at a time
+
+        Raises:
+            HTTPException: 400 if the request is not multipart/form-data
+        """
+        media_type, params = parse_options_header(content_type)
+        boundary = params.get(b"boundary")
+        if media_type != b"multipart/form-data" or not boundary:
+            raise HTTPException(400, "Upload must be multipart/form-data with a CSV file")
+
+        self.chunk_size = chunk_size
+        self.filename: Optional[str] = None
+        self.validator = CSVStreamValidator(max_bytes=max_bytes)
+        self._digest = hashlib.sha256()
+        self._pending = bytearray()  # File data not yet validated and written
+        self._in_file = False
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._parser = MultipartParser(boundary, callbacks={
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    async def receive(self, body: AsyncIterable[bytes], destination: Path) -> ReceivedUpload:
+        """Parse the request body, writing the CSV part to ``destination``.
+
+        Args:
+            body: Request body chunks (e.g. ``request.stream()``)
+            destination: Path to write the file to
+
+        Returns:
+            ReceivedUpload describing the written file
+
+        Raises:
+            HTTPException: 400 if the form has no valid CSV file, 413 if the
+                file is too large
+        """
+        async with aiofiles.open(destination, "wb") as out:
+            async for chunk in body:
+                self._write(chunk)
+                while len(self._pending) >= self.chunk_size:
+                    await self._flush(out, self.chunk_size)
+            try:
+                self._parser.finalize()
+            except MultipartParseError:
+                raise HTTPException(400, "Malformed multipart body")
+            await self._flush(out, len(self._pending))
+
+        if self.filename is None:
+            raise HTTPException(400, "No CSV file in the upload")
+        self.validator.finish()
+        return ReceivedUpload(self.filename, self.validator.size, self._digest.hexdigest())
+
+    def _write(self, chunk: bytes) -> None:
+        try:
+            self._parser.write(chunk)
+        except MultipartParseError:
+            raise HTTPException(400, "Malformed multipart body")
+
+    async def _flush(self, out, size: int) -> None:
+        """Validate, hash and write the first ``size`` pending bytes."""
+        if not size:
+            return
+        piece = bytes(self._pending[:size])
+        del self._pending[:size]
+        self.validator.feed(piece)
+        self._digest.update(piece)
+        await out.write(piece)
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, params = parse_options_header(self._headers.get(b"content-disposition"))
+        if params.get(b"name") != UPLOAD_FIELD:
+            return
+        if self.filename is not None:
+            raise HTTPException(400, "Only one file can be uploaded")
+
+        filename = params.get(b"filename", b"").decode("utf-8", errors="replace")
+        if not filename.lower().endswith(".csv"):
+            raise HTTPException(status_code=400, detail="Only .csv files are allowed")
+        self.filename = filename
+        self._in_file = True
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file:
+            self._pending += data[start:end]
+
+    def _on_part_end(self) -> None:
+        self._in_file = False
@@ -1,5 +1,6 @@
 """Input validation utilities for API security."""
 
+import codecs
 import csv
 import io
 import uuid
@@ -32,6 +33,24 @@ def validate_csv_content(content: bytes) -> Tuple[bool, str]:
     except UnicodeDecodeError:
         raise HTTPException(400, "File encoding must be UTF-8")
 
+    return _validate_csv_text(text)
+
+
+def _validate_csv_text(text: str) -> Tuple[bool, str]:
+    """Validate header, injection patterns and row shape of CSV text.
+
+    Args:
+        text: Decoded CSV text (whole file or its first chunk)
+
+    Returns:
+        (is_valid, error_message)
+
+    Raises:
+        HTTPException: If CSV is malformed or suspicious
+    """
+    if not text.strip():
+        raise HTTPException(400, "CSV file is empty")
+
     # Use CSV sniffer to detect format
     try:
         sample = text[:4096]  # First 4KB
@@ -86,6 +105,65 @@ def validate_csv_content(content: bytes) -> Tuple[bool, str]:
         raise HTTPException(400, "CSV validation failed")
 
 
+class CSVStreamValidator:
+    """Validates a CSV upload incrementally, chunk by chunk.
+
+    The header, injection and column checks run on the first chunk; UTF-8
+    validity and the size limit are enforced on every chunk, so the body
+    never has to be resident in memory.
+    """
+
+    def __init__(self, max_bytes: int):
+        """Initialize validator.
+
+        Args:
+            max_bytes: Maximum accepted upload size in bytes
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="strict")
+
+    def feed(self, chunk: bytes) -> None:
+        """Validate the next chunk of the upload.
+
+        Args:
+            chunk: Bytes received from the client
+
+        Raises:
+            HTTPException: 413 if the size limit is exceeded, 400 if invalid
+        """
+        first_chunk = self.size == 0
+        self.size += len(chunk)
+
+        if self.size > self.max_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File size exceeds {self.max_bytes // (1024 * 1024)}MB limit",
+            )
+
+        try:
+            text = self._decoder.decode(chunk)
+        except UnicodeDecodeError:
+            raise HTTPException(400, "File encoding must be UTF-8")
+
+        if first_chunk:
+            _validate_csv_text(text)
+
+    def finish(self) -> None:
+        """Validate the end of the upload.
+
+        Raises:
+            HTTPException: 400 if the upload is empty or truncated mid-character
+        """
+        if self.size == 0:
+            raise HTTPException(400, "CSV file is empty")
+
+        try:
+            self._decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            raise HTTPException(400, "File encoding must be UTF-8")
+
+
 def validate_job_id(job_id: str) -> str:
     """Validate job ID is a valid UUID.
 
@@ -0,0 +1,440 @@
+"""Pool of pre-forked worker processes for running the processing pipeline.
+
+The pipeline is CPU bound (pandas, rule evaluation, exporters), so running
+it on the event loop stalls every other request. Jobs are instead executed
+in a pool of warm worker processes that have pandas and pm4py imported and
+every ruleset compiled. Each worker talks to the API process through its
+own pipe: it receives jobs, reports progress (percentage, stage and rows
+processed) and sends back the result. Workers are recycled after a
+configurable number of jobs to contain memory growth, and a worker whose
+job exceeds its timeout is terminated and replaced, so a stuck pipeline
+does not keep holding a CPU.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, List, Optional, Set, Tuple
+
+from moodlelogsmart.core.auto_detect.csv_detector import CSVFormat
+from moodlelogsmart.core.pipeline import PipelineResult, run_pipeline
+from moodlelogsmart.core.rules.ruleset_cache import get_ruleset_cache
+
+logger = logging.getLogger(__name__)
+
+# Pool configuration
+WORKER_POOL_SIZE = int(os.getenv("WORKER_POOL_SIZE", str(min(4, os.cpu_count() or 1))))
+WORKER_MAX_JOBS = int(os.getenv("WORKER_MAX_JOBS", "20"))  # Recycle worker after N jobs
+
+
+class JobTimeoutError(Exception):
+    """Raised when a job exceeds its timeout."""
+
+
+# Worker process state (set by _init_worker in each child process)
+_conn = None
+
+
+def _init_worker(conn) -> None:
+    """Warm up a worker process before it receives jobs.
+
+    Args:
+        conn: Pipe end used to talk to the API process
+    """
+    global _conn
+
+    _conn = conn
+
+    import pandas  # noqa: F401
+
+    try:
+        import pm4py  # noqa: F401
+    except ImportError:
+        pass
+
+    # Compile every configured ruleset before the first job
+    rulesets = get_ruleset_cache()
+    for name in rulesets.paths:
+        try:
+            rulesets.get(name)
+        except (OSError, ValueError) as e:
+            logger.error(f"Worker {os.getpid()}: ruleset {name} not loaded: {e}")
+    logger.info(f"Worker {os.getpid()} ready")
+
+
+def _worker_main(conn, max_jobs: int) -> None:
+    """Serve jobs sent through ``conn`` until told to stop or recycled.
+
+    Args:
+        conn: Pipe end used to talk to the API process
+        max_jobs: Jobs to run before exiting (0 = no limit)
+    """
+    _init_worker(conn)
+    conn.send(("ready",))
+
+    jobs = 0
+    while not max_jobs or jobs < max_jobs:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        jobs += 1
+
+        try:
+            message = ("result", _run_job(*task))
+        except Exception as e:
+            message = ("error", e)
+        try:
+            conn.send(message)
+        except Exception as e:  # Result or exception could not be pickled
+            conn.send(("error", RuntimeError(f"{type(message[1]).__name__}: {message[1]} ({e})")))
+
+
+def _run_job(
+    job_id: str,
+    input_file: str,
+    work_dir: str,
+    csv_format: Optional[CSVFormat] = None,
+    ruleset: Optional[str] = None,
+) -> PipelineResult:
+    """Run the pipeline for one job inside a worker process.
+
+    Args:
+        job_id: Job identifier
+        input_file: Path to input CSV
+        work_dir: Directory for outputs
+        csv_format: Format detected at upload time (optional)
+        ruleset: Name of the ruleset to classify with (default ruleset if None)
+
+    Returns:
+        PipelineResult from the pipeline, with the version of the ruleset
+        actually used (it may have been reloaded since the upload)
+    """
+
+    details = ("detect", 0, 0)
+
+    def stage(name: str, rows_processed: int, total_rows: int) -> None:
+        nonlocal details
+        details = (name, rows_processed, total_rows)
+
+    def report(progress: int) -> None:
+        _conn.send(("progress", job_id, progress, *details))
+
+    compiled = get_ruleset_cache().get(ruleset)
+    result = run_pipeline(
+        job_id,
+        input_file,
+        Path(work_dir),
+        progress=report,
+        classifier=compiled.classifier,
+        csv_format=csv_format,
+        stage_progress=stage,
+    )
+    result.ruleset_version = compiled.version
+    return result
+
+
+class _Worker:
+    """A worker process and the API end of its pipe."""
+
+    def __init__(self, ctx, max_jobs: int):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, args=(child_conn, max_jobs), name="pipeline-worker", daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+
+        try:
+            self.conn.recv()  # Wait until warmed up, so timeouts only count job time
+        except EOFError:
+            self.stop(terminate=True)
+            raise RuntimeError(f"Worker {self.process.pid} exited during startup")
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid
+
+    def stop(self, terminate: bool = False) -> None:
+        """Stop the process, killing it if ``terminate`` or if it does not exit."""
+        if terminate:
+            self.process.terminate()
+        else:
+            try:
+                self.conn.send(None)
+            except (OSError, ValueError):
+                pass
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class WorkerPool:
+    """Runs pipeline jobs in warm worker processes.
+
+    With ``max_workers=0`` jobs run in a thread of the API process instead,
+    which keeps the event loop free without forking (useful for debugging).
+    A thread cannot be killed, so in that mode the timeout is only checked
+    between pipeline stages.
+    """
+
+    def __init__(self, max_workers: int = WORKER_POOL_SIZE, max_jobs_per_worker: int = WORKER_MAX_JOBS):
+        """Initialize worker pool.
+
+        Args:
+            max_workers: Number of worker processes (0 = run in a thread)
+            max_jobs_per_worker: Jobs a worker runs before being replaced
+        """
+        self.max_workers = max_workers
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self._ctx = multiprocessing.get_context("spawn")
+        self._slots = threading.BoundedSemaphore(max(1, max_workers))
+        self._idle: List[_Worker] = []
+        self._workers: Set[_Worker] = set()
+        self._spawning = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    async def run(
+        self,
+        job_id: str,
+        input_file: str,
+        work_dir: Path,
+        timeout: Optional[float] = None,
+        csv_format: Optional[CSVFormat] = None,
+        ruleset: Optional[str] = None,
+    ) -> PipelineResult:
+        """Run the pipeline for a job without blocking the event loop.
+
+        Args:
+            job_id: Job identifier
+            input_file: Path to input CSV
+            work_dir: Directory for outputs
+            timeout: Seconds after which the job is aborted
+            csv_format: Format detected at upload time (optional)
+            ruleset: Name of the ruleset to classify with (default ruleset if None)
+
+        Returns:
+            PipelineResult from the pipeline
+
+        Raises:
+            JobTimeoutError: If the job runs longer than ``timeout``
+        """
+        if self.max_workers <= 0:
+            deadline = time.time() + timeout if timeout else None
+            return await asyncio.to_thread(
+                self._run_in_thread, job_id, input_file, work_dir, deadline, csv_format, ruleset
+            )
+
+        task = (job_id, input_file, str(work_dir), csv_format, ruleset)
+        return await asyncio.to_thread(self._run_in_worker, task, timeout)
+
+    def _run_in_worker(self, task: Tuple[Any, ...], timeout: Optional[float]) -> PipelineResult:
+        """Send a job to an idle worker and wait for its result.
+
+        Progress messages are forwarded to the job manager while waiting. If
+        the timeout passes first, the worker is terminated and a fresh one is
+        started in its place.
+        """
+        from moodlelogsmart.api.job_manager import get_job_manager
+
+        job_manager = get_job_manager()
+        job_id = task[0]
+
+        with self._slots:
+            worker = self._checkout()
+            deadline = time.monotonic() + timeout if timeout else None
+            try:
+                worker.conn.send(task)
+                while True:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and (remaining <= 0 or not worker.conn.poll(remaining)):
+                        logger.error(f"Job {job_id}: terminating worker {worker.pid} after {timeout}s")
+                        self._discard(worker, terminate=True)
+                        raise JobTimeoutError(f"Job {job_id} exceeded its deadline")
+
+                    kind, *payload = worker.conn.recv()
+                    if kind == "progress":
+                        job_manager.update_progress(*payload)
+                        continue
+                    break
+            except (EOFError, OSError) as e:
+                self._discard(worker, terminate=True)
+                raise RuntimeError(f"Worker {worker.pid} died while running job {job_id}") from e
+
+            worker.jobs += 1
+            self._release(worker)
+
+        if kind == "error":
+            raise payload[0]
+        return payload[0]
+
+    def start(self) -> None:
+        """Start workers until the pool is full, waiting until they are warm.
+
+        Workers are started in parallel, so startup takes about as long as
+        warming up a single worker.
+        """
+        if self.max_workers <= 0:
+            return
+        with self._cond:
+            missing = self.max_workers - len(self._workers) - self._spawning
+            self._spawning += max(0, missing)
+        threads = [threading.Thread(target=self._spawn, args=(True,)) for _ in range(missing)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        logger.info(f"Worker pool started with {len(self._workers)} workers")
+
+    def _checkout(self) -> _Worker:
+        """Take an idle worker, starting a new one if the pool is not full.
+
+        If every worker slot is taken by a worker that is still starting,
+        wait for one of them to become ready instead of exceeding the pool
+        size.
+        """
+        with self._cond:
+            while True:
+                while self._idle:
+                    worker = self._idle.pop()
+                    if worker.process.is_alive():
+                        return worker
+                    self._workers.discard(worker)
+                if len(self._workers) + self._spawning < self.max_workers:
+                    self._spawning += 1
+                    break
+                self._cond.wait()
+        return self._spawn()
+
+    def _spawn(self, idle: bool = False) -> Optional[_Worker]:
+        """Start a worker for a slot already reserved in ``_spawning``.
+
+        Args:
+            idle: Add the worker to the idle list instead of returning it
+
+        Returns:
+            The ready worker, or None if it was added to the idle list
+        """
+        worker = None
+        try:
+            worker = _Worker(self._ctx, self.max_jobs_per_worker)
+            logger.info(f"Worker {worker.pid} started")
+        except Exception as e:
+            if not idle:
+                raise
+            if not self._closed:
+                logger.error(f"Worker could not be started: {e}")
+        finally:
+            with self._cond:
+                self._spawning -= 1
+                if worker is not None:
+                    self._workers.add(worker)
+                    if idle:
+                        self._idle.append(worker)
+                self._cond.notify_all()
+        if worker is not None and idle and self._closed:
+            self.shutdown()  # The pool was shut down while the worker started
+        return None if idle else worker
+
+    def _replace(self) -> None:
+        """Start a replacement for a retired worker in the background."""
+        with self._cond:
+            if self._closed or len(self._workers) + self._spawning >= self.max_workers:
+                return
+            self._spawning += 1
+        threading.Thread(target=self._spawn, args=(True,), name="worker-replace", daemon=True).start()
+
+    def _release(self, worker: _Worker) -> None:
+        """Return a worker to the idle list, or retire it after its last job."""
+        if self.max_jobs_per_worker and worker.jobs >= self.max_jobs_per_worker:
+            self._discard(worker)  # It exits on its own after its last job
+            logger.info(f"Worker {worker.pid} recycled after {worker.jobs} jobs")
+            return
+        with self._cond:
+            self._idle.append(worker)
+            self._cond.notify_all()
+
+    def _discard(self, worker: _Worker, terminate: bool = False) -> None:
+        """Stop a worker, forget it and start its replacement."""
+        with self._cond:
+            self._workers.discard(worker)
+        worker.stop(terminate=terminate)
+        self._replace()
+
+    def _run_in_thread(
+        self,
+        job_id: str,
+        input_file: str,
+        work_dir: Path,
+        deadline: Optional[float],
+        csv_format: Optional[CSVFormat] = None,
+        ruleset: Optional[str] = None,
+    ) -> PipelineResult:
+        """Run the pipeline in the current process (thread fallback)."""
+        from moodlelogsmart.api.job_manager import get_job_manager
+
+        job_manager = get_job_manager()
+        details = ("detect", 0, 0)
+
+        def stage(name: str, rows_processed: int, total_rows: int) -> None:
+            nonlocal details
+            details = (name, rows_processed, total_rows)
+
+        def report(progress: int) -> None:
+            if deadline is not None and time.time() > deadline:
+                raise JobTimeoutError(f"Job {job_id} exceeded its deadline")
+            job_manager.update_progress(job_id, progress, *details)
+
+        compiled = get_ruleset_cache().get(ruleset)
+        result = run_pipeline(
+            job_id,
+            input_file,
+            work_dir,
+            progress=report,
+            classifier=compiled.classifier,
+            csv_format=csv_format,
+            stage_progress=stage,
+        )
+        result.ruleset_version = compiled.version
+        return result
+
+    def shutdown(self) -> None:
+        """Stop idle workers and terminate workers still running a job."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            busy = self._workers.difference(idle)
+            self._workers = set()
+        if not idle and not busy:
+            return
+        for worker in idle:
+            worker.stop()
+        for worker in busy:
+            worker.stop(terminate=True)
+        logger.info("Worker pool stopped")
+
+
+# Global worker pool instance
+_worker_pool: Optional[WorkerPool] = None
+
+
+def get_worker_pool() -> WorkerPool:
+    """Get or create global worker pool instance.
+
+    Returns:
+        WorkerPool: Global worker pool
+    """
+    global _worker_pool
+    if _worker_pool is None:
+        _worker_pool = WorkerPool()
+    return _worker_pool
@@ -0,0 +1,391 @@
+"""Command-line batch processing of Moodle log exports.
+
+Runs the same pipeline as the API (detect → map → clean → classify →
+export) over files, glob patterns or directories, without going through
+HTTP. Files are spread over a pool of worker processes, largest first so
+that a big export does not start last, and each input gets its own
+results ZIP (or directory) in the output directory.
+
+Usage:
+    moodlelogsmart exports/*.csv -o results/
+    moodlelogsmart exports/ --workers 8 --streaming
+"""
+
+import argparse
+import glob
+import logging
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from moodlelogsmart.core.pipeline import run_pipeline
+from moodlelogsmart.core.pipeline.runner import (
+    MATCHED_RULE_ID_COLUMN,
+    PIPELINE_CHUNK_ROWS,
+    RULE_PROFILE,
+)
+
+logger = logging.getLogger(__name__)
+
+# Worker process state (set by _init_worker in each child process)
+_classifier = None
+
+
+@dataclass
+class FileReport:
+    """Outcome of processing one input file."""
+
+    input_file: str
+    output: Optional[str] = None
+    events_in: int = 0
+    events_out: int = 0
+    events_quarantined: int = 0
+    seconds: float = 0.0
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.events_in / self.seconds if self.seconds > 0 else 0.0
+
+
+def expand_inputs(patterns: List[str]) -> List[Path]:
+    """Resolve files, glob patterns and directories into CSV files.
+
+    Directories are searched recursively for .csv files. Each file is
+    returned once, in the order given.
+
+    Args:
+        patterns: Paths, directories or glob patterns
+
+    Returns:
+        List of input files
+
+    Raises:
+        FileNotFoundError: If a pattern matches nothing
+    """
+    files: List[Path] = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            matches = sorted(
+                p for p in path.rglob("*") if p.is_file() and p.suffix.lower() == ".csv"
+            )
+        elif path.is_file():
+            matches = [path]
+        else:
+            matches = sorted(Path(p) for p in glob.glob(pattern, recursive=True) if Path(p).is_file())
+
+        if not matches:
+            raise FileNotFoundError(f"No input files match: {pattern}")
+        files.extend(matches)
+
+    seen = set()
+    unique = []
+    for f in files:
+        key = f.resolve()
+        if key not in seen:
+            seen.add(key)
+            unique.append(f)
+    return unique
+
+
+def output_names(files: List[Path]) -> Dict[Path, str]:
+    """Give each input a distinct output name based on its file name."""
+    names: Dict[Path, str] = {}
+    used: Dict[str, int] = {}
+    for f in files:
+        stem = f.stem
+        count = used.get(stem, 0)
+        used[stem] = count + 1
+        names[f] = stem if count == 0 else f"{stem}_{count + 1}"
+    return names
+
+
+def _init_worker(rules: Optional[str], log_level: int) -> None:
+    """Build the classifier once per worker process.
+
+    Args:
+        rules: Path to a rules YAML file (None = bundled Bloom taxonomy)
+        log_level: Logging level of the parent process
+    """
+    global _classifier
+
+    logging.basicConfig(level=log_level, format="%(levelname)s %(name)s: %(message)s")
+
+    from moodlelogsmart.core.rules.ruleset_cache import get_ruleset_cache
+
+    rulesets = get_ruleset_cache()
+    _classifier = (rulesets.load(rules) if rules else rulesets.get()).classifier
+
+
+def process_file(
+    input_file: str,
+    name: str,
+    output_dir: str,
+    streaming: Optional[bool] = None,
+    chunk_rows: int = PIPELINE_CHUNK_ROWS,
+    build_zip: bool = True,
+    profile_rules: bool = RULE_PROFILE,
+    rule_id_column: bool = MATCHED_RULE_ID_COLUMN,
+) -> FileReport:
+    """Run the pipeline for one input and move its results to ``output_dir``.
+
+    Args:
+        input_file: Path to the Moodle CSV export
+        name: Output name (``<name>_results.zip`` or ``<name>_results/``)
+        output_dir: Directory receiving the results
+        streaming: Process in chunks (None = decide by file size)
+        chunk_rows: Rows per chunk in streaming mode
+        build_zip: Write a ZIP (otherwise a directory with the members)
+        profile_rules: Add rule_profile.json with per-rule hits and timings
+        rule_id_column: Add the matched_rule_id column
+
+    Returns:
+        FileReport (failures are reported, not raised)
+    """
+    report = FileReport(input_file=input_file)
+    work_dir = Path(output_dir) / f".{name}.work"
+    start = time.perf_counter()
+    try:
+        work_dir.mkdir(parents=True, exist_ok=True)
+        result = run_pipeline(
+            name,
+            input_file,
+            work_dir,
+            classifier=_classifier,
+            streaming=streaming,
+            chunk_rows=chunk_rows,
+            build_zip=build_zip,
+            profile_rules=profile_rules,
+            rule_id_column=rule_id_column,
+        )
+        target = Path(output_dir) / (f"{name}_results.zip" if build_zip else f"{name}_results")
+        if target.is_dir():
+            shutil.rmtree(target)
+        os.replace(result.zip_path, target)
+
+        report.output = str(target)
+        report.events_in = result.events_in
+        report.events_out = result.events_out
+        report.events_quarantined = result.events_quarantined
+        report.stage_seconds = result.stage_seconds
+    except Exception as e:
+        logger.debug(f"{input_file}: processing failed", exc_info=True)
+        report.error = str(e) or type(e).__name__
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        report.seconds = time.perf_counter() - start
+    return report
+
+
+def run_batch(
+    files: List[Path],
+    output_dir: Path,
+    workers: int,
+    streaming: Optional[bool] = None,
+    chunk_rows: int = PIPELINE_CHUNK_ROWS,
+    build_zip: bool = True,
+    rules: Optional[str] = None,
+    on_done=None,
+    profile_rules: bool = RULE_PROFILE,
+    rule_id_column: bool = MATCHED_RULE_ID_COLUMN,
+) -> List[FileReport]:
+    """Process files in a process pool (or in this process with 0 workers).
+
+    Args:
+        files: Input files
+        output_dir: Directory receiving one result per input
+        workers: Worker processes (0 = process sequentially in this process)
+        streaming: Process in chunks (None = decide by file size)
+        chunk_rows: Rows per chunk in streaming mode
+        build_zip: Write ZIPs (otherwise directories with the members)
+        rules: Path to a rules YAML file (None = bundled Bloom taxonomy)
+        on_done: Called with each FileReport as soon as it is finished
+        profile_rules: Add rule_profile.json with per-rule hits and timings
+        rule_id_column: Add the matched_rule_id column
+
+    Returns:
+        FileReports in the order of ``files``
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    names = output_names(files)
+    # Largest first: the longest jobs start early and small ones fill the gaps
+    order = sorted(files, key=lambda f: f.stat().st_size, reverse=True)
+    reports: Dict[Path, FileReport] = {}
+
+    def job_args(f: Path):
+        return (
+            str(f), names[f], str(output_dir), streaming, chunk_rows, build_zip,
+            profile_rules, rule_id_column,
+        )
+
+    def finished(f: Path, report: FileReport) -> None:
+        reports[f] = report
+        if on_done:
+            on_done(report)
+
+    if workers <= 0:
+        _init_worker(rules, logging.getLogger().level)
+        for f in order:
+            finished(f, process_file(*job_args(f)))
+    else:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(files)),
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(rules, logging.getLogger().level),
+        ) as executor:
+            futures = {executor.submit(process_file, *job_args(f)): f for f in order}
+            for future in as_completed(futures):
+                f = futures[future]
+                try:
+                    report = future.result()
+                except Exception as e:  # Worker crashed (e.g. out of memory)
+                    report = FileReport(input_file=str(f), error=f"Worker failed: {e}")
+                finished(f, report)
+
+    return [reports[f] for f in files]
+
+
+def format_summary(reports: List[FileReport], wall_seconds: float) -> str:
+    """Render the per-file timing table and totals."""
+    width = max([len("File")] + [len(Path(r.input_file).name) for r in reports])
+    lines = [
+        f"{'File':<{width}}  {'Rows':>10}  {'Out':>10}  {'Quar.':>6}  "
+        f"{'Seconds':>8}  {'Rows/s':>9}  {'Slowest stage':<18}  Result",
+    ]
+    for r in reports:
+        slowest = ""
+        if r.stage_seconds:
+            stage, seconds = max(r.stage_seconds.items(), key=lambda item: item[1])
+            slowest = f"{stage} {seconds:.1f}s"
+        result = Path(r.output).name if r.ok else f"FAILED: {r.error}"
+        lines.append(
+            f"{Path(r.input_file).name:<{width}}  {r.events_in:>10,}  {r.events_out:>10,}  "
+            f"{r.events_quarantined:>6,}  {r.seconds:>8.1f}  {r.rows_per_second:>9,.0f}  "
+            f"{slowest:<18}  {result}"
+        )
+
+    ok = [r for r in reports if r.ok]
+    rows = sum(r.events_in for r in ok)
+    rate = rows / wall_seconds if wall_seconds > 0 else 0.0
+    lines.append("")
+    lines.append(
+        f"{len(ok)}/{len(reports)} files processed, {rows:,} rows "
+        f"in {wall_seconds:.1f}s ({rate:,.0f} rows/s)"
+    )
+    return "\n".join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="moodlelogsmart",
+        description="Classify Moodle log exports with Bloom's taxonomy and export event logs.",
+    )
+    parser.add_argument(
+        "inputs", nargs="+", help="CSV files, glob patterns (quoted) or directories"
+    )
+    parser.add_argument(
+        "-o", "--output-dir", type=Path, default=Path("moodlelogsmart-results"),
+        help="Directory for the results (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=os.cpu_count() or 1,
+        help="Worker processes; 0 processes files one by one in this process "
+             "(default: %(default)s)",
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--streaming", dest="streaming", action="store_true", default=None,
+        help="Process every file in chunks (default: only files over STREAMING_THRESHOLD_MB)",
+    )
+    mode.add_argument(
+        "--no-streaming", dest="streaming", action="store_false",
+        help="Load every file in memory",
+    )
+    parser.add_argument(
+        "--chunk-rows", type=int, default=PIPELINE_CHUNK_ROWS,
+        help="Rows per chunk in streaming mode (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--no-zip", dest="build_zip", action="store_false",
+        help="Write a directory of compressed members per input instead of a ZIP",
+    )
+    parser.add_argument("--rules", help="Rules YAML file (default: bundled Bloom taxonomy)")
+    parser.add_argument(
+        "--profile-rules", action="store_true", default=RULE_PROFILE,
+        help="Add rule_profile.json with per-rule hits, evaluations and timings",
+    )
+    parser.add_argument(
+        "--rule-id-column", action="store_true", default=MATCHED_RULE_ID_COLUMN,
+        help="Add the integer matched_rule_id column to the enriched outputs",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log pipeline progress")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point of the ``moodlelogsmart`` command.
+
+    Returns:
+        Exit status: 0 if every file was processed, 1 if any failed
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(levelname)s %(name)s: %(message)s",
+    )
+
+    try:
+        files = expand_inputs(args.inputs)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+    if args.rules and not Path(args.rules).is_file():
+        parser.error(f"Rules file not found: {args.rules}")
+
+    done = 0
+
+    def progress(report: FileReport) -> None:
+        nonlocal done
+        done += 1
+        status = f"{report.events_in:,} rows" if report.ok else "FAILED"
+        print(
+            f"[{done}/{len(files)}] {report.input_file}: {status} in {report.seconds:.1f}s",
+            flush=True,
+        )
+
+    start = time.perf_counter()
+    reports = run_batch(
+        files,
+        args.output_dir,
+        workers=args.workers,
+        streaming=args.streaming,
+        chunk_rows=args.chunk_rows,
+        build_zip=args.build_zip,
+        rules=args.rules,
+        on_done=progress,
+        profile_rules=args.profile_rules,
+        rule_id_column=args.rule_id_column,
+    )
+    print()
+    print(format_summary(reports, time.perf_counter() - start))
+
+    return 0 if all(r.ok for r in reports) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
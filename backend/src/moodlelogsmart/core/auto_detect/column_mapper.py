@@ -219,6 +219,20 @@ class ColumnMapper:
 
         return ColumnMapping(**mapping)
 
+    def find_column(self, csv_columns: List[str], internal_name: str) -> Optional[str]:
+        """Find the column holding one internal field, without requiring the others.
+
+        Args:
+            csv_columns: List of column names
+            internal_name: Internal field name (e.g., 'component')
+
+        Returns:
+            Matching column name, or None
+        """
+        if internal_name in csv_columns:
+            return internal_name
+        return self._find_best_match(csv_columns, self.COLUMN_ALIASES.get(internal_name, []))
+
     def _find_best_match(
         self, csv_columns: List[str], aliases: List[str]
     ) -> Optional[str]:
@@ -1,13 +1,24 @@
 """CSV format detection module.
 
 Automatically detects encoding, delimiter, and structure of CSV files.
+The file is memory-mapped and read once: encoding and delimiter come from
+samples at several offsets, and records are counted with a vectorized,
+quote-aware scan instead of parsing every line with ``csv.reader``.
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import chardet
 import csv
+import mmap
+import re
 from pathlib import Path
-from typing import Tuple
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+QUOTE = ord('"')
+NEWLINE = ord('\n')
+NON_ASCII = re.compile(rb'[\x80-\xff]')
 
 
 @dataclass
@@ -26,6 +37,13 @@ class CSVFormat:
     line_count: int
     """Total number of lines in CSV (including header)"""
 
+    row_offsets: List[int] = field(default_factory=list)
+    """Byte offsets where every ``offset_stride``-th data record starts
+    (empty when records were counted with ``csv.reader``)"""
+
+    offset_stride: int = 0
+    """Number of records between consecutive ``row_offsets`` entries"""
+
 
 class CSVDetector:
     """Detects format of CSV files automatically.
@@ -39,6 +57,12 @@ class CSVDetector:
 
     COMMON_DELIMITERS = [',', ';', '\t', '|']
 
+    SAMPLE_SIZE = 10000  # Bytes per encoding sample
+    SAMPLE_COUNT = 3  # Samples taken at start, middle and end
+    DELIMITER_SAMPLE_CHARS = 1024
+    SCAN_BLOCK_SIZE = 8 * 1024 * 1024  # Bytes scanned per record-count step
+    OFFSET_STRIDE = 10000  # Records between stored row offsets
+
     def detect(self, file_path: str) -> CSVFormat:
         """Detect encoding, delimiter and structure of CSV.
 
@@ -61,29 +85,72 @@ class CSVDetector:
         if path.stat().st_size == 0:
             raise ValueError("Arquivo CSV está vazio")
 
-        # Detect encoding
-        encoding = self._detect_encoding(file_path)
-
-        # Detect delimiter
-        delimiter = self._detect_delimiter(file_path, encoding)
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # Detect encoding
+            encoding = self._detect_encoding(self._take_samples(mm))
+            if encoding == 'ascii':
+                encoding = self._detect_beyond_samples(mm)
+
+            # Detect delimiter
+            delimiter = self._detect_delimiter(mm, encoding)
+
+            # Validate structure
+            scanned = None
+            if self._is_ascii_compatible(encoding):
+                scanned = self._scan_records(mm, delimiter)
+            if scanned is not None:
+                has_header, line_count, row_offsets = scanned
+            else:
+                has_header, line_count = self._validate_structure(
+                    file_path, encoding, delimiter
+                )
+                row_offsets = []
 
-        # Validate structure
-        has_header, line_count = self._validate_structure(
-            file_path, encoding, delimiter
-        )
+        if line_count < 2:
+            raise ValueError(
+                "CSV deve ter pelo menos 2 linhas (header + dados)"
+            )
 
         return CSVFormat(
             encoding=encoding,
             delimiter=delimiter,
             has_header=has_header,
             line_count=line_count,
+            row_offsets=row_offsets,
+            offset_stride=self.OFFSET_STRIDE if row_offsets else 0,
         )
 
-    def _detect_encoding(self, file_path: str) -> str:
+    def _take_samples(self, mm: mmap.mmap) -> bytes:
+        """Take encoding samples from several offsets of the file.
+
+        Samples after the first start at a line boundary so multi-byte
+        characters are not split at the start of a sample.
+
+        Args:
+            mm: Memory-mapped file
+
+        Returns:
+            Concatenated sample bytes
+        """
+        size = len(mm)
+        if size <= self.SAMPLE_SIZE * self.SAMPLE_COUNT:
+            return mm[:]
+
+        samples = [mm[:self.SAMPLE_SIZE]]
+        for i in range(1, self.SAMPLE_COUNT):
+            start = (size - self.SAMPLE_SIZE) * i // (self.SAMPLE_COUNT - 1)
+            line_start = mm.find(b'\n', start, start + self.SAMPLE_SIZE)
+            if line_start != -1:
+                start = line_start + 1
+            samples.append(mm[start:start + self.SAMPLE_SIZE])
+
+        return b'\n'.join(samples)
+
+    def _detect_encoding(self, sample: bytes) -> str:
         """Detect file encoding using chardet.
 
         Args:
-            file_path: Path to CSV file
+            sample: Bytes sampled from the file
 
         Returns:
             Detected encoding name (lowercase)
@@ -91,23 +158,44 @@ class CSVDetector:
         Raises:
             ValueError: If encoding cannot be detected with confidence
         """
-        with open(file_path, 'rb') as f:
-            raw_data = f.read(10000)  # Read first 10KB
-            result = chardet.detect(raw_data)
-
-            if result['confidence'] < 0.7:
-                raise ValueError(
-                    "Não foi possível detectar encoding do arquivo. "
-                    f"Confiança: {result['confidence']:.2f}"
-                )
+        result = chardet.detect(sample)
+
+        if result['confidence'] < 0.7:
+            raise ValueError(
+                "Não foi possível detectar encoding do arquivo. "
+                f"Confiança: {result['confidence']:.2f}"
+            )
+
+        return result['encoding'].lower()
 
-            return result['encoding'].lower()
+    def _detect_beyond_samples(self, mm: mmap.mmap) -> str:
+        """Check an ASCII-looking file for non-ASCII bytes outside the samples.
+
+        Args:
+            mm: Memory-mapped file
 
-    def _detect_delimiter(self, file_path: str, encoding: str) -> str:
+        Returns:
+            'ascii' if the whole file is ASCII, otherwise the encoding
+            detected around the first non-ASCII byte
+        """
+        match = NON_ASCII.search(mm)
+        if match is None:
+            return 'ascii'
+
+        start = max(0, match.start() - self.SAMPLE_SIZE // 2)
+        result = chardet.detect(mm[start:start + self.SAMPLE_SIZE])
+        if not result['encoding'] or result['confidence'] < 0.7:
+            raise ValueError(
+                "Não foi possível detectar encoding do arquivo. "
+                f"Confiança: {result['confidence']:.2f}"
+            )
+        return result['encoding'].lower()
+
+    def _detect_delimiter(self, mm: mmap.mmap, encoding: str) -> str:
         """Detect delimiter by testing common formats.
 
         Args:
-            file_path: Path to CSV file
+            mm: Memory-mapped file
             encoding: File encoding
 
         Returns:
@@ -116,25 +204,108 @@ class CSVDetector:
         Raises:
             ValueError: If no valid delimiter is found
         """
-        with open(file_path, 'r', encoding=encoding) as f:
-            sample = f.read(1024)  # Sample first lines
+        # Sample first lines
+        sample = mm[:self.DELIMITER_SAMPLE_CHARS * 4].decode(encoding, errors='ignore')
+        sample = sample[:self.DELIMITER_SAMPLE_CHARS]
+
+        # Test each common delimiter
+        delimiter_counts = {}
+        for delim in self.COMMON_DELIMITERS:
+            count = sample.count(delim)
+            delimiter_counts[delim] = count
+
+        # Return most frequent delimiter
+        best_delim = max(delimiter_counts, key=delimiter_counts.get)
+
+        if delimiter_counts[best_delim] == 0:
+            raise ValueError(
+                "Não foi possível detectar delimiter. "
+                f"Testados: {self.COMMON_DELIMITERS}"
+            )
+
+        return best_delim
+
+    def _scan_records(
+        self, mm: mmap.mmap, delimiter: str
+    ) -> Optional[Tuple[bool, int, List[int]]]:
+        """Count CSV records with a quote-aware scan of the raw bytes.
+
+        Newlines inside quoted fields do not end a record. Quotes are paired
+        by parity, which matches ``csv.reader`` as long as every quote that
+        opens a quoted field is at the start of a field (or escapes the
+        quote before it). A quote anywhere else, e.g. ``5" screen`` in an
+        unquoted field, is literal for ``csv.reader``; the scan then gives
+        up so the caller can count with ``csv.reader``. The scan works on
+        blocks with numpy, so it never creates per-line Python objects.
+
+        The start of every OFFSET_STRIDE-th data record is recorded, so
+        readers can cut the file into chunks at record boundaries without
+        parsing it.
 
-            # Test each common delimiter
-            delimiter_counts = {}
-            for delim in self.COMMON_DELIMITERS:
-                count = sample.count(delim)
-                delimiter_counts[delim] = count
-
-            # Return most frequent delimiter
-            best_delim = max(delimiter_counts, key=delimiter_counts.get)
-
-            if delimiter_counts[best_delim] == 0:
-                raise ValueError(
-                    "Não foi possível detectar delimiter. "
-                    f"Testados: {self.COMMON_DELIMITERS}"
-                )
+        Args:
+            mm: Memory-mapped file (ASCII-compatible encoding)
+            delimiter: Field delimiter
 
-            return best_delim
+        Returns:
+            Tuple of (has_header, line_count, row_offsets), or None if the
+            file has quotes the parity scan cannot pair
+        """
+        size = len(mm)
+        stride = self.OFFSET_STRIDE
+        # Bytes after which a quote opens a quoted field
+        field_starts = np.array([ord(delimiter), NEWLINE, QUOTE], dtype=np.uint8)
+
+        records_ended = 0  # Newlines outside quotes seen so far
+        inside_quotes = 0  # Parity of quote characters seen so far
+        previous = NEWLINE  # Byte before the block (file start acts as a new line)
+        row_offsets: List[int] = []
+
+        for block_start in range(0, size, self.SCAN_BLOCK_SIZE):
+            block = np.frombuffer(
+                mm[block_start:block_start + self.SCAN_BLOCK_SIZE], dtype=np.uint8
+            )
+            newlines = np.flatnonzero(block == NEWLINE)
+            quotes = np.flatnonzero(block == QUOTE)
+
+            if len(quotes):
+                # Quotes at even parity open a field: they must follow a field start
+                opening = quotes[(np.arange(len(quotes)) + inside_quotes) % 2 == 0]
+                before = np.where(opening > 0, block[opening - 1], previous)
+                if not np.isin(before, field_starts).all():
+                    return None
+
+                # A newline is a record boundary if an even number of quotes precede it
+                quotes_before = np.searchsorted(quotes, newlines) + inside_quotes
+                newlines = newlines[quotes_before % 2 == 0]
+                inside_quotes = (inside_quotes + len(quotes)) % 2
+
+            # Record r starts after the r-th boundary; keep r = 1, 1 + stride, ...
+            first = (-records_ended) % stride
+            row_offsets.extend((newlines[first::stride] + block_start + 1).tolist())
+            records_ended += len(newlines)
+            previous = block[-1]
+
+        if inside_quotes:
+            return None  # Unterminated quoted field
+
+        # Offset at EOF is not a record start
+        if row_offsets and row_offsets[-1] >= size:
+            row_offsets.pop()
+
+        # Last record may not end with a newline
+        line_count = records_ended + (0 if mm[size - 1:size] == b'\n' else 1)
+
+        header_end = mm.find(b'\n')
+        header = mm[:header_end if header_end != -1 else size]
+        has_header = len(header.strip()) > 0
+
+        return has_header, line_count, row_offsets
+
+    @staticmethod
+    def _is_ascii_compatible(encoding: str) -> bool:
+        """Whether quote and newline bytes can be scanned directly."""
+        normalized = encoding.replace('-', '').replace('_', '').lower()
+        return not normalized.startswith(('utf16', 'utf32'))
 
     def _validate_structure(
         self,
@@ -142,7 +313,9 @@ class CSVDetector:
         encoding: str,
         delimiter: str,
     ) -> Tuple[bool, int]:
-        """Validate basic CSV structure.
+        """Validate basic CSV structure with the csv module.
+
+        Used for encodings whose byte stream cannot be scanned directly.
 
         Args:
             file_path: Path to CSV file
@@ -166,11 +339,6 @@ class CSVDetector:
                 # Count lines
                 line_count = 1 + sum(1 for _ in reader)
 
-                if line_count < 2:
-                    raise ValueError(
-                        "CSV deve ter pelo menos 2 linhas (header + dados)"
-                    )
-
                 return has_header, line_count
 
             except StopIteration:
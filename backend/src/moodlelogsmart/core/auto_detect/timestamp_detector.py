@@ -4,8 +4,12 @@ Automatically detects timestamp format and parses to datetime objects.
 """
 
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Tuple
 import logging
+import re
+
+import numpy as np
+import pandas as pd
 
 logger = logging.getLogger(__name__)
 
@@ -18,9 +22,16 @@ class TimestampDetector:
     - ISO format (yyyy-mm-dd)
     - US format (mm/dd/yyyy)
     - European format (dd-mm-yyyy)
+    - Unix epoch seconds (Moodle ``timecreated``)
     - And more...
     """
 
+    EPOCH_FORMAT = "epoch"
+    """Pseudo-format returned for integer Unix timestamps"""
+
+    SERIES_SAMPLE_SIZE = 100  # Values sampled from a column for detection
+    EPOCH_PATTERN = re.compile(r"^\d{9,11}(\.\d+)?$")
+
     # Common formats ordered by probability (Moodle typical first)
     COMMON_FORMATS = [
         "%d/%m/%y, %H:%M:%S",  # BR: 22/08/24, 13:43:23 (MOST COMMON)
@@ -142,3 +153,83 @@ class TimestampDetector:
                 raise ValueError(f"Erro ao parsear timestamp '{ts_str}': {e}")
 
         return result
+
+    def detect_series_format(self, series: pd.Series) -> Optional[str]:
+        """Detect the timestamp format of a DataFrame column.
+
+        Samples values spread evenly over the column instead of converting
+        the whole column to strings.
+
+        Args:
+            series: Timestamp column
+
+        Returns:
+            Format string (strptime), EPOCH_FORMAT, or None (use pandas inference)
+
+        Raises:
+            ValueError: If the column is empty or all null
+        """
+        non_null = series.dropna()
+        if len(non_null) == 0:
+            raise ValueError("Todos os timestamps são nulos")
+
+        positions = np.unique(
+            np.linspace(0, len(non_null) - 1, self.SERIES_SAMPLE_SIZE).astype(int)
+        )
+        sample = non_null.iloc[positions]
+
+        if pd.api.types.is_numeric_dtype(sample.dtype) or all(
+            self.EPOCH_PATTERN.match(str(value).strip()) for value in sample
+        ):
+            logger.info("Formato detectado: epoch (segundos)")
+            return self.EPOCH_FORMAT
+
+        return self.detect_format(sample.astype(str).tolist())
+
+    def parse_series(self, series: pd.Series, fmt: Optional[str]) -> pd.Series:
+        """Convert a timestamp column to datetime64[ns] in one vectorized call.
+
+        Values that do not match the format become NaT.
+
+        Args:
+            series: Timestamp column
+            fmt: Format from detect_series_format()
+
+        Returns:
+            Series of dtype datetime64[ns]
+        """
+        if fmt == self.EPOCH_FORMAT:
+            seconds = pd.to_numeric(series, errors="coerce")
+            parsed = pd.to_datetime(seconds, unit="s", errors="coerce")
+        elif fmt:
+            parsed = pd.to_datetime(series.astype(str).str.strip(), format=fmt, errors="coerce")
+        else:
+            parsed = pd.to_datetime(series, format="mixed", errors="coerce")
+
+        return parsed.astype("datetime64[ns]")
+
+    def convert_column(
+        self, df: pd.DataFrame, fmt: Optional[str], column: str = "time"
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Parse a DataFrame's timestamp column and quarantine failures.
+
+        Args:
+            df: DataFrame with a timestamp column
+            fmt: Format from detect_series_format()
+            column: Name of the timestamp column
+
+        Returns:
+            Tuple of (rows with parsed datetime64[ns] column,
+            original rows whose timestamp could not be parsed)
+        """
+        parsed = self.parse_series(df[column], fmt)
+        invalid = parsed.isna().to_numpy()
+
+        quarantined = df[invalid]
+        converted = df[~invalid].copy()
+        converted[column] = parsed[~invalid]
+
+        if len(quarantined):
+            logger.warning(f"{len(quarantined)} timestamps não reconhecidos (quarentena)")
+
+        return converted, quarantined
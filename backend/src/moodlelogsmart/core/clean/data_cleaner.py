@@ -1,9 +1,16 @@
-"""Data cleaning module for Moodle event logs."""
+"""Data cleaning module for Moodle event logs.
+
+The pipeline cleans DataFrames in place of row lists (``*_frame`` methods):
+filters are boolean masks, so a chunk is never converted to dicts and
+back. The list-of-dicts methods are kept for callers that hold events.
+"""
 
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass, field
 import logging
 
+import pandas as pd
+
 logger = logging.getLogger(__name__)
 
 
@@ -38,20 +45,37 @@ class RoleFilter:
         # Placeholder: Would check role field in events
         return events
 
+    def filter_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Filter a DataFrame to keep only student role events."""
+        # Placeholder: Would mask on the role column
+        return df
+
 
 class EventFilter:
     """Filters out non-student events."""
 
     def __init__(self, non_student_events: List[str]):
         self.non_student_events = non_student_events
+        self._excluded = frozenset(non_student_events)
 
     def filter(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Remove non-student events."""
-        return [
-            e
-            for e in events
-            if e.get("event_name") not in self.non_student_events
-        ]
+        excluded = self._excluded
+        return [e for e in events if not _is_excluded(e.get("event_name"), excluded)]
+
+    def filter_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Remove non-student events from a DataFrame."""
+        if "event_name" not in df.columns:
+            return df
+        return df[~df["event_name"].isin(self.non_student_events)]
+
+
+def _is_excluded(value: Any, excluded: frozenset) -> bool:
+    """Set membership that treats unhashable values as not excluded."""
+    try:
+        return value in excluded
+    except TypeError:
+        return False
 
 
 class DataCleaner:
@@ -81,6 +105,31 @@ class DataCleaner:
 
         return events
 
+    def clean_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Apply all cleaning steps to a DataFrame.
+
+        Same steps as ``clean``, as column masks.
+
+        Args:
+            df: Events, one row per event
+
+        Returns:
+            Remaining events with a fresh index
+        """
+        df = self.role_filter.filter_frame(df)
+        logger.info(f"After role filter: {len(df)} events")
+
+        df = self.event_filter.filter_frame(df)
+        logger.info(f"After event filter: {len(df)} events")
+
+        if "time" in df.columns:
+            df = df[df["time"].notna()]
+        else:
+            df = df.iloc[0:0]
+        logger.info(f"After timestamp validation: {len(df)} events")
+
+        return df.reset_index(drop=True)
+
     def _validate_timestamps(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Validate and remove events with invalid timestamps."""
         valid = []
@@ -1,57 +1,328 @@
 """Export module for processed event logs."""
 
-from typing import List, Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, List, Dict, Any, Optional, Union
 from pathlib import Path
+import contextlib
+import csv
+import gzip
+import io
 import logging
-from datetime import datetime
+import multiprocessing
+import os
+import pickle
+import re
+import shutil
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pa_compute
+    import pyarrow.feather as pa_feather
+    import pyarrow.parquet as pa_parquet
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
 
 try:
-    from pm4py.objects.log.log import EventLog, Trace, Event
-    from pm4py.objects.log.log import Event as PM4PYEvent
-    from pm4py.export_variants import export_log as pm4py_export
+    import pm4py
     HAS_PM4PY = True
 except ImportError:
     HAS_PM4PY = False
 
 logger = logging.getLogger(__name__)
 
+# XES serialization
+XES_WORKERS = int(os.getenv("XES_WORKERS", "1"))  # Processes serializing trace blocks
+XES_BLOCK_EVENTS = int(os.getenv("XES_BLOCK_EVENTS", "50000"))  # Events per trace block
+XES_SPILL_EVENTS = int(os.getenv("XES_SPILL_EVENTS", "250000"))  # Events per spill partition
+
+# Columnar outputs (require pyarrow)
+EXPORT_PARQUET = os.getenv("EXPORT_PARQUET", "true").lower() == "true"
+EXPORT_FEATHER = os.getenv("EXPORT_FEATHER", "false").lower() == "true"
+
+
+class CSVStreamWriter:
+    """Writes DataFrame or Arrow table blocks to a CSV file.
+
+    The output is exactly what pandas ``to_csv`` writes: values are quoted
+    only when needed (fields containing the delimiter, quotes or newlines
+    are enclosed in quotes, embedded quotes are doubled). Blocks are written
+    through a large buffer; with pyarrow installed the rows are rendered by
+    Arrow compute kernels following pandas' formatting rules, and blocks
+    with column types those rules do not cover are written by pandas.
+    Successive ``write`` calls append rows, so streaming jobs can write one
+    chunk at a time.
+
+    The output can also be an open binary stream (e.g. a ZIP member); it is
+    not closed by ``close()``.
+    """
+
+    BUFFER_SIZE = 1024 * 1024
+
+    def __init__(self, output: Union[str, Path, BinaryIO], append: bool = False):
+        """Open the output file.
+
+        Args:
+            output: Path to CSV file, or writable binary stream
+            append: Add rows to an existing file (header written only if new)
+        """
+        self.columns: Optional[List[str]] = None
+        self.rows_written = 0
+        self._write_header = True
+
+        if not isinstance(output, (str, Path)):
+            self.output_path = None
+            self._file = output
+            self._owns_file = False
+            return
+
+        self.output_path = Path(output)
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        existing = append and self.output_path.exists() and self.output_path.stat().st_size > 0
+        self._write_header = not existing
+        if existing:
+            with open(self.output_path, "r", encoding="utf-8", newline="") as f:
+                self.columns = next(csv.reader(f), None)
+
+        self._file = open(self.output_path, "ab" if append else "wb", buffering=self.BUFFER_SIZE)
+        self._owns_file = True
+
+    def write(self, data: Union[pd.DataFrame, "pa.Table"]) -> None:
+        """Append a block of rows.
+
+        Args:
+            data: DataFrame or Arrow table; columns are aligned to the first block
+        """
+        if HAS_PYARROW and isinstance(data, pa.Table):
+            data = data.to_pandas()
+
+        if self.columns is None:
+            self.columns = [str(c) for c in data.columns]
+        elif list(data.columns) != self.columns:
+            data = data.reindex(columns=self.columns)
+
+        if len(data) == 0 and not self._write_header:
+            return
+
+        text = self._render_arrow(data) if HAS_PYARROW else None
+        if text is None:
+            data.to_csv(
+                self._file,
+                header=self._write_header,
+                index=False,
+                encoding="utf-8",
+                lineterminator="\n",
+            )
+        else:
+            if self._write_header:
+                self._file.write(_format_header(self.columns))
+            self._file.write(text)
+
+        self._write_header = False
+        self.rows_written += len(data)
+
+    @classmethod
+    def _render_arrow(cls, df: pd.DataFrame) -> Optional["pa.Buffer"]:
+        """Render rows as CSV text with Arrow, byte for byte like pandas.
+
+        Returns:
+            UTF-8 text of the rows, or None if pandas must write the block
+        """
+        # csv quotes the empty field of a one-column row; leave that to pandas
+        if len(df) == 0 or len(df.columns) < 2:
+            return None
+
+        fields = []
+        for position in range(len(df.columns)):
+            field = cls._column_text(df.iloc[:, position])
+            if field is None:
+                return None
+            fields.append(field)
+
+        lines = pa_compute.binary_join_element_wise(*fields, _COMMA)
+        lines = pa_compute.binary_join_element_wise(lines, _EMPTY, _NEWLINE)
+        if isinstance(lines, pa.ChunkedArray):
+            lines = lines.combine_chunks()
+
+        # Every line ends in a newline, so the data buffer is the whole text
+        _, offsets, data = lines.buffers()
+        bounds = np.frombuffer(offsets, dtype=np.int64)[lines.offset:lines.offset + len(lines) + 1]
+        return data.slice(int(bounds[0]), int(bounds[-1] - bounds[0]))
+
+    @staticmethod
+    def _column_text(series: pd.Series) -> Optional["pa.Array"]:
+        """Format a column as pandas does, as quoted large_string fields.
+
+        Only text can contain characters that need quoting; numbers, booleans
+        and dates are cast as they are. Missing values become empty fields.
+
+        Returns:
+            Field array, or None for column types whose pandas formatting is
+            not reproduced (e.g. time zones, durations)
+        """
+        dtype = series.dtype
+        if isinstance(dtype, np.dtype) and dtype.kind == "f":
+            values = series.to_numpy()
+            array = pa.array(values.astype(str), mask=np.isnan(values), type=pa.large_string())
+            return array.fill_null("")
+        if isinstance(dtype, np.dtype) and dtype.kind == "M":
+            return _datetime_text(series.to_numpy()).fill_null("")
+
+        try:
+            array = pa.array(series, from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            if dtype != object:
+                return None
+            # Mixed-type object column
+            array = pa.array([None if pd.isna(v) else str(v) for v in series], type=pa.string())
+        if isinstance(array, pa.ChunkedArray):
+            array = array.combine_chunks()
+
+        if pa.types.is_dictionary(array.type) and not _is_text(array.type.value_type):
+            array = array.dictionary_decode()
+
+        if _is_text(array.type) or pa.types.is_dictionary(array.type):
+            return _quote_text(array)
+        if pa.types.is_boolean(array.type):
+            array = pa_compute.if_else(array, "True", "False")
+        elif pa.types.is_floating(array.type):
+            values = array.to_numpy(zero_copy_only=False)
+            array = pa.array(values.astype(str), mask=np.isnan(values))
+        elif not (pa.types.is_integer(array.type) or pa.types.is_null(array.type)):
+            return None
+
+        return array.cast(pa.large_string()).fill_null("")
+
+    def close(self) -> None:
+        """Flush and close the output file."""
+        if self._owns_file:
+            self._file.close()
+
+    def __enter__(self) -> "CSVStreamWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def _lineterminator_chars() -> str:
+    """Characters that make Python's csv writer (and so pandas) quote a field.
+
+    Besides the delimiter and quote, csv quotes fields containing characters
+    of the line terminator; whether a lone carriage return counts depends on
+    the Python version.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow(["\r", ""])
+    return "\r\n" if buffer.getvalue().startswith('"') else "\n"
+
+
+_QUOTE_CHARS = ',"' + _lineterminator_chars()
+
+if HAS_PYARROW:
+    _COMMA = pa.scalar(",", pa.large_string())
+    _EMPTY = pa.scalar("", pa.large_string())
+    _NEWLINE = pa.scalar("\n", pa.large_string())
+    _QUOTE = pa.scalar('"', pa.large_string())
+    _NEEDS_QUOTES = "[" + re.escape(_QUOTE_CHARS) + "]"
+
+
+def _format_header(columns: List[str]) -> bytes:
+    """Format the header row with the csv module, as pandas does."""
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow(columns)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _is_text(arrow_type: "pa.DataType") -> bool:
+    return pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type)
+
+
+def _quote_text(array: "pa.Array") -> "pa.Array":
+    """Quote the values csv would quote; nulls become empty fields.
+
+    Log columns repeat a few values, so the quoting runs on the distinct
+    values of a dictionary encoding rather than on every row.
+    """
+    if not pa.types.is_dictionary(array.type):
+        array = pa_compute.dictionary_encode(array)
+    values = array.dictionary.cast(pa.large_string())
+
+    needs_quotes = pa_compute.match_substring_regex(values, _NEEDS_QUOTES)
+    escaped = pa_compute.replace_substring(values, '"', '""')
+    quoted = pa_compute.binary_join_element_wise(_QUOTE, escaped, _QUOTE, _EMPTY)
+    values = pa_compute.if_else(needs_quotes, quoted, values)
+
+    return values.take(array.indices).fill_null("")
+
+
+def _datetime_text(values: np.ndarray) -> "pa.Array":
+    """Format naive datetimes as pandas does.
+
+    Dates only when every value is midnight, otherwise seconds with as
+    many fractional digits (3, 6 or 9) as the most precise value needs.
+    """
+    unit, _ = np.datetime_data(values.dtype)
+    per_second = {"s": 1, "ms": 10**3, "us": 10**6, "ns": 10**9}.get(unit)
+    if per_second is None:
+        values = values.astype("datetime64[ns]")
+        unit, per_second = "ns", 10**9
+
+    ticks = values.view(np.int64)[~np.isnat(values)]
+    array = pa.array(values, from_pandas=True)
+    if (ticks % (86400 * per_second) == 0).all():
+        return array.cast(pa.date32()).cast(pa.large_string())
+
+    for target, per_target in (("s", 1), ("ms", 10**3), ("us", 10**6)):
+        if per_target >= per_second or (ticks % (per_second // per_target) == 0).all():
+            break
+    else:
+        target = "ns"
+    return array.cast(pa.timestamp(target), safe=False).cast(pa.large_string())
+
 
 class CSVExporter:
     """Exports events to CSV format."""
 
-    def export(self, events: List[Dict[str, Any]], output_path: str) -> None:
+    def export(
+        self, events: List[Dict[str, Any]], output_path: str, append: bool = False
+    ) -> None:
         """Export events to CSV.
 
         Args:
             events: List of event dictionaries
             output_path: Path to save CSV file
+            append: Add rows to an existing file (header written only if new)
         """
         if not events:
             raise ValueError("Cannot export empty events list")
 
-        output_file = Path(output_path)
-        output_file.parent.mkdir(parents=True, exist_ok=True)
+        self.export_frame(pd.DataFrame(events), output_path, append=append)
 
-        # Get column names from first event
-        if not events:
-            return
-
-        fieldnames = list(events[0].keys())
+    def export_frame(
+        self,
+        df: Union[pd.DataFrame, "pa.Table"],
+        output_path: Union[str, Path, BinaryIO],
+        append: bool = False,
+    ) -> None:
+        """Export a DataFrame or Arrow table to CSV in bulk.
 
-        # Simple CSV writing
-        with open(output_file, "w", encoding="utf-8") as f:
-            # Write header
-            f.write(",".join(fieldnames) + "\n")
+        Args:
+            df: Enriched events
+            output_path: Path to save CSV file, or writable binary stream
+            append: Add rows to an existing file (header written only if new)
+        """
+        if len(df) == 0:
+            raise ValueError("Cannot export empty events list")
 
-            # Write data rows
-            for event in events:
-                row = [
-                    str(event.get(col, "")).replace(",", ";")  # Escape commas
-                    for col in fieldnames
-                ]
-                f.write(",".join(row) + "\n")
+        with CSVStreamWriter(output_path, append=append) as writer:
+            writer.write(df)
 
-        logger.info(f"Exported {len(events)} events to {output_path}")
+        logger.info(f"Exported {len(df)} events to {writer.output_path or 'stream'}")
 
     def export_filtered(
         self, events: List[Dict[str, Any]], output_path: str, filter_field: str, filter_value: Any
@@ -71,6 +342,180 @@ class CSVExporter:
         )
 
 
+class ParquetExporter:
+    """Exports events to Parquet and, optionally, Arrow IPC (Feather).
+
+    The schema is fixed so that every chunk of a streaming job and every
+    output file agree: ``time`` is a timestamp, ``is_active`` a boolean and
+    all other columns dictionary-encoded strings.
+    """
+
+    def __init__(self, feather: bool = EXPORT_FEATHER):
+        """Initialize Parquet exporter.
+
+        Args:
+            feather: Also write an Arrow IPC (.feather) file next to each Parquet file
+
+        Raises:
+            ImportError: If pyarrow is not installed
+        """
+        if not HAS_PYARROW:
+            raise ImportError("pyarrow is required for Parquet export")
+        self.feather = feather
+
+    @staticmethod
+    def to_table(df: pd.DataFrame) -> "pa.Table":
+        """Convert an events DataFrame to an Arrow table with the export schema.
+
+        Args:
+            df: Events DataFrame
+
+        Returns:
+            Arrow table
+        """
+        arrays = []
+        for column in df.columns:
+            series = df[column]
+            if column == "time":
+                array = pa.array(
+                    pd.to_datetime(series, format="ISO8601", errors="coerce"),
+                    type=pa.timestamp("ns"),
+                    from_pandas=True,
+                )
+            elif column == "is_active":
+                array = pa.array(series.astype("boolean"), type=pa.bool_(), from_pandas=True)
+            elif column == "matched_rule_id":
+                array = pa.array(series, type=pa.int32(), from_pandas=True)
+            else:
+                text = series.astype(object).where(series.notna(), None)
+                array = pa.array(
+                    [None if v is None else str(v) for v in text], type=pa.string()
+                ).dictionary_encode()
+            arrays.append(array)
+
+        return pa.Table.from_arrays(arrays, names=[str(c) for c in df.columns])
+
+    @staticmethod
+    def filter(table: "pa.Table", mask: pd.Series) -> "pa.Table":
+        """Select rows of a table with a boolean mask, without converting it back.
+
+        Args:
+            table: Table from ``to_table()``
+            mask: Boolean mask aligned with the table rows
+
+        Returns:
+            Filtered table
+        """
+        return table.filter(pa.array(np.asarray(mask, dtype=bool)))
+
+    def export_frame(
+        self,
+        df: pd.DataFrame,
+        output_path: str,
+        subsets: Optional[Dict[str, pd.Series]] = None,
+    ) -> List[Path]:
+        """Export an events DataFrame to Parquet.
+
+        Args:
+            df: Events DataFrame
+            output_path: Path to save Parquet file
+            subsets: Extra files as {output path: boolean row mask}, filtered
+                     from the same Arrow table
+
+        Returns:
+            Paths of the files written
+        """
+        table = self.to_table(df)
+        written = self.write_table(table, output_path)
+        for subset_path, mask in (subsets or {}).items():
+            subset = self.filter(table, mask)
+            if subset.num_rows:
+                written += self.write_table(subset, subset_path)
+
+        logger.info(f"Exported {table.num_rows} events to {output_path}")
+        return written
+
+    def write_table(self, table: "pa.Table", output_path: str) -> List[Path]:
+        """Write one table to Parquet (and Feather if enabled).
+
+        Args:
+            table: Table from ``to_table()``
+            output_path: Path to save Parquet file
+
+        Returns:
+            Paths of the files written
+        """
+        parquet_path = Path(output_path)
+        parquet_path.parent.mkdir(parents=True, exist_ok=True)
+        self.write_parquet(table, parquet_path)
+        written = [parquet_path]
+
+        if self.feather:
+            feather_path = parquet_path.with_suffix(".feather")
+            self.write_feather(table, feather_path)
+            written.append(feather_path)
+
+        return written
+
+    @staticmethod
+    def write_parquet(table: "pa.Table", output: Union[str, Path, BinaryIO]) -> None:
+        """Write a table as Parquet to a path or writable binary stream."""
+        pa_parquet.write_table(table, output)
+
+    @staticmethod
+    def write_feather(table: "pa.Table", output: Union[str, Path, BinaryIO]) -> None:
+        """Write a table as Arrow IPC (Feather) to a path or writable binary stream."""
+        # Feather needs one dictionary per column across all record batches
+        pa_feather.write_feather(table.unify_dictionaries(), output)
+
+
+class ParquetStreamWriter:
+    """Writes chunks of events to one Parquet file (one row group per chunk)."""
+
+    def __init__(self, output: Union[str, Path, BinaryIO]):
+        """Prepare the output file (created on the first non-empty chunk).
+
+        Args:
+            output: Path to Parquet file, or writable binary stream
+        """
+        if not HAS_PYARROW:
+            raise ImportError("pyarrow is required for Parquet export")
+        self.output = output
+        self.rows_written = 0
+        self._writer = None
+
+    def write(self, data: Union[pd.DataFrame, "pa.Table"]) -> None:
+        """Append a chunk of rows.
+
+        Args:
+            data: DataFrame, or table from ParquetExporter.to_table()
+        """
+        table = data if isinstance(data, pa.Table) else ParquetExporter.to_table(data)
+        if table.num_rows == 0:
+            return
+
+        if self._writer is None:
+            if isinstance(self.output, (str, Path)):
+                Path(self.output).parent.mkdir(parents=True, exist_ok=True)
+            self._writer = pa_parquet.ParquetWriter(self.output, table.schema)
+        else:
+            table = table.select(self._writer.schema.names).cast(self._writer.schema)
+
+        self._writer.write_table(table)
+        self.rows_written += table.num_rows
+
+    def close(self) -> None:
+        """Finish the Parquet file."""
+        if self._writer is not None:
+            self._writer.close()
+
+    def __enter__(self) -> "ParquetStreamWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
 class EventLogExporter:
     """Main exporter orchestrating all formats."""
 
@@ -137,8 +582,89 @@ class EventLogExporter:
         return str(output_file)
 
 
+def _xml_escape(values: pd.Series) -> pd.Series:
+    """Escape XML special characters in a string Series."""
+    return (
+        values.str.replace("&", "&amp;", regex=False)
+        .str.replace("<", "&lt;", regex=False)
+        .str.replace(">", "&gt;", regex=False)
+        .str.replace('"', "&quot;", regex=False)
+    )
+
+
+def _serialize_trace_block(block: pd.DataFrame) -> bytes:
+    """Serialize a block of complete, sorted traces to XES.
+
+    Module-level so it can run in worker processes.
+
+    Args:
+        block: Rows from XESExporter._prepare_frame() covering whole traces
+
+    Returns:
+        UTF-8 encoded ``<trace>`` elements
+    """
+    return "".join(_trace_elements(block)).encode("utf-8")
+
+
+def _trace_elements(block: pd.DataFrame) -> List[str]:
+    """Return the ``<trace>`` element of each trace in a sorted block."""
+    timestamps = block["timestamp"]
+    timestamp_xml = ('\t\t\t<date key="time:timestamp" value="' + timestamps + '"/>\n').where(
+        timestamps != "", ""
+    )
+    bloom_xml = ""
+    if "bloom" in block:
+        bloom_xml = '\t\t\t<string key="bloom:level" value="' + _xml_escape(block["bloom"]) + '"/>\n'
+
+    events = (
+        '\t\t<event>\n\t\t\t<string key="concept:name" value="' + _xml_escape(block["name"]) + '"/>\n'
+        + timestamp_xml
+        + '\t\t\t<string key="lifecycle:transition" value="complete"/>\n'
+        + '\t\t\t<string key="org:resource" value="' + _xml_escape(block["resource"]) + '"/>\n'
+        + bloom_xml
+        + "\t\t</event>\n"
+    ).to_numpy()
+
+    codes = block["trace_code"].to_numpy()
+    traces = _xml_escape(block["trace"]).to_numpy()
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(codes)) + 1))
+    ends = np.append(starts[1:], len(block))
+
+    return [
+        f'\t<trace>\n\t\t<string key="concept:name" value="{traces[start]}"/>\n'
+        + "".join(events[start:end])
+        + "\t</trace>\n"
+        for start, end in zip(starts, ends)
+    ]
+
+
 class XESExporter:
-    """Exports events to XES (eXtensible Event Stream) format for process mining."""
+    """Exports events to XES (eXtensible Event Stream) format for process mining.
+
+    Traces (one per user) are written straight to the output file, without
+    building a pm4py object graph. Large logs are split into blocks of
+    whole traces that can be serialized in parallel worker processes.
+    """
+
+    HEADER = (
+        "<?xml version='1.0' encoding='UTF-8'?>\n"
+        '<log xes.version="1849-2016" xes.features="nested-attributes" openxes.version="1.0RC7">\n'
+        '\t<extension name="Concept" prefix="concept" uri="http://www.xes-standard.org/concept.xesext"/>\n'
+        '\t<extension name="Time" prefix="time" uri="http://www.xes-standard.org/time.xesext"/>\n'
+        '\t<extension name="Lifecycle" prefix="lifecycle" uri="http://www.xes-standard.org/lifecycle.xesext"/>\n'
+        '\t<extension name="Organizational" prefix="org" uri="http://www.xes-standard.org/org.xesext"/>\n'
+    )
+    FOOTER = "</log>\n"
+
+    def __init__(self, workers: int = XES_WORKERS, block_events: int = XES_BLOCK_EVENTS):
+        """Initialize XES exporter.
+
+        Args:
+            workers: Processes used to serialize trace blocks (1 = serial)
+            block_events: Approximate number of events per trace block
+        """
+        self.workers = workers
+        self.block_events = block_events
 
     def export(self, events: List[Dict[str, Any]], output_path: str) -> None:
         """Export events to XES format.
@@ -148,69 +674,275 @@ class XESExporter:
             output_path: Path to save XES file
 
         Raises:
-            ImportError: If PM4Py is not installed
             ValueError: If events list is empty
         """
+        if not events:
+            raise ValueError("Cannot export empty events list")
+
+        self.export_frame(pd.DataFrame(events), output_path)
+
+    def export_frame(
+        self,
+        df: pd.DataFrame,
+        output_path: Union[str, Path, BinaryIO],
+        compress: Optional[bool] = None,
+        validate: bool = False,
+    ) -> int:
+        """Export an events DataFrame to XES format.
+
+        Args:
+            df: Events DataFrame (``user_full_name`` becomes the trace)
+            output_path: Path to save XES file, or writable binary stream
+                         (left open)
+            compress: Gzip the output (None = when the path ends with .gz)
+            validate: Re-read the file with PM4Py and check the trace count
+                      (paths only)
+
+        Returns:
+            Number of traces written
+
+        Raises:
+            ValueError: If the DataFrame is empty or validation fails
+        """
+        if df.empty:
+            raise ValueError("Cannot export empty events list")
+
+        output_file = None
+        if isinstance(output_path, (str, Path)):
+            output_file = Path(output_path)
+            output_file.parent.mkdir(parents=True, exist_ok=True)
+        if compress is None:
+            compress = output_file is not None and output_file.suffix == ".gz"
+
+        frame = self._prepare_frame(df)
+        bounds = self._block_bounds(frame["trace_code"].to_numpy())
+        blocks = (frame.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:]))
+
+        with self._open_output(output_path, compress) as f:
+            f.write(self.HEADER.encode("utf-8"))
+            if self.workers > 1 and len(bounds) > 2:
+                ctx = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx) as pool:
+                    for data in pool.map(_serialize_trace_block, blocks):
+                        f.write(data)
+            else:
+                for block in blocks:
+                    f.write(_serialize_trace_block(block))
+            f.write(self.FOOTER.encode("utf-8"))
+
+        trace_count = int(frame["trace_code"].iloc[-1]) + 1
+        logger.info(f"Exported {trace_count} traces to {output_file or 'stream'}")
+
+        if validate and output_file is not None:
+            self._validate(output_file, trace_count)
+
+        return trace_count
+
+    @staticmethod
+    def _open_output(output: Union[str, Path, BinaryIO], compress: bool) -> BinaryIO:
+        """Open the XES destination; a caller's stream is wrapped, not closed."""
+        if isinstance(output, (str, Path)):
+            return gzip.open(output, "wb") if compress else open(output, "wb")
+        if compress:
+            return gzip.GzipFile(fileobj=output, mode="wb")
+        return contextlib.nullcontext(output)
+
+    @classmethod
+    def _prepare_frame(cls, df: pd.DataFrame) -> pd.DataFrame:
+        """Build the string columns to serialize, sorted by user then time."""
+        frame = cls._event_columns(df)
+        # Traces keep first-appearance order; events inside a trace are time-ordered
+        frame["trace_code"] = pd.factorize(frame["trace"], sort=False)[0]
+        return cls._sort_traces(frame)
+
+    @staticmethod
+    def _event_columns(df: pd.DataFrame) -> pd.DataFrame:
+        """Build the string columns to serialize and the parsed event time."""
+        index = df.index
+
+        def text(column: str, fallback: pd.Series) -> pd.Series:
+            if column not in df:
+                return fallback
+            return df[column].astype(object).where(df[column].notna(), fallback).astype(str)
+
+        unknown = pd.Series("Unknown", index=index)
+        frame = pd.DataFrame({
+            "trace": text("user_full_name", unknown),
+            "name": text("activity_type", text("event_name", unknown)),
+            "resource": text("component", unknown),
+        })
+        if "bloom_level" in df:
+            frame["bloom"] = df["bloom_level"].astype(str)
+
+        if "time" in df:
+            times = pd.to_datetime(df["time"], format="ISO8601", errors="coerce")
+            if times.dt.tz is not None:
+                times = times.dt.tz_convert("UTC").dt.tz_localize(None)
+        else:
+            times = pd.Series(pd.NaT, index=index, dtype="datetime64[ns]")
+        frame["_time"] = times
+        return frame
+
+    @staticmethod
+    def _sort_traces(frame: pd.DataFrame) -> pd.DataFrame:
+        """Sort events by trace code then time and format the timestamps."""
+        frame = frame.sort_values(["trace_code", "_time"], kind="stable", na_position="last")
+
+        # numpy formats ISO 8601 in C, far faster than Series.dt.strftime
+        times = frame["_time"].to_numpy(dtype="datetime64[ms]")
+        timestamps = np.char.add(np.datetime_as_string(times, unit="ms"), "+00:00")
+        frame["timestamp"] = np.where(np.isnat(times), "", timestamps).astype(object)
+        return frame.drop(columns="_time").reset_index(drop=True)
+
+    def _block_bounds(self, trace_codes: np.ndarray) -> List[int]:
+        """Split sorted rows into blocks of about ``block_events`` whole traces."""
+        size = len(trace_codes)
+        trace_starts = np.flatnonzero(np.diff(trace_codes)) + 1
+        targets = np.arange(self.block_events, size, self.block_events)
+        cut_index = np.unique(np.searchsorted(trace_starts, targets))
+        cuts = trace_starts[cut_index[cut_index < len(trace_starts)]]
+        return [0, *cuts.tolist(), size]
+
+    @staticmethod
+    def _validate(output_file: Path, expected_traces: int) -> None:
+        """Check the written file parses with PM4Py and has every trace."""
         if not HAS_PM4PY:
-            logger.warning("PM4Py not installed, XES export skipped")
+            logger.warning("PM4Py not installed, XES validation skipped")
             return
 
-        if not events:
-            raise ValueError("Cannot export empty events list")
+        log = pm4py.read_xes(str(output_file))
+        trace_count = log["case:concept:name"].nunique()
+        if trace_count != expected_traces:
+            raise ValueError(
+                f"XES validation failed: {trace_count} traces read, {expected_traces} written"
+            )
+
+
+class XESSpillWriter:
+    """Builds an XES log from event chunks without holding every event.
+
+    Used by streaming jobs, where the log does not fit in memory. Each
+    chunk's events are spilled to one of ``partitions`` temporary files
+    chosen by user, so every trace is whole in one partition. ``write_to``
+    then loads one partition at a time, sorts its traces and serializes
+    them block by block to a fragment file, and finally copies the traces from the
+    fragments in the order users first appeared. The result is the file
+    XESExporter.export_frame writes for all chunks concatenated, while
+    memory holds about one partition.
+    """
+
+    def __init__(
+        self,
+        spill_dir: Union[str, Path],
+        partitions: int = 1,
+        block_events: int = XES_BLOCK_EVENTS,
+    ):
+        """Initialize XES spill writer.
 
-        output_file = Path(output_path)
-        output_file.parent.mkdir(parents=True, exist_ok=True)
+        Args:
+            spill_dir: Directory for the spill files (created, removed by close())
+            partitions: Number of spill files; size it so a partition fits
+                        in memory (see ``partitions_for``)
+            block_events: Approximate number of events serialized at once
+        """
+        self.spill_dir = Path(spill_dir)
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        self.partitions = max(1, partitions)
+        self.events = 0
+        self._exporter = XESExporter(workers=1, block_events=block_events)
+        self._trace_codes: Dict[str, int] = {}
 
-        try:
-            # Create event log
-            log = EventLog()
-
-            # Group events by user to create traces
-            traces_dict = {}
-            for event_dict in events:
-                user = event_dict.get("user_full_name", "Unknown")
-                if user not in traces_dict:
-                    traces_dict[user] = []
-                traces_dict[user].append(event_dict)
-
-            # Create traces
-            for user, user_events in traces_dict.items():
-                trace = Trace()
-                trace.attributes["concept:name"] = str(user)
-
-                # Add events to trace
-                for event_dict in user_events:
-                    event = Event()
-                    event["concept:name"] = event_dict.get(
-                        "activity_type", event_dict.get("event_name", "Unknown")
-                    )
-
-                    # Add timestamp
-                    time_str = event_dict.get("time")
-                    if time_str:
-                        try:
-                            if isinstance(time_str, str):
-                                event["time:timestamp"] = datetime.fromisoformat(time_str)
-                            else:
-                                event["time:timestamp"] = time_str
-                        except (ValueError, TypeError):
-                            logger.debug(f"Could not parse timestamp: {time_str}")
-
-                    # Add other attributes
-                    event["lifecycle:transition"] = "complete"
-                    event["org:resource"] = event_dict.get("component", "Unknown")
-
-                    if "bloom_level" in event_dict:
-                        event["bloom:level"] = str(event_dict["bloom_level"])
-
-                    trace.append(event)
-
-                log.append(trace)
-
-            # Export using PM4Py
-            pm4py_export.export_log(log, output_path)
-            logger.info(f"Exported {len(log)} traces to {output_path}")
-
-        except Exception as e:
-            logger.error(f"XES export failed: {str(e)}")
-            raise
+    @staticmethod
+    def partitions_for(events: int, spill_events: int = XES_SPILL_EVENTS) -> int:
+        """Number of partitions for about ``spill_events`` events each."""
+        return max(1, -(-events // max(1, spill_events)))
+
+    def __enter__(self) -> "XESSpillWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _path(self, partition: int, suffix: str) -> Path:
+        return self.spill_dir / f"part{partition}{suffix}"
+
+    def write(self, df: pd.DataFrame) -> None:
+        """Spill a chunk of events.
+
+        Args:
+            df: Events DataFrame (same columns as for XESExporter.export_frame)
+        """
+        if df.empty:
+            return
+
+        frame = XESExporter._event_columns(df)
+        new_traces = pd.unique(frame["trace"][~frame["trace"].isin(self._trace_codes.keys())])
+        first_code = len(self._trace_codes)
+        self._trace_codes.update(zip(new_traces, range(first_code, first_code + len(new_traces))))
+        frame["trace_code"] = frame["trace"].map(self._trace_codes).astype("int64")
+
+        partition = frame["trace_code"].to_numpy() % self.partitions
+        for index in np.unique(partition):
+            with open(self._path(index, ".pkl"), "ab") as f:
+                pickle.dump(frame[partition == index], f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.events += len(frame)
+
+    def write_to(self, output: Union[str, Path, BinaryIO], compress: bool = False) -> int:
+        """Write the XES log of all spilled events.
+
+        Args:
+            output: Path of the XES file, or writable binary stream (left open)
+            compress: Gzip the output
+
+        Returns:
+            Number of traces written
+
+        Raises:
+            ValueError: If no events were spilled
+        """
+        if not self.events:
+            raise ValueError("Cannot export empty events list")
+
+        sizes = np.zeros(len(self._trace_codes), dtype=np.int64)
+        for index in range(self.partitions):
+            spill = self._path(index, ".pkl")
+            if not spill.exists():
+                continue
+            pieces = []
+            with open(spill, "rb") as f:
+                while True:
+                    try:
+                        pieces.append(pickle.load(f))
+                    except EOFError:
+                        break
+            spill.unlink()
+
+            # Pieces are in arrival order, so the stable sort keeps ties in order
+            frame = XESExporter._sort_traces(pd.concat(pieces, ignore_index=True))
+            del pieces
+            bounds = self._exporter._block_bounds(frame["trace_code"].to_numpy())
+            with open(self._path(index, ".xes"), "wb") as f:
+                for start, end in zip(bounds[:-1], bounds[1:]):
+                    block = frame.iloc[start:end]
+                    elements = [element.encode("utf-8") for element in _trace_elements(block)]
+                    sizes[pd.unique(block["trace_code"])] = [len(e) for e in elements]
+                    f.writelines(elements)
+
+        with contextlib.ExitStack() as stack:
+            fragments = {
+                index: stack.enter_context(open(self._path(index, ".xes"), "rb"))
+                for index in range(self.partitions)
+                if self._path(index, ".xes").exists()
+            }
+            out = stack.enter_context(XESExporter._open_output(output, compress))
+            out.write(XESExporter.HEADER.encode("utf-8"))
+            for code, size in enumerate(sizes):
+                out.write(fragments[code % self.partitions].read(int(size)))
+            out.write(XESExporter.FOOTER.encode("utf-8"))
+
+        logger.info(f"Exported {len(sizes)} traces from {self.partitions} spill partitions")
+        return len(sizes)
+
+    def close(self) -> None:
+        """Remove the spill files."""
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
@@ -0,0 +1,431 @@
+"""ZIP packaging of pipeline outputs.
+
+Every output is written straight into a single-member "part" archive in
+the job's output directory, compressed with the codec configured for its
+format. Because each part is independent, exports can run (and compress)
+concurrently. The results ZIP is then assembled by copying the already
+compressed members byte for byte, so nothing is compressed twice and the
+outputs never exist uncompressed on disk. The same copy can also be
+streamed (``iter_zip``), e.g. to send a ZIP of selected members while it
+is being built.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Union
+from contextlib import contextmanager
+import logging
+import os
+import shutil
+import struct
+import time
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+PART_SUFFIX = ".part.zip"
+MEMBER_MODE = 0o644  # Unix permissions of extracted members
+
+CODECS = {
+    "stored": zipfile.ZIP_STORED,
+    "deflate": zipfile.ZIP_DEFLATED,
+    "bzip2": zipfile.ZIP_BZIP2,
+    "lzma": zipfile.ZIP_LZMA,
+    "xz": zipfile.ZIP_LZMA,
+}
+if hasattr(zipfile, "ZIP_ZSTANDARD"):  # Python 3.14+
+    CODECS["zstd"] = zipfile.ZIP_ZSTANDARD
+
+# Codec per file extension; already compressed formats are stored
+DEFAULT_CODECS = {
+    "csv": "deflate:6",
+    "xes": "deflate:6",
+    "parquet": "stored",
+    "feather": "stored",
+    "gz": "stored",
+    "default": "deflate:6",
+}
+
+# Overrides, e.g. "csv=deflate:1,xes=lzma,default=stored"
+EXPORT_CODECS = os.getenv("EXPORT_CODECS", "")
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# ZIP record layouts (APPNOTE.TXT)
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_CENTRAL_DIR = struct.Struct("<4s4B4HL2L5H2L")
+_END_RECORD = struct.Struct("<4s4H2LH")
+_ZIP64_END_RECORD = struct.Struct("<4sQ2H2L4Q")
+_ZIP64_LOCATOR = struct.Struct("<4sLQL")
+_ZIP64_EXTRA_ID = 0x0001
+_ZIP64_LIMIT = 0xFFFFFFFF
+_ZIP_COUNT_LIMIT = 0xFFFF
+_DATA_DESCRIPTOR_FLAG = 0x08
+_UTF8_FLAG = 0x800
+
+
+@dataclass(frozen=True)
+class Codec:
+    """Compression method and level for a ZIP member."""
+
+    compression: int
+    level: Optional[int] = None
+
+
+def parse_codec(spec: str) -> Codec:
+    """Parse a codec spec such as "deflate:6", "lzma" or "stored".
+
+    Args:
+        spec: Codec name, optionally followed by ":level"
+
+    Returns:
+        Codec
+
+    Raises:
+        ValueError: If the codec name or level is invalid
+    """
+    name, _, level = spec.strip().lower().partition(":")
+    if name == "zstd" and name not in CODECS:
+        logger.warning("zstd ZIP members need Python 3.14+, using deflate")
+        name = "deflate"
+    if name not in CODECS:
+        raise ValueError(f"Unknown codec: {name}. Supported: {sorted(CODECS)}")
+    return Codec(CODECS[name], int(level) if level else None)
+
+
+def _parse_overrides(overrides: str) -> Dict[str, str]:
+    """Parse "ext=codec,ext=codec" into a dict."""
+    result = {}
+    for item in filter(None, (part.strip() for part in overrides.split(","))):
+        ext, _, spec = item.partition("=")
+        result[ext.strip().lstrip(".").lower()] = spec
+    return result
+
+
+_CODEC_SPECS = {**DEFAULT_CODECS, **_parse_overrides(EXPORT_CODECS)}
+
+
+def codec_specs() -> Dict[str, str]:
+    """Return the codec spec configured per extension (defaults and overrides)."""
+    return dict(_CODEC_SPECS)
+
+
+def codec_for(member_name: str) -> Codec:
+    """Return the configured codec for an output file name.
+
+    Args:
+        member_name: File name inside the ZIP
+
+    Returns:
+        Codec for the file's extension (or the default codec)
+    """
+    ext = Path(member_name).suffix.lstrip(".").lower()
+    return parse_codec(_CODEC_SPECS.get(ext, _CODEC_SPECS["default"]))
+
+
+class ResultPackage:
+    """Collects outputs of one job as part archives and assembles the ZIP."""
+
+    def __init__(self, output_dir: Path):
+        """Initialize package.
+
+        Args:
+            output_dir: Directory holding the part archives
+        """
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+    def part_path(self, member_name: str) -> Path:
+        """Path of the part archive holding a member."""
+        return self.output_dir / f"{member_name}{PART_SUFFIX}"
+
+    @contextmanager
+    def open(self, member_name: str, codec: Optional[Codec] = None) -> Iterator[BinaryIO]:
+        """Open a writable, compressing stream for a member.
+
+        The part is discarded if the block raises.
+
+        Args:
+            member_name: File name inside the ZIP
+            codec: Compression (default: configured for the extension)
+
+        Yields:
+            Binary stream receiving the member's content
+        """
+        codec = codec or codec_for(member_name)
+        path = self.part_path(member_name)
+
+        # A bare name would get a 1980 date and 0600 permissions
+        info = zipfile.ZipInfo(member_name, date_time=time.localtime()[:6])
+        info.external_attr = MEMBER_MODE << 16
+        info.compress_type = codec.compression
+        if hasattr(info, "compress_level"):  # Python 3.13+
+            info.compress_level = codec.level
+        else:
+            info._compresslevel = codec.level
+
+        try:
+            with zipfile.ZipFile(
+                path, "w", compression=codec.compression, compresslevel=codec.level
+            ) as zf:
+                with zf.open(info, "w", force_zip64=True) as stream:
+                    yield stream
+        except BaseException:
+            path.unlink(missing_ok=True)
+            raise
+
+    def add_file(self, source: Path, member_name: Optional[str] = None) -> None:
+        """Store an existing file as a member.
+
+        Args:
+            source: File to add
+            member_name: File name inside the ZIP (default: source name)
+        """
+        member_name = member_name or source.name
+        with open(source, "rb") as src, self.open(member_name) as out:
+            shutil.copyfileobj(src, out, COPY_BUFFER_SIZE)
+
+    @contextmanager
+    def read(self, member_name: str) -> Iterator[BinaryIO]:
+        """Open a member for reading (decompressing).
+
+        Args:
+            member_name: File name inside the ZIP
+
+        Yields:
+            Readable binary stream
+        """
+        with zipfile.ZipFile(self.part_path(member_name)) as zf:
+            with zf.open(member_name) as stream:
+                yield stream
+
+    def discard(self, member_name: str) -> None:
+        """Remove a member from the package."""
+        self.part_path(member_name).unlink(missing_ok=True)
+
+    def members(self) -> List[str]:
+        """Return member names in the package, sorted."""
+        return sorted(p.name[: -len(PART_SUFFIX)] for p in self.output_dir.glob(f"*{PART_SUFFIX}"))
+
+    def assemble(
+        self, output: Union[str, Path, BinaryIO], members: Optional[Iterable[str]] = None
+    ) -> None:
+        """Write the results ZIP from the parts without recompressing.
+
+        Args:
+            output: ZIP path or writable binary stream (need not be seekable)
+            members: Members to include (default: all, sorted by name)
+        """
+        names = list(members) if members is not None else self.members()
+        parts = [self.part_path(name) for name in names]
+
+        if isinstance(output, (str, Path)):
+            with open(output, "wb") as f:
+                assemble_zip(parts, f)
+        else:
+            assemble_zip(parts, output)
+
+
+def result_members(path: Path) -> Dict[str, Path]:
+    """Map each member of a job's results to the archive holding it.
+
+    Args:
+        path: Results ZIP, or the package directory of a job whose ZIP
+              was not prebuilt
+
+    Returns:
+        {member name: archive path}, in archive order
+    """
+    path = Path(path)
+    if path.is_dir():
+        package = ResultPackage(path)
+        return {name: package.part_path(name) for name in package.members()}
+    with zipfile.ZipFile(path) as zf:
+        return {name: path for name in zf.namelist()}
+
+
+def assemble_zip(
+    parts: Iterable[Path], output: BinaryIO, members: Optional[Iterable[str]] = None
+) -> None:
+    """Concatenate the members of part archives into one ZIP.
+
+    Args:
+        parts: Part archives (or complete results ZIPs)
+        output: Writable binary stream (need not be seekable)
+        members: Member names to include (default: all)
+    """
+    for chunk in iter_zip(parts, members):
+        output.write(chunk)
+
+
+def iter_zip(
+    parts: Iterable[Path], members: Optional[Iterable[str]] = None
+) -> Iterator[bytes]:
+    """Generate a ZIP made of the members of other archives, chunk by chunk.
+
+    Compressed data is copied as is; only the headers and the central
+    directory are written anew (with ZIP64 records where needed). Nothing
+    is buffered beyond one chunk, so the ZIP can be sent while it is built.
+
+    Args:
+        parts: Part archives (or complete results ZIPs)
+        members: Member names to include (default: all)
+
+    Yields:
+        Consecutive byte chunks of the ZIP
+    """
+    wanted = set(members) if members is not None else None
+    offset = 0
+    entries = []
+
+    for part in parts:
+        with zipfile.ZipFile(part) as zf, open(part, "rb") as raw:
+            for info in zf.infolist():
+                if wanted is not None and info.filename not in wanted:
+                    continue
+                entries.append((offset, info))
+                header = _local_header(info, raw)
+                offset += len(header)
+                yield header
+                for block in _read_compressed(info, raw):
+                    offset += len(block)
+                    yield block
+
+    yield _central_directory(entries, offset)
+
+
+def _local_header(info: zipfile.ZipInfo, raw: BinaryIO) -> bytes:
+    """Build the local header of a member and seek ``raw`` to its data."""
+    raw.seek(info.header_offset)
+    header = _LOCAL_HEADER.unpack(raw.read(_LOCAL_HEADER.size))
+    name_length, extra_length = header[10], header[11]
+    raw.seek(name_length + extra_length, os.SEEK_CUR)
+
+    name, flags = _encode_name(info)
+    zip64 = info.file_size >= _ZIP64_LIMIT or info.compress_size >= _ZIP64_LIMIT
+    extra = _strip_zip64(info.extra)
+    if zip64:
+        extra += struct.pack("<HHQQ", _ZIP64_EXTRA_ID, 16, info.file_size, info.compress_size)
+
+    dos_time, dos_date = _dos_datetime(info)
+    return _LOCAL_HEADER.pack(
+        b"PK\x03\x04",
+        max(info.extract_version, 45 if zip64 else 20),
+        0,
+        flags,
+        info.compress_type,
+        dos_time,
+        dos_date,
+        info.CRC,
+        _ZIP64_LIMIT if zip64 else info.compress_size,
+        _ZIP64_LIMIT if zip64 else info.file_size,
+        len(name),
+        len(extra),
+    ) + name + extra
+
+
+def _read_compressed(info: zipfile.ZipInfo, raw: BinaryIO) -> Iterator[bytes]:
+    """Yield the compressed data of a member in COPY_BUFFER_SIZE blocks."""
+    remaining = info.compress_size
+    while remaining:
+        block = raw.read(min(COPY_BUFFER_SIZE, remaining))
+        if not block:
+            raise ValueError(f"Truncated member in part archive: {info.filename}")
+        remaining -= len(block)
+        yield block
+
+
+def _central_directory(entries, start: int) -> bytes:
+    """Build the central directory and end records for the copied members."""
+    records = []
+
+    for offset, info in entries:
+        name, flags = _encode_name(info)
+        zip64_values = []
+        file_size, compress_size, header_offset = info.file_size, info.compress_size, offset
+        if file_size >= _ZIP64_LIMIT:
+            zip64_values.append(file_size)
+            file_size = _ZIP64_LIMIT
+        if compress_size >= _ZIP64_LIMIT:
+            zip64_values.append(compress_size)
+            compress_size = _ZIP64_LIMIT
+        if header_offset >= _ZIP64_LIMIT:
+            zip64_values.append(header_offset)
+            header_offset = _ZIP64_LIMIT
+
+        extra = _strip_zip64(info.extra)
+        if zip64_values:
+            extra += struct.pack(
+                f"<HH{len(zip64_values)}Q", _ZIP64_EXTRA_ID, 8 * len(zip64_values), *zip64_values
+            )
+
+        dos_time, dos_date = _dos_datetime(info)
+        version = max(info.extract_version, 45 if zip64_values else 20)
+        records.append(_CENTRAL_DIR.pack(
+            b"PK\x01\x02",
+            max(info.create_version, version),
+            info.create_system,
+            version,
+            0,
+            flags,
+            info.compress_type,
+            dos_time,
+            dos_date,
+            info.CRC,
+            compress_size,
+            file_size,
+            len(name),
+            len(extra),
+            len(info.comment),
+            0,
+            info.internal_attr,
+            info.external_attr,
+            header_offset,
+        ))
+        records.extend((name, extra, info.comment))
+
+    end = start + sum(len(record) for record in records)
+    size = end - start
+    count = len(entries)
+
+    if count >= _ZIP_COUNT_LIMIT or start >= _ZIP64_LIMIT or size >= _ZIP64_LIMIT:
+        records.append(_ZIP64_END_RECORD.pack(
+            b"PK\x06\x06", _ZIP64_END_RECORD.size - 12, 45, 45, 0, 0, count, count, size, start
+        ))
+        records.append(_ZIP64_LOCATOR.pack(b"PK\x06\x07", 0, end, 1))
+        count = min(count, _ZIP_COUNT_LIMIT)
+        size = min(size, _ZIP64_LIMIT)
+        start = min(start, _ZIP64_LIMIT)
+
+    records.append(_END_RECORD.pack(b"PK\x05\x06", 0, 0, count, count, size, start, 0))
+    return b"".join(records)
+
+
+def _encode_name(info: zipfile.ZipInfo):
+    """Return the encoded file name and general purpose flags for a member."""
+    flags = info.flag_bits & ~_DATA_DESCRIPTOR_FLAG  # Sizes are in the headers
+    try:
+        return info.filename.encode("ascii"), flags
+    except UnicodeEncodeError:
+        return info.filename.encode("utf-8"), flags | _UTF8_FLAG
+
+
+def _dos_datetime(info: zipfile.ZipInfo):
+    """Return (time, date) of a member in MS-DOS format."""
+    year, month, day, hour, minute, second = info.date_time
+    return (
+        hour << 11 | minute << 5 | second // 2,
+        (year - 1980) << 9 | month << 5 | day,
+    )
+
+
+def _strip_zip64(extra: bytes) -> bytes:
+    """Remove ZIP64 extra fields (they are rebuilt for the new offsets)."""
+    result = b""
+    i = 0
+    while i + 4 <= len(extra):
+        field_id, length = struct.unpack("<HH", extra[i:i + 4])
+        if field_id != _ZIP64_EXTRA_ID:
+            result += extra[i:i + 4 + length]
+        i += 4 + length
+    return result
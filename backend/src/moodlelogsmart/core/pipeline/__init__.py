@@ -0,0 +1,5 @@
+"""Processing pipeline shared by the API workers and batch tools."""
+
+from .runner import PipelineResult, run_pipeline
+
+__all__ = ["PipelineResult", "run_pipeline"]
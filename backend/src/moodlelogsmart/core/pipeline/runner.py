@@ -0,0 +1,623 @@
+"""Synchronous Moodle log processing pipeline.
+
+Runs detect → map → timestamp → clean → classify → export → ZIP for a
+single input file. The function is free of any API state so it can be
+executed in a worker process, a thread or a batch tool.
+
+Exports run concurrently, each streaming into its own compressed ZIP
+member (see ``core.export.zip_package``); the results ZIP is assembled from
+those members without recompressing them.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, closing
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import functools
+import io
+import logging
+import mmap
+import os
+import shutil
+import time
+
+import pandas as pd
+
+from moodlelogsmart.core.auto_detect.csv_detector import CSVDetector, CSVFormat
+from moodlelogsmart.core.auto_detect.column_mapper import ColumnMapper
+from moodlelogsmart.core.auto_detect.timestamp_detector import TimestampDetector
+from moodlelogsmart.core.clean.data_cleaner import DataCleaner
+from moodlelogsmart.core.rules.bloom_classifier import BloomClassifier
+from moodlelogsmart.core.rules.rule_profile import PROFILE_FILE, RuleProfile
+from moodlelogsmart.core.rules.ruleset_cache import get_ruleset_cache
+from moodlelogsmart.core.export.exporter import (
+    EXPORT_FEATHER,
+    EXPORT_PARQUET,
+    HAS_PYARROW,
+    CSVExporter,
+    CSVStreamWriter,
+    ParquetExporter,
+    ParquetStreamWriter,
+    XESExporter,
+    XESSpillWriter,
+)
+from moodlelogsmart.core.export.zip_package import ResultPackage, codec_specs
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[int], None]
+StageCallback = Callable[[str, int, int], None]  # (stage, rows processed, total rows)
+
+# Files larger than this are processed in chunks (streaming mode)
+STREAMING_THRESHOLD_MB = int(os.getenv("STREAMING_THRESHOLD_MB", "50"))
+PIPELINE_CHUNK_ROWS = int(os.getenv("PIPELINE_CHUNK_ROWS", "100000"))
+
+# Threads running the export tasks (each writes its own ZIP member)
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "4"))
+
+# Assemble the results ZIP when the job finishes; when false the compressed
+# members are kept and the ZIP is built while it is downloaded
+PREBUILD_RESULT_ZIP = os.getenv("PREBUILD_RESULT_ZIP", "true").lower() == "true"
+
+# Time every rule and add rule_profile.json (hits, evaluations, seconds)
+RULE_PROFILE = os.getenv("RULE_PROFILE", "false").lower() == "true"
+
+# Add the integer matched_rule_id column to the enriched outputs (codes are
+# listed in rule_profile.json, which is then written without timings)
+MATCHED_RULE_ID_COLUMN = os.getenv("MATCHED_RULE_ID_COLUMN", "false").lower() == "true"
+
+QUARANTINE_FILE = "quarantined_rows.csv"
+
+# Enriched columns spilled to build XES in streaming mode
+XES_COLUMNS = ["user_full_name", "time", "activity_type", "event_name", "component", "bloom_level"]
+
+
+@dataclass
+class PipelineResult:
+    """Outcome of a successful pipeline run."""
+
+    zip_path: Path
+    """Path to the results ZIP package (the package directory if not prebuilt)"""
+
+    events_in: int
+    """Number of events read from the input file"""
+
+    events_out: int
+    """Number of enriched events exported"""
+
+    events_quarantined: int = 0
+    """Number of events dropped because their timestamp could not be parsed"""
+
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+    """Time spent in each stage (detect, map, timestamp, clean, classify, export, zip)"""
+
+    ruleset_version: Optional[str] = None
+    """Version of the ruleset the events were classified with (set by the worker pool)"""
+
+
+def _noop_progress(progress: int) -> None:
+    """Default progress callback (does nothing)."""
+
+
+class _Reporter:
+    """Forwards progress percentages and stage details to the caller.
+
+    Also accounts the time spent in each stage: the time between entering
+    a stage and entering the next one is added to the former.
+    """
+
+    def __init__(
+        self, progress: Optional[ProgressCallback], stage_progress: Optional[StageCallback]
+    ):
+        self.progress = progress or _noop_progress
+        self.stage_progress = stage_progress
+        self.rows_processed = 0
+        self.total_rows = 0
+        self.stage_seconds: Dict[str, float] = {}
+        self._stage: Optional[str] = None
+        self._stage_started = time.perf_counter()
+
+    def __call__(self, percent: int, stage: str, rows_processed: Optional[int] = None) -> None:
+        """Report that ``stage`` is running and ``percent`` of the job is done."""
+        self.enter(stage)
+        if rows_processed is not None:
+            self.rows_processed = rows_processed
+        if self.stage_progress is not None:
+            self.stage_progress(stage, self.rows_processed, self.total_rows)
+        self.progress(percent)
+
+    def enter(self, stage: Optional[str]) -> None:
+        """Start timing ``stage`` (None stops timing) without reporting progress."""
+        now = time.perf_counter()
+        if self._stage is not None:
+            elapsed = now - self._stage_started
+            self.stage_seconds[self._stage] = self.stage_seconds.get(self._stage, 0.0) + elapsed
+        self._stage = stage
+        self._stage_started = now
+
+
+def run_pipeline(
+    job_id: str,
+    input_file: str,
+    work_dir: Path,
+    progress: Optional[ProgressCallback] = None,
+    classifier: Optional[BloomClassifier] = None,
+    streaming: Optional[bool] = None,
+    chunk_rows: int = PIPELINE_CHUNK_ROWS,
+    csv_format: Optional[CSVFormat] = None,
+    build_zip: bool = PREBUILD_RESULT_ZIP,
+    stage_progress: Optional[StageCallback] = None,
+    profile_rules: bool = RULE_PROFILE,
+    rule_id_column: bool = MATCHED_RULE_ID_COLUMN,
+) -> PipelineResult:
+    """Process a Moodle CSV export into the results ZIP package.
+
+    Args:
+        job_id: Job identifier (used for logging and output names)
+        input_file: Path to input CSV file
+        work_dir: Directory for the compressed outputs and the ZIP
+        progress: Callback receiving progress percentages (0-100)
+        classifier: Classifier to use (default: the cached default ruleset)
+        streaming: Process the file in chunks (None = decide by file size)
+        chunk_rows: Rows per chunk in streaming mode
+        csv_format: Format already detected for this file (skips detection)
+        build_zip: Assemble the results ZIP (otherwise the compressed members
+                   are left in the package directory)
+        stage_progress: Callback receiving (stage, rows processed, total rows)
+                        before each progress percentage
+        profile_rules: Time each rule and add rule_profile.json
+        rule_id_column: Add the matched_rule_id column (and rule_profile.json)
+
+    Returns:
+        PipelineResult with the ZIP path and event counts
+
+    Raises:
+        FileNotFoundError: If the input file does not exist
+        ValueError: If the CSV cannot be detected or mapped
+    """
+    report = _Reporter(progress, stage_progress)
+    report(10, "detect" if csv_format is None else "map")
+
+    input_path = Path(input_file)
+    if not input_path.exists():
+        raise FileNotFoundError(f"Input file not found: {input_file}")
+
+    # Step 1: Detect CSV format
+    if csv_format is None:
+        logger.info(f"Job {job_id}: Detecting CSV format")
+        detector = CSVDetector()
+        csv_format = detector.detect(input_file)
+    report.total_rows = max(0, csv_format.line_count - 1)
+    report(20, "map")
+
+    output_dir = work_dir / f"{job_id}_output"
+    package = ResultPackage(output_dir)
+    classifier = classifier or get_ruleset_cache().get().classifier
+    profile = None
+    if profile_rules or rule_id_column:
+        profile = classifier.new_profile(timed=profile_rules)
+    classify = functools.partial(classifier.apply_rules, rule_code=rule_id_column, profile=profile)
+
+    if streaming is None:
+        streaming = input_path.stat().st_size > STREAMING_THRESHOLD_MB * 1024 * 1024
+
+    if streaming:
+        events_in, events_out, events_quarantined = _process_streaming(
+            job_id, input_file, csv_format, package, classify, report, chunk_rows
+        )
+    else:
+        events_in, events_out, events_quarantined = _process_in_memory(
+            job_id, input_file, csv_format, package, classify, report
+        )
+
+    if profile is not None:
+        _write_profile(job_id, profile, package)
+
+    quarantine_path = output_dir / QUARANTINE_FILE
+    if quarantine_path.exists():
+        package.add_file(quarantine_path)
+        quarantine_path.unlink()
+
+    report(85, "zip")
+
+    # Step 7: Create ZIP package (members are already compressed)
+    if build_zip:
+        logger.info(f"Job {job_id}: Creating ZIP package")
+        zip_filename = (
+            f"results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+        )
+        zip_path = work_dir / f"{job_id}_{zip_filename}"
+        package.assemble(zip_path)
+        shutil.rmtree(output_dir, ignore_errors=True)
+    else:
+        zip_path = output_dir
+
+    report(95, "zip")
+    report.enter(None)
+
+    return PipelineResult(
+        zip_path=zip_path,
+        events_in=events_in,
+        events_out=events_out,
+        events_quarantined=events_quarantined,
+        stage_seconds=report.stage_seconds,
+    )
+
+
+def _map_columns(columns: List[str]) -> Dict[str, str]:
+    """Map CSV column names to the internal schema.
+
+    Args:
+        columns: Column names from the CSV header
+
+    Returns:
+        Dictionary mapping original to internal names
+    """
+    column_mapper = ColumnMapper()
+    mapped_columns = column_mapper.map_columns(columns)
+    return column_mapper.rename_dataframe_columns(columns, mapped_columns)
+
+
+def _read_chunks(
+    input_file: str, csv_format: CSVFormat, chunk_rows: int
+) -> Iterator[pd.DataFrame]:
+    """Yield the CSV as DataFrames of about ``chunk_rows`` records.
+
+    When detection recorded row offsets, chunks are byte ranges cut at
+    those record boundaries (a whole number of strides per chunk) and are
+    parsed independently, so the next chunk is parsed in a background
+    thread while the caller processes the current one. Without offsets
+    (quoted fields the scan could not pair, non-ASCII encodings), or for
+    chunks smaller than a stride, pandas' chunked reader is used.
+
+    Args:
+        input_file: Path to the CSV file
+        csv_format: Detected format, with ``row_offsets`` if available
+        chunk_rows: Target records per chunk
+
+    Yields:
+        One DataFrame per chunk, all with the header's columns
+    """
+    read_options = {"encoding": csv_format.encoding, "delimiter": csv_format.delimiter}
+    if not csv_format.row_offsets or chunk_rows < csv_format.offset_stride:
+        with pd.read_csv(input_file, chunksize=chunk_rows, **read_options) as reader:
+            yield from reader
+        return
+
+    strides = max(1, chunk_rows // csv_format.offset_stride)
+    # The first chunk starts at the header; the last one runs to EOF
+    bounds: List[Optional[int]] = [0, *csv_format.row_offsets[strides::strides], None]
+
+    with open(input_file, "rb") as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+            ThreadPoolExecutor(max_workers=1) as prefetch:
+        # Leaving the executor waits for a pending parse before the map closes
+
+        def parse(start: int, end: Optional[int], names: Optional[List[str]]) -> pd.DataFrame:
+            return pd.read_csv(
+                io.BytesIO(mm[start:end]),
+                header=0 if names is None else None,
+                names=names,
+                **read_options,
+            )
+
+        chunk = parse(bounds[0], bounds[1], None)
+        names = chunk.columns.tolist()
+        for start, end in zip(bounds[1:], bounds[2:]):
+            pending = prefetch.submit(parse, start, end, names)
+            yield chunk
+            chunk = pending.result()
+        yield chunk
+
+
+def _process_in_memory(
+    job_id: str,
+    input_file: str,
+    csv_format: CSVFormat,
+    package: ResultPackage,
+    classify: Callable[[pd.DataFrame], pd.DataFrame],
+    report: _Reporter,
+) -> Tuple[int, int, int]:
+    """Run steps 2-6 with the whole file loaded as one DataFrame.
+
+    Returns:
+        Tuple of (events read, events exported, events quarantined)
+    """
+    # Step 2: Load and detect columns
+    logger.info(f"Job {job_id}: Mapping columns")
+    df = pd.read_csv(
+        input_file,
+        encoding=csv_format.encoding,
+        delimiter=csv_format.delimiter,
+    )
+    events_in = len(df)
+
+    # Rename columns to internal schema
+    df = df.rename(columns=_map_columns(df.columns.tolist()))
+    report(30, "timestamp")
+
+    # Step 3: Parse timestamps into a datetime64 column
+    logger.info(f"Job {job_id}: Parsing timestamps")
+    timestamp_detector = TimestampDetector()
+    timestamp_format = timestamp_detector.detect_series_format(df['time'])
+    df, quarantined = timestamp_detector.convert_column(df, timestamp_format)
+    _write_quarantine(quarantined, package.output_dir)
+    report(40, "clean")
+
+    # Step 4: Clean data
+    logger.info(f"Job {job_id}: Cleaning data")
+    cleaner = DataCleaner()
+    cleaned_df = cleaner.clean_frame(df)
+    report(60, "classify")
+
+    # Step 5: Apply rules (Bloom's Taxonomy)
+    logger.info(f"Job {job_id}: Enriching with Bloom taxonomy")
+    enriched_df = classify(cleaned_df)
+    report(75, "export", rows_processed=len(enriched_df))
+
+    # Step 6: Export results, one concurrent task per output file
+    logger.info(f"Job {job_id}: Exporting results")
+    if enriched_df.empty:
+        raise ValueError("Cannot export empty events list")
+
+    bloom_mask = ~enriched_df["bloom_level"].isin([None, "N/A"])
+    bloom_df = enriched_df[bloom_mask]
+    csv_exporter = CSVExporter()
+
+    def export_csv(member: str, frame: pd.DataFrame) -> None:
+        with package.open(member) as out:
+            csv_exporter.export_frame(frame, out)
+
+    tasks = {"enriched_log.csv": lambda: export_csv("enriched_log.csv", enriched_df)}
+    if len(bloom_df):
+        tasks["enriched_log_bloom_only.csv"] = lambda: export_csv(
+            "enriched_log_bloom_only.csv", bloom_df
+        )
+    if _parquet_enabled():
+        tasks["enriched_log.parquet"] = lambda: _export_parquet(package, enriched_df, bloom_mask)
+    tasks.update(_xes_tasks(package, enriched_df, bloom_mask))
+
+    _run_exports(job_id, tasks)
+
+    return events_in, len(enriched_df), len(quarantined)
+
+
+def _process_streaming(
+    job_id: str,
+    input_file: str,
+    csv_format: CSVFormat,
+    package: ResultPackage,
+    classify: Callable[[pd.DataFrame], pd.DataFrame],
+    report: _Reporter,
+    chunk_rows: int,
+) -> Tuple[int, int, int]:
+    """Run steps 2-6 chunk by chunk with memory bounded by ``chunk_rows``.
+
+    Each chunk is cleaned, classified and appended to the CSV and Parquet
+    members, which stay open for the whole run. XES needs complete user
+    traces, so the trace columns of each chunk are spilled to disk by user
+    and the XES members are assembled from the spill partitions at the end
+    (see XESSpillWriter). Feather files are only written in in-memory mode.
+
+    Returns:
+        Tuple of (events read, events exported, events quarantined)
+    """
+    logger.info(f"Job {job_id}: Streaming in chunks of {chunk_rows} rows")
+
+    cleaner = DataCleaner()
+    rename_dict = None
+    timestamp_detector = TimestampDetector()
+    timestamp_format = None
+    total_rows = max(1, csv_format.line_count - 1)
+    events_in = 0
+    events_out = 0
+    events_quarantined = 0
+
+    # Trace columns are spilled by user so XES never needs the whole log
+    partitions = XESSpillWriter.partitions_for(total_rows)
+    with ExitStack() as spills:
+        xes_spills = {
+            member: spills.enter_context(
+                XESSpillWriter(package.output_dir / f"{member}.spill", partitions)
+            )
+            for member in ("enriched_log.xes", "enriched_log_bloom_only.xes")
+        }
+
+        with ExitStack() as stack:
+            # Writers close before their members (ExitStack unwinds in reverse)
+            full_writer = stack.enter_context(
+                CSVStreamWriter(stack.enter_context(package.open("enriched_log.csv")))
+            )
+            bloom_writer = stack.enter_context(
+                CSVStreamWriter(stack.enter_context(package.open("enriched_log_bloom_only.csv")))
+            )
+            parquet_writers = None
+            if _parquet_enabled():
+                parquet_writers = tuple(
+                    stack.enter_context(
+                        ParquetStreamWriter(stack.enter_context(package.open(name)))
+                    )
+                    for name in ("enriched_log.parquet", "enriched_log_bloom_only.parquet")
+                )
+
+            reader = stack.enter_context(
+                closing(_read_chunks(input_file, csv_format, chunk_rows))
+            )
+
+            report.enter("map")  # Reading a chunk counts as loading/mapping
+            for chunk in reader:
+                if rename_dict is None:
+                    # Column mapping and timestamp format come from the first chunk
+                    rename_dict = _map_columns(chunk.columns.tolist())
+                    chunk = chunk.rename(columns=rename_dict)
+                    timestamp_format = timestamp_detector.detect_series_format(chunk['time'])
+                else:
+                    chunk = chunk.rename(columns=rename_dict)
+
+                events_in += len(chunk)
+
+                report.enter("timestamp")
+                chunk, quarantined = timestamp_detector.convert_column(chunk, timestamp_format)
+                _write_quarantine(quarantined, package.output_dir)
+                events_quarantined += len(quarantined)
+
+                report.enter("clean")
+                cleaned_df = cleaner.clean_frame(chunk)
+                if len(cleaned_df):
+                    report.enter("classify")
+                    enriched_df = classify(cleaned_df)
+                    report.enter("export")
+                    full_writer.write(enriched_df)
+
+                    bloom_mask = ~enriched_df["bloom_level"].isin([None, "N/A"])
+                    if bloom_mask.any():
+                        bloom_writer.write(enriched_df[bloom_mask])
+                    events_out += len(enriched_df)
+
+                    trace_columns = enriched_df[[c for c in XES_COLUMNS if c in enriched_df]]
+                    xes_spills["enriched_log.xes"].write(trace_columns)
+                    xes_spills["enriched_log_bloom_only.xes"].write(trace_columns[bloom_mask])
+
+                    if parquet_writers:
+                        table = ParquetExporter.to_table(enriched_df)
+                        parquet_writers[0].write(table)
+                        parquet_writers[1].write(ParquetExporter.filter(table, bloom_mask))
+
+                # Chunks cover progress 30% → 80%
+                report(30 + int(50 * min(1.0, events_in / total_rows)), "classify", events_in)
+                report.enter("map")
+
+            report.enter("export")  # Closing the writers flushes the members
+
+        if bloom_writer.rows_written == 0:
+            package.discard("enriched_log_bloom_only.csv")
+        if parquet_writers and parquet_writers[1].rows_written == 0:
+            package.discard("enriched_log_bloom_only.parquet")
+
+        if events_out == 0:
+            raise ValueError("Cannot export empty events list")
+        report(80, "export")
+
+        # XES traces are assembled from the spilled trace columns
+        tasks = {
+            member: functools.partial(_export_spilled_xes, package, member, spill)
+            for member, spill in xes_spills.items()
+            if spill.events
+        }
+        _run_exports(job_id, tasks)
+
+    return events_in, events_out, events_quarantined
+
+
+def _parquet_enabled() -> bool:
+    """Whether Parquet outputs are configured and pyarrow is available."""
+    return EXPORT_PARQUET and HAS_PYARROW
+
+
+def result_options() -> Dict[str, Any]:
+    """Settings that change the results of a run, e.g. for result cache keys.
+
+    Returns:
+        JSON-serializable dict of the output formats, member codecs, ZIP
+        prebuilding and rule profiling options in effect
+    """
+    return {
+        "parquet": _parquet_enabled(),
+        "feather": _parquet_enabled() and EXPORT_FEATHER,
+        "codecs": codec_specs(),
+        "prebuild_zip": PREBUILD_RESULT_ZIP,
+        "rule_profile": RULE_PROFILE,
+        "matched_rule_id": MATCHED_RULE_ID_COLUMN,
+    }
+
+
+# Outputs whose failure is logged instead of failing the job
+OPTIONAL_EXPORTS = ("enriched_log.parquet", "enriched_log.xes", "enriched_log_bloom_only.xes")
+
+
+def _run_exports(job_id: str, tasks: Dict[str, Callable[[], None]]) -> None:
+    """Run export tasks concurrently, one ZIP member (or group) per task.
+
+    Args:
+        job_id: Job identifier (for logging)
+        tasks: Export callables keyed by the member they write
+
+    Raises:
+        Exception: The first error of a task not in OPTIONAL_EXPORTS
+    """
+    with ThreadPoolExecutor(max_workers=max(1, EXPORT_WORKERS)) as pool:
+        futures = {name: pool.submit(task) for name, task in tasks.items()}
+
+    for name, future in futures.items():
+        error = future.exception()
+        if error is None:
+            continue
+        if name not in OPTIONAL_EXPORTS:
+            raise error
+        logger.warning(f"Job {job_id}: {name} export skipped: {error}")
+
+
+def _export_parquet(
+    package: ResultPackage, enriched_df: pd.DataFrame, bloom_mask: pd.Series
+) -> None:
+    """Write Parquet (and Feather) members; bloom rows come from the same Arrow table."""
+    exporter = ParquetExporter()
+    table = exporter.to_table(enriched_df)
+    tables = {"enriched_log": table}
+    if bloom_mask.any():
+        tables["enriched_log_bloom_only"] = exporter.filter(table, bloom_mask)
+
+    for stem, subset in tables.items():
+        with package.open(f"{stem}.parquet") as out:
+            exporter.write_parquet(subset, out)
+        if exporter.feather:
+            with package.open(f"{stem}.feather") as out:
+                exporter.write_feather(subset, out)
+
+
+def _xes_tasks(
+    package: ResultPackage, enriched_df: pd.DataFrame, bloom_mask: pd.Series
+) -> Dict[str, Callable[[], None]]:
+    """Build the export tasks for the full and bloom-only XES logs."""
+    xes_exporter = XESExporter()
+
+    def export(member: str, frame: pd.DataFrame) -> None:
+        with package.open(member) as out:
+            xes_exporter.export_frame(frame, out)
+
+    tasks = {"enriched_log.xes": lambda: export("enriched_log.xes", enriched_df)}
+    if bloom_mask.any():
+        bloom_df = enriched_df[bloom_mask]
+        tasks["enriched_log_bloom_only.xes"] = lambda: export(
+            "enriched_log_bloom_only.xes", bloom_df
+        )
+    return tasks
+
+
+def _export_spilled_xes(package: ResultPackage, member: str, spill: XESSpillWriter) -> None:
+    """Write an XES member from the events spilled during a streaming run."""
+    with package.open(member) as out:
+        spill.write_to(out)
+
+
+def _write_profile(job_id: str, profile: RuleProfile, package: ResultPackage) -> None:
+    """Add rule_profile.json to the package."""
+    with package.open(PROFILE_FILE) as out:
+        profile.write(out)
+
+    report = profile.to_dict()
+    logger.info(
+        f"Job {job_id}: {report['default_rate']:.1%} of events matched no rule; "
+        f"never fired: {', '.join(report['never_fired']) or 'none'}"
+    )
+
+
+def _write_quarantine(quarantined: pd.DataFrame, output_dir: Path) -> None:
+    """Append rows with unparseable timestamps to quarantined_rows.csv."""
+    if len(quarantined) == 0:
+        return
+
+    path = output_dir / QUARANTINE_FILE
+    quarantined.to_csv(path, mode="a", header=not path.exists(), index=False)
@@ -2,5 +2,10 @@
 
 from .rule_engine import RuleEngine, Rule, RuleCondition, RuleAction
 from .bloom_classifier import BloomClassifier
+from .rule_profile import RuleProfile
+from .ruleset_cache import CompiledRuleset, RulesetCache, get_ruleset_cache
 
-__all__ = ['RuleEngine', 'Rule', 'RuleCondition', 'RuleAction', 'BloomClassifier']
+__all__ = [
+    'RuleEngine', 'Rule', 'RuleCondition', 'RuleAction', 'BloomClassifier',
+    'RuleProfile', 'CompiledRuleset', 'RulesetCache', 'get_ruleset_cache',
+]
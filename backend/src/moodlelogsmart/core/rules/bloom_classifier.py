@@ -1,58 +1,93 @@
 """Bloom's Taxonomy Classifier - Wrapper for RuleEngine with DataFrame support."""
 
-from typing import Optional
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 from pathlib import Path
+import numpy as np
 import pandas as pd
 import logging
 
-from .rule_engine import RuleEngine
+from .rule_engine import Rule, RuleEngine
+from .rule_profile import RuleProfile
 from moodlelogsmart.domain.models import RawMoodleEvent, EnrichedActivity
 
 logger = logging.getLogger(__name__)
 
+# Classification result: (activity_type, bloom_level, is_active)
+Classification = Tuple[str, str, bool]
+
 
 class BloomClassifier:
     """High-level wrapper for Bloom's Taxonomy classification.
 
     Provides convenient interface for classifying Moodle events
     using pandas DataFrames.
+
+    Classification only depends on the fields the rules inspect, and a
+    Moodle log has few distinct combinations of them. ``apply_rules``
+    therefore classifies each unique combination once and broadcasts the
+    result, and ``classify`` memoizes results per combination in an LRU
+    cache that lives as long as the classifier.
     """
 
-    def __init__(self, yaml_path: Optional[str] = None):
+    CLASSIFY_CACHE_SIZE = 65536  # Distinct event shapes memoized by classify()
+
+    def __init__(self, yaml_path: Optional[str] = None, rules: Optional[List[Rule]] = None):
         """Initialize classifier with rules from YAML file.
 
         Args:
             yaml_path: Path to YAML file with rules (optional)
                       If not provided, uses default bloom_taxonomy.yaml
+            rules: Already parsed rules (optional, used instead of a file)
         """
-        self.rule_engine = RuleEngine(yaml_path=yaml_path)
+        self.rule_engine = RuleEngine(rules=rules, yaml_path=yaml_path)
+        self.fields = self.rule_engine.referenced_fields
+        self._classify_key = lru_cache(maxsize=self.CLASSIFY_CACHE_SIZE)(self._evaluate_key)
         logger.info(f"BloomClassifier initialized with {len(self.rule_engine.rules)} rules")
 
-    def apply_rules(self, df: pd.DataFrame) -> pd.DataFrame:
+    def new_profile(self, timed: bool = True) -> RuleProfile:
+        """Create an empty RuleProfile for this classifier's rules."""
+        return RuleProfile(self.rule_engine.rules, timed=timed)
+
+    def apply_rules(
+        self,
+        df: pd.DataFrame,
+        rule_code: bool = False,
+        profile: Optional[RuleProfile] = None,
+    ) -> pd.DataFrame:
         """Apply Bloom classification rules to DataFrame.
 
         Args:
             df: DataFrame with columns: time, user_full_name, event_name,
                 component, event_context, description
+            rule_code: Add the ``matched_rule_id`` column (see
+                       RuleEngine.evaluate_frame)
+            profile: RuleProfile receiving per-rule statistics (optional)
 
         Returns:
             DataFrame with added columns: activity_type, bloom_level, is_active
+            (and matched_rule_id)
         """
         logger.info(f"Classifying {len(df)} events with Bloom taxonomy")
 
-        enriched_events = []
+        columns = ["activity_type", "bloom_level", "is_active"]
+        if rule_code:
+            columns.append("matched_rule_id")
 
-        for _, row in df.iterrows():
-            # Convert row to dict for event creation
-            event_dict = row.to_dict()
+        fields = [f for f in self.fields if f in df.columns]
+        if not fields or len(df) == 0:
+            result_df = self.rule_engine.evaluate_frame(df, rule_code, profile)
+        else:
+            # Classify each distinct combination of rule fields once
+            codes, uniques = self._factorize(df, fields)
+            weights = np.bincount(codes, minlength=len(uniques)) if profile else None
+            classified = self.rule_engine.evaluate_frame(uniques, rule_code, profile, weights)
 
-            # Apply rules
-            enriched = self.rule_engine.evaluate(event_dict)
+            result_df = df.reset_index(drop=True)
+            for column in columns:
+                result_df[column] = classified[column].to_numpy()[codes]
 
-            enriched_events.append(enriched)
-
-        # Convert to DataFrame
-        result_df = pd.DataFrame(enriched_events)
+            logger.debug(f"Classified {len(uniques)} unique combinations of {fields}")
 
         logger.info(
             f"Classification complete. "
@@ -61,6 +96,53 @@ class BloomClassifier:
 
         return result_df
 
+    @staticmethod
+    def _factorize(df: pd.DataFrame, fields: List[str]) -> Tuple[np.ndarray, pd.DataFrame]:
+        """Factorize a DataFrame on the given fields.
+
+        Returns:
+            Tuple of (code per row, DataFrame with one row per code)
+        """
+        keys = df[fields]
+        codes = keys.groupby(fields, sort=False, dropna=False).ngroup().to_numpy()
+        _, first_rows = np.unique(codes, return_index=True)
+        return codes, keys.iloc[first_rows]
+
+    def classify(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Classify a single event, memoized by its rule-field values.
+
+        Args:
+            event: Event dictionary
+
+        Returns:
+            Copy of the event with activity_type, bloom_level, is_active
+        """
+        key = tuple(event.get(field) for field in self.fields)
+        try:
+            activity_type, bloom_level, is_active = self._classify_key(key)
+        except TypeError:
+            # Unhashable field value: evaluate without the memo
+            return self.rule_engine.evaluate(event)
+
+        enriched = dict(event)
+        enriched["activity_type"] = activity_type
+        enriched["bloom_level"] = bloom_level
+        enriched["is_active"] = is_active
+        return enriched
+
+    def classify_batch(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Classify multiple events."""
+        return [self.classify(event) for event in events]
+
+    def cache_info(self):
+        """Hit/miss statistics of the classify() memo."""
+        return self._classify_key.cache_info()
+
+    def _evaluate_key(self, key: Tuple[Any, ...]) -> Classification:
+        """Evaluate the rules for one combination of rule-field values."""
+        enriched = self.rule_engine.evaluate(dict(zip(self.fields, key)))
+        return enriched["activity_type"], enriched["bloom_level"], enriched["is_active"]
+
     def get_statistics(self, df: pd.DataFrame) -> dict:
         """Get statistics about classified events.
 
@@ -1,13 +1,42 @@
 """Rule engine for event classification."""
 
-from typing import List, Dict, Any, Optional
+from typing import TYPE_CHECKING, List, Dict, Any, FrozenSet, Optional, Tuple
 from dataclasses import dataclass
 from pathlib import Path
+import hashlib
 import logging
+import time
+import numpy as np
+import pandas as pd
 import yaml
 
+from .substring_matcher import SubstringMatcher
+
+if TYPE_CHECKING:
+    from .rule_profile import RuleProfile
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_RULES_PATH = Path(__file__).parent / 'bloom_taxonomy.yaml'
+
+
+def ruleset_version(yaml_path: Optional[str] = None) -> str:
+    """Return a version string identifying the content of a rules file.
+
+    Args:
+        yaml_path: Path to YAML file with rules (default: bloom_taxonomy.yaml)
+
+    Returns:
+        First 16 hex chars of the SHA-256 of the file
+    """
+    path = Path(yaml_path) if yaml_path else DEFAULT_RULES_PATH
+    return content_version(path.read_bytes())
+
+
+def content_version(data: bytes) -> str:
+    """Return the version string of rules file content (see ruleset_version)."""
+    return hashlib.sha256(data).hexdigest()[:16]
+
 
 @dataclass
 class RuleCondition:
@@ -39,8 +68,79 @@ class Rule:
     action: RuleAction
 
 
+def parse_rules(text: str) -> List[Rule]:
+    """Parse rules from the text of a YAML rules file.
+
+    Args:
+        text: YAML document with a top-level ``rules`` list
+
+    Returns:
+        List of Rule objects sorted by priority
+    """
+    data = yaml.safe_load(text) or {}
+
+    rules = []
+    for rule_data in data.get('rules', []):
+        # Parse conditions
+        conditions = []
+        for cond_data in rule_data.get('conditions', []):
+            conditions.append(RuleCondition(
+                field=cond_data['field'],
+                operator=cond_data['operator'],
+                value=cond_data.get('value'),
+                values=cond_data.get('values'),
+            ))
+
+        # Parse action
+        action_data = rule_data['action']
+        action = RuleAction(
+            activity_type=action_data['activity_type'],
+            bloom_level=action_data['bloom_level'],
+            is_active=action_data.get('is_active', False),
+        )
+
+        # Create rule
+        rule = Rule(
+            id=rule_data['id'],
+            name=rule_data['name'],
+            priority=rule_data['priority'],
+            conditions=conditions,
+            action=action,
+        )
+        rules.append(rule)
+
+    # Sort by priority
+    return sorted(rules, key=lambda r: r.priority)
+
+
+# Operator codes for compiled conditions
+OP_EQUALS = 0
+OP_IN = 1
+OP_CONTAINS = 2
+OP_UNKNOWN = 3
+
+_OPERATOR_CODES = {"equals": OP_EQUALS, "in": OP_IN, "contains": OP_CONTAINS}
+
+# Compiled condition: (field, operator code, value, values)
+CompiledCondition = Tuple[str, int, Any, Any]
+
+
 class RuleEngine:
-    """Evaluates rules against events for classification."""
+    """Evaluates rules against events for classification.
+
+    Rules are indexed at load time: every rule with an ``equals``/``in``
+    condition on one of ``INDEXED_FIELDS`` is put in hash buckets keyed on
+    the accepted values. ``evaluate`` only checks the rules in the buckets
+    matching the event plus the rules without an indexable condition, in
+    priority order, so per-event cost does not grow with the rule count.
+
+    The needles of all ``contains`` conditions on a field share one
+    SubstringMatcher: each distinct field value is scanned once for all of
+    them, and every ``contains`` condition becomes a set lookup.
+    """
+
+    INDEXED_FIELDS = ("event_name", "component")
+    CANDIDATE_CACHE_SIZE = 10000  # Distinct bucket-key combinations remembered
 
     def __init__(self, rules: Optional[List[Rule]] = None, yaml_path: Optional[str] = None):
         """Initialize RuleEngine with rules from list or YAML file.
@@ -58,8 +158,89 @@ class RuleEngine:
             self.rules = sorted(rules, key=lambda r: r.priority)
         else:
             # Load default rules from bloom_taxonomy.yaml
-            default_path = Path(__file__).parent / 'bloom_taxonomy.yaml'
-            self.rules = self._load_rules_from_yaml(str(default_path))
+            self.rules = self._load_rules_from_yaml(str(DEFAULT_RULES_PATH))
+
+        self._build_index()
+
+    @property
+    def referenced_fields(self) -> Tuple[str, ...]:
+        """Event fields inspected by at least one rule condition.
+
+        The classification of an event depends only on these fields.
+        """
+        fields: Dict[str, None] = {}
+        for rule in self.rules:
+            for condition in rule.conditions:
+                fields.setdefault(condition.field, None)
+        return tuple(fields)
+
+    def _build_index(self) -> None:
+        """Compile conditions and index rules by their equals/in values."""
+        needles: Dict[str, List[str]] = {}
+        for rule in self.rules:
+            for condition in rule.conditions:
+                if condition.operator == "contains" and isinstance(condition.value, str):
+                    needles.setdefault(condition.field, []).append(condition.value)
+        self._matchers: Dict[str, SubstringMatcher] = {
+            field: SubstringMatcher(values, cache_size=self.CANDIDATE_CACHE_SIZE)
+            for field, values in needles.items()
+        }
+
+        self._compiled: List[Tuple[Rule, Tuple[CompiledCondition, ...]]] = [
+            (rule, tuple(self._compile_condition(c) for c in rule.conditions))
+            for rule in self.rules
+        ]
+        self._index: Dict[str, Dict[Any, List[int]]] = {
+            field: {} for field in self.INDEXED_FIELDS
+        }
+        self._unindexed: List[int] = []
+        self._candidate_cache: Dict[Tuple[Any, ...], Tuple[int, ...]] = {}
+
+        for position, rule in enumerate(self.rules):
+            key = self._index_key(rule)
+            if key is None:
+                self._unindexed.append(position)
+                continue
+            field, keys = key
+            for value in keys:
+                self._index[field].setdefault(value, []).append(position)
+
+        indexed = len(self.rules) - len(self._unindexed)
+        logger.debug(f"Indexed {indexed}/{len(self.rules)} rules")
+
+    def _index_key(self, rule: Rule) -> Optional[Tuple[str, List[Any]]]:
+        """Pick the condition a rule is indexed on.
+
+        Returns:
+            Tuple of (field, accepted values), or None if not indexable
+        """
+        for field in self.INDEXED_FIELDS:
+            for operator in ("equals", "in"):
+                for condition in rule.conditions:
+                    if condition.field != field or condition.operator != operator:
+                        continue
+                    keys = [condition.value] if operator == "equals" else (condition.values or [])
+                    try:
+                        for value in keys:
+                            hash(value)
+                    except TypeError:
+                        continue
+                    return field, list(keys)
+        return None
+
+    @staticmethod
+    def _compile_condition(condition: RuleCondition) -> CompiledCondition:
+        """Convert a condition to a tuple with a resolved operator code."""
+        operator = _OPERATOR_CODES.get(condition.operator, OP_UNKNOWN)
+        if operator == OP_CONTAINS and not isinstance(condition.value, str):
+            operator = OP_UNKNOWN  # A substring must be a string
+        values = condition.values or []
+        if operator == OP_IN:
+            try:
+                values = frozenset(values)
+            except TypeError:
+                values = list(values)
+        return (condition.field, operator, condition.value, values)
 
     def _load_rules_from_yaml(self, yaml_path: str) -> List[Rule]:
         """Load rules from YAML file.
@@ -71,40 +252,7 @@ class RuleEngine:
             List of Rule objects sorted by priority
         """
         with open(yaml_path, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
-
-        rules = []
-        for rule_data in data.get('rules', []):
-            # Parse conditions
-            conditions = []
-            for cond_data in rule_data.get('conditions', []):
-                conditions.append(RuleCondition(
-                    field=cond_data['field'],
-                    operator=cond_data['operator'],
-                    value=cond_data.get('value'),
-                    values=cond_data.get('values'),
-                ))
-
-            # Parse action
-            action_data = rule_data['action']
-            action = RuleAction(
-                activity_type=action_data['activity_type'],
-                bloom_level=action_data['bloom_level'],
-                is_active=action_data.get('is_active', False),
-            )
-
-            # Create rule
-            rule = Rule(
-                id=rule_data['id'],
-                name=rule_data['name'],
-                priority=rule_data['priority'],
-                conditions=conditions,
-                action=action,
-            )
-            rules.append(rule)
-
-        # Sort by priority
-        return sorted(rules, key=lambda r: r.priority)
+            return parse_rules(f.read())
 
     def evaluate(self, event: Dict[str, Any]) -> Dict[str, Any]:
         """Evaluate event against rules and apply action.
@@ -115,15 +263,193 @@ class RuleEngine:
         Returns:
             Event with added fields: activity_type, bloom_level, is_active
         """
-        # Try each rule in priority order
-        for rule in self.rules:
-            if self._matches_all_conditions(event, rule.conditions):
-                logger.debug(f"Event matched rule: {rule.name}")
+        # Try candidate rules in priority order
+        for position in self._candidates(event):
+            rule, conditions = self._compiled[position]
+            if self._matches_compiled(event, conditions):
+                logger.debug("Event matched rule: %s", rule.name)
                 return self._apply_action(event, rule.action)
 
         # Default: if no rule matched
         return self._apply_default(event)
 
+    def _candidates(self, event: Dict[str, Any]) -> Tuple[int, ...]:
+        """Positions of rules that can match the event, in priority order."""
+        key = []
+        for field in self.INDEXED_FIELDS:
+            value = event.get(field)
+            try:
+                hash(value)
+            except TypeError:
+                value = None
+            key.append(value)
+        key = tuple(key)
+
+        cached = self._candidate_cache.get(key)
+        if cached is not None:
+            return cached
+
+        positions = set(self._unindexed)
+        for field, value in zip(self.INDEXED_FIELDS, key):
+            positions.update(self._index[field].get(value, ()))
+        candidates = tuple(sorted(positions))
+
+        if len(self._candidate_cache) >= self.CANDIDATE_CACHE_SIZE:
+            self._candidate_cache.clear()
+        self._candidate_cache[key] = candidates
+        return candidates
+
+    def _matches_compiled(
+        self, event: Dict[str, Any], conditions: Tuple[CompiledCondition, ...]
+    ) -> bool:
+        """Check if event matches all compiled conditions."""
+        for field, operator, value, values in conditions:
+            field_value = event.get(field)
+
+            if operator == OP_EQUALS:
+                if field_value != value:
+                    return False
+
+            elif operator == OP_IN:
+                try:
+                    if field_value not in values:
+                        return False
+                except TypeError:
+                    # Unhashable field value cannot equal a YAML scalar
+                    return False
+
+            elif operator == OP_CONTAINS:
+                if value not in self._matchers[field].matches(field_value):
+                    return False
+
+            else:
+                return False
+
+        return True
+
+    def evaluate_frame(
+        self,
+        df: pd.DataFrame,
+        rule_code: bool = False,
+        profile: Optional["RuleProfile"] = None,
+        weights: Optional[np.ndarray] = None,
+    ) -> pd.DataFrame:
+        """Evaluate all events of a DataFrame with vectorized column masks.
+
+        Produces the same classification as calling ``evaluate`` on every
+        row: rules are applied in priority order and the first match wins.
+
+        Args:
+            df: DataFrame of events to classify
+            rule_code: Add a ``matched_rule_id`` column with the code of the
+                       matched rule (1..n in priority order, 0 = default)
+            profile: RuleProfile receiving hit counts and condition-check time
+            weights: Events each row stands for, in the profile (default: 1)
+
+        Returns:
+            Copy of the DataFrame (with a fresh index) and added columns:
+            activity_type, bloom_level, is_active (and matched_rule_id)
+        """
+        n = len(df)
+        activity_type = np.full(n, "Other", dtype=object)
+        bloom_level = np.full(n, "Unknown", dtype=object)
+        is_active = np.zeros(n, dtype=bool)
+        unmatched = np.ones(n, dtype=bool)
+        codes = np.zeros(n, dtype=self.rule_code_dtype)
+        contained: Dict[str, Tuple[np.ndarray, List[FrozenSet[str]]]] = {}
+        timed = profile is not None and profile.timed
+
+        for position, rule in enumerate(self.rules):
+            if not unmatched.any():
+                break
+
+            started = time.perf_counter() if timed else 0.0
+            mask = unmatched.copy()
+            for condition in rule.conditions:
+                mask &= self._condition_mask(df, condition, contained)
+                if not mask.any():
+                    break
+            if timed:
+                profile.seconds[position] += time.perf_counter() - started
+
+            activity_type[mask] = rule.action.activity_type
+            bloom_level[mask] = rule.action.bloom_level
+            is_active[mask] = rule.action.is_active
+            codes[mask] = position + 1
+            unmatched &= ~mask
+
+        if profile is not None:
+            profile.rows_evaluated += n
+            profile.record_codes(codes, weights)
+
+        result = df.reset_index(drop=True)
+        result["activity_type"] = activity_type
+        result["bloom_level"] = bloom_level
+        result["is_active"] = is_active
+        if rule_code:
+            result["matched_rule_id"] = codes
+        return result
+
+    @property
+    def rule_code_dtype(self) -> type:
+        """Smallest integer type holding every rule code."""
+        return np.int16 if len(self.rules) < np.iinfo(np.int16).max else np.int32
+
+    def _condition_mask(
+        self,
+        df: pd.DataFrame,
+        condition: RuleCondition,
+        contained: Optional[Dict[str, Tuple[np.ndarray, List[FrozenSet[str]]]]] = None,
+    ) -> np.ndarray:
+        """Build boolean mask of rows matching a single condition.
+
+        Args:
+            df: DataFrame of events
+            condition: Condition to test
+            contained: Per-field needle sets already computed for this frame
+        """
+        n = len(df)
+
+        if condition.field not in df.columns:
+            # Missing fields behave like event.get() returning None
+            return np.full(n, self._matches_condition({}, condition), dtype=bool)
+
+        column = df[condition.field]
+
+        if condition.operator == "equals":
+            if condition.value is None:
+                return np.fromiter((v is None for v in column), dtype=bool, count=n)
+            return (column == condition.value).to_numpy(dtype=bool)
+
+        elif condition.operator == "in":
+            return column.isin(condition.values or []).to_numpy(dtype=bool)
+
+        elif condition.operator == "contains" and isinstance(condition.value, str):
+            if contained is None:
+                contained = {}
+            if condition.field not in contained:
+                contained[condition.field] = self._contained_needles(condition.field, column)
+            codes, found = contained[condition.field]
+            # One flag per distinct value, plus False for missing values (code -1)
+            hits = np.fromiter(
+                (condition.value in needles for needles in found), dtype=bool, count=len(found)
+            )
+            return np.append(hits, False)[codes]
+
+        return np.zeros(n, dtype=bool)
+
+    def _contained_needles(
+        self, field: str, column: pd.Series
+    ) -> Tuple[np.ndarray, List[FrozenSet[str]]]:
+        """Scan each distinct value of a column once for all ``contains`` needles.
+
+        Returns:
+            Tuple of (value code per row, -1 if missing; needles found per code)
+        """
+        codes, uniques = pd.factorize(column)
+        matcher = self._matchers[field]
+        return codes, [matcher.matches(value) for value in uniques]
+
     def _matches_all_conditions(
         self, event: Dict[str, Any], conditions: List[RuleCondition]
     ) -> bool:
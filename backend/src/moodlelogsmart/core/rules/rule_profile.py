@@ -0,0 +1,109 @@
+"""Per-rule hit statistics, to find hot, slow and dead rules.
+
+A RuleProfile is filled by ``BloomClassifier.apply_rules`` (and
+``RuleEngine.evaluate_frame``) when one is passed in, so the shared,
+cached classifiers carry no profiling state and profiling costs nothing
+when it is off.
+
+Counts are per event. Rules are checked in priority order and the first
+match wins, so an event *evaluates* every rule up to the one it matches
+(all of them if it falls through to the default). Condition-check time is
+measured on the rows actually evaluated, which after deduplication are the
+distinct combinations of rule fields, not every event.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .rule_engine import Rule
+
+PROFILE_FILE = "rule_profile.json"
+
+# Code of events no rule matched (rules are coded 1..n in priority order)
+DEFAULT_RULE_CODE = 0
+
+
+class RuleProfile:
+    """Accumulates rule hits and condition-check time over classification calls.
+
+    Args:
+        rules: Rules of the engine being profiled, in priority order
+        timed: Measure condition-check time per rule
+    """
+
+    def __init__(self, rules: Sequence[Rule], timed: bool = True):
+        self.rules = list(rules)
+        self.timed = timed
+        self.hits = np.zeros(len(self.rules) + 1, dtype=np.int64)  # Index = rule code
+        self.seconds = np.zeros(len(self.rules), dtype=np.float64)
+        self.rows_evaluated = 0  # Rows run through the rules (distinct combinations)
+
+    @property
+    def events(self) -> int:
+        return int(self.hits.sum())
+
+    def record_codes(self, codes: np.ndarray, weights: Optional[np.ndarray] = None) -> None:
+        """Count matched rule codes.
+
+        Args:
+            codes: Matched rule code per row
+            weights: Events each row stands for (default: 1)
+        """
+        counts = np.bincount(codes, weights=weights, minlength=len(self.hits))
+        self.hits += counts.astype(np.int64)
+
+    def evaluations(self) -> np.ndarray:
+        """Events that reached each rule (matched it or a later one, or none)."""
+        later = np.cumsum(self.hits[:0:-1])[::-1]  # later[i]: events with code >= i + 1
+        return self.hits[DEFAULT_RULE_CODE] + later
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Build the report: totals, then one entry per rule in priority order."""
+        events = self.events
+        evaluations = self.evaluations()
+        default = int(self.hits[DEFAULT_RULE_CODE])
+
+        rules: List[Dict[str, Any]] = []
+        for position, rule in enumerate(self.rules):
+            code = position + 1
+            hits = int(self.hits[code])
+            entry = {
+                "code": code,
+                "id": rule.id,
+                "name": rule.name,
+                "priority": rule.priority,
+                "evaluations": int(evaluations[position]),
+                "hits": hits,
+                "hit_rate": _ratio(hits, evaluations[position]),
+                "share": _ratio(hits, events),
+            }
+            if self.timed:
+                entry["seconds"] = round(float(self.seconds[position]), 6)
+            rules.append(entry)
+
+        report = {
+            "events": events,
+            "rows_evaluated": self.rows_evaluated,
+            "default_events": default,
+            "default_rate": _ratio(default, events),
+            "never_fired": [entry["id"] for entry in rules if entry["hits"] == 0],
+            "rules": rules,
+        }
+        if self.timed:
+            report["condition_seconds"] = round(float(self.seconds.sum()), 6)
+        return report
+
+    def write(self, target: Union[str, Path, BinaryIO]) -> None:
+        """Write the report as JSON to a path or binary stream."""
+        data = json.dumps(self.to_dict(), indent=2, ensure_ascii=False).encode("utf-8")
+        if isinstance(target, (str, Path)):
+            Path(target).write_bytes(data)
+        else:
+            target.write(data)
+
+
+def _ratio(part: int, whole: Optional[int]) -> float:
+    return round(float(part) / float(whole), 6) if whole else 0.0
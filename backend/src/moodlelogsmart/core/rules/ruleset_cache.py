@@ -0,0 +1,220 @@
+"""Process-wide cache of compiled rulesets.
+
+Parsing a rules YAML and indexing its rules costs far more than
+classifying a small log, so each ruleset is compiled once per process
+into a CompiledRuleset (parsed rules plus an indexed, memoizing
+BloomClassifier) and shared by every job and request of that process.
+
+Compiled rulesets are keyed by file path and content hash. The file is
+checked with ``stat()`` at most every RULES_RELOAD_CHECK_SECONDS; when it
+changed, its content is hashed and compiled again (or an earlier
+compilation of the same content is reused). A file that no longer parses
+is reported and the previous version keeps being served.
+
+Besides the bundled ``default`` ruleset, named rulesets can be configured
+and assigned to API keys:
+
+    RULESETS=advanced=/etc/moodlelogsmart/advanced.yaml,pt=/etc/moodlelogsmart/pt.yaml
+    API_KEY_RULESETS=<api key id>=advanced
+
+where the API key ID is the one used for job ownership (first 16 hex
+chars of the SHA-256 of the key).
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .bloom_classifier import BloomClassifier
+from .rule_engine import DEFAULT_RULES_PATH, Rule, content_version, parse_rules
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULESET = "default"
+RULES_RELOAD_CHECK_SECONDS = float(os.getenv("RULES_RELOAD_CHECK_SECONDS", "2"))
+MAX_COMPILED_RULESETS = 16  # Versions kept across all files
+
+
+@dataclass(frozen=True)
+class CompiledRuleset:
+    """A parsed, indexed ruleset shared by all users of a process."""
+
+    name: str
+    path: Path
+    version: str  # SHA-256 prefix of the file content (see content_version)
+    rules: Tuple[Rule, ...]
+    classifier: BloomClassifier = field(compare=False, repr=False)
+
+
+@dataclass
+class _FileState:
+    """Last observed state of a rules file."""
+
+    signature: Tuple[int, int]  # (mtime_ns, size)
+    checked_at: float
+    ruleset: CompiledRuleset
+
+
+def parse_mapping(value: str) -> Dict[str, str]:
+    """Parse a ``name=value,name=value`` configuration string.
+
+    Raises:
+        ValueError: If an entry has no ``=``
+    """
+    mapping = {}
+    for entry in value.split(","):
+        if not entry.strip():
+            continue
+        name, sep, target = entry.partition("=")
+        if not sep or not name.strip() or not target.strip():
+            raise ValueError(f"Invalid entry {entry!r}, expected name=value")
+        mapping[name.strip()] = target.strip()
+    return mapping
+
+
+class RulesetCache:
+    """Compiles rulesets once and reloads them when their file changes.
+
+    Args:
+        rulesets: Named rules files, in addition to ``default``
+        api_key_rulesets: Ruleset name per API key ID
+        check_interval: Minimum seconds between modification checks of a file
+
+    Raises:
+        ValueError: If an API key is assigned an unknown ruleset
+    """
+
+    def __init__(
+        self,
+        rulesets: Optional[Dict[str, str]] = None,
+        api_key_rulesets: Optional[Dict[str, str]] = None,
+        check_interval: float = RULES_RELOAD_CHECK_SECONDS,
+    ):
+        self.paths: Dict[str, Path] = {DEFAULT_RULESET: DEFAULT_RULES_PATH}
+        self.paths.update({name: Path(path) for name, path in (rulesets or {}).items()})
+        self.api_key_rulesets = dict(api_key_rulesets or {})
+        self.check_interval = check_interval
+
+        unknown = set(self.api_key_rulesets.values()) - set(self.paths)
+        if unknown:
+            raise ValueError(f"API keys assigned to unknown rulesets: {', '.join(sorted(unknown))}")
+
+        self._files: Dict[Tuple[str, Path], _FileState] = {}
+        # (path, version) -> (rules, classifier), least recently used first
+        self._compiled: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name: Optional[str] = None) -> CompiledRuleset:
+        """Return the current compiled version of a named ruleset.
+
+        Args:
+            name: Ruleset name (default: ``default``)
+
+        Raises:
+            KeyError: If no ruleset has that name
+            ValueError: If the file cannot be parsed and no earlier version exists
+        """
+        name = name or DEFAULT_RULESET
+        if name not in self.paths:
+            raise KeyError(f"Unknown ruleset: {name}")
+        return self.load(self.paths[name], name)
+
+    def for_api_key(self, api_key_id: Optional[str]) -> CompiledRuleset:
+        """Return the ruleset assigned to an API key (``default`` if none)."""
+        return self.get(self.api_key_rulesets.get(api_key_id or ""))
+
+    def load(self, path, name: Optional[str] = None) -> CompiledRuleset:
+        """Return the compiled ruleset of a rules file, reloading it if it changed.
+
+        Args:
+            path: Rules YAML file
+            name: Name reported in the CompiledRuleset (default: file stem)
+
+        Raises:
+            OSError: If the file cannot be read and was never loaded
+            ValueError: If the file cannot be parsed and was never loaded
+        """
+        path = Path(path).resolve()
+        name = name or path.stem
+        key = (name, path)
+        now = time.monotonic()
+
+        with self._lock:
+            state = self._files.get(key)
+            if state is not None and now - state.checked_at < self.check_interval:
+                return state.ruleset
+
+            try:
+                stat = os.stat(path)
+                signature = (stat.st_mtime_ns, stat.st_size)
+                if state is not None and signature == state.signature:
+                    state.checked_at = now
+                    return state.ruleset
+                ruleset = self._compile(name, path)
+            except (OSError, ValueError) as e:
+                if state is None:
+                    raise
+                logger.error(f"Ruleset {name}: keeping version {state.ruleset.version}: {e}")
+                state.checked_at = now
+                return state.ruleset
+
+            if state is not None and state.ruleset.version != ruleset.version:
+                logger.info(
+                    f"Ruleset {name} reloaded: {state.ruleset.version} -> {ruleset.version}"
+                )
+            self._files[key] = _FileState(signature, now, ruleset)
+            return ruleset
+
+    def _compile(self, name: str, path: Path) -> CompiledRuleset:
+        """Parse and index a rules file, reusing an identical earlier compilation."""
+        data = path.read_bytes()
+        version = content_version(data)
+        cache_key = (path, version)
+
+        compiled = self._compiled.get(cache_key)
+        if compiled is None:
+            try:
+                rules = tuple(parse_rules(data.decode("utf-8")))
+            except Exception as e:
+                raise ValueError(f"Invalid rules file {path}: {e}") from e
+            if not rules:
+                raise ValueError(f"Rules file {path} defines no rules")
+
+            compiled = self._compiled[cache_key] = (rules, BloomClassifier(rules=list(rules)))
+            if len(self._compiled) > MAX_COMPILED_RULESETS:
+                self._compiled.popitem(last=False)
+            logger.info(f"Compiled ruleset {name} ({len(rules)} rules, version {version})")
+        else:
+            self._compiled.move_to_end(cache_key)
+
+        rules, classifier = compiled
+        return CompiledRuleset(
+            name=name, path=path, version=version, rules=rules, classifier=classifier
+        )
+
+
+# Global ruleset cache instance (one per process)
+_ruleset_cache: Optional[RulesetCache] = None
+_ruleset_cache_lock = threading.Lock()
+
+
+def get_ruleset_cache() -> RulesetCache:
+    """Get or create the process-wide ruleset cache from RULESETS/API_KEY_RULESETS.
+
+    Returns:
+        RulesetCache: Global ruleset cache
+    """
+    global _ruleset_cache
+    if _ruleset_cache is None:
+        with _ruleset_cache_lock:
+            if _ruleset_cache is None:
+                _ruleset_cache = RulesetCache(
+                    rulesets=parse_mapping(os.getenv("RULESETS", "")),
+                    api_key_rulesets=parse_mapping(os.getenv("API_KEY_RULESETS", "")),
+                )
+    return _ruleset_cache
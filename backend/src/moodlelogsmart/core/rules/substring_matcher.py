@@ -0,0 +1,115 @@
+"""Multi-pattern substring search for ``contains`` rule conditions.
+
+All the needles of the ``contains`` conditions on one field are compiled
+into a single Aho-Corasick automaton, so a field value is scanned once
+whatever the number of substring rules, and the result (the set of
+needles it contains) is remembered per distinct value. Event logs repeat
+a few hundred event names millions of times, so almost every lookup is a
+dictionary hit.
+
+The automaton comes from ``pyahocorasick`` when it is installed (the
+``fast`` extra); otherwise a pure Python implementation is used.
+"""
+
+from collections import deque
+from typing import Any, Dict, FrozenSet, Iterable, List
+
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+_NO_MATCH: FrozenSet[str] = frozenset()
+
+
+class _Automaton:
+    """Pure Python Aho-Corasick automaton over a fixed set of needles."""
+
+    def __init__(self, needles: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[FrozenSet[str]] = [_NO_MATCH]
+
+        for needle in needles:
+            state = 0
+            for char in needle:
+                following = self._goto[state].get(char)
+                if following is None:
+                    following = len(self._goto)
+                    self._goto[state][char] = following
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(_NO_MATCH)
+                state = following
+            self._output[state] = self._output[state] | {needle}
+
+        # Breadth-first, so the failure state of every parent is known first
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, following in self._goto[state].items():
+                queue.append(following)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                target = target if target != following else 0
+                self._fail[following] = target
+                self._output[following] = self._output[following] | self._output[target]
+
+    def find(self, text: str) -> FrozenSet[str]:
+        """Return the needles occurring in ``text``."""
+        goto, fail, output = self._goto, self._fail, self._output
+        found = output[0]
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found = found | output[state]
+        return found
+
+
+class SubstringMatcher:
+    """Finds which of a set of needles occur in a string, with memoization.
+
+    Args:
+        needles: Substrings to look for (duplicates are ignored)
+        cache_size: Distinct values remembered before the memo is reset
+    """
+
+    def __init__(self, needles: Iterable[str], cache_size: int = 10000):
+        self.needles: FrozenSet[str] = frozenset(needles)
+        self.cache_size = cache_size
+        self._cache: Dict[str, FrozenSet[str]] = {}
+
+        # The empty string is in every string; automatons cannot hold it
+        self._always = frozenset(n for n in self.needles if not n)
+        searchable = sorted(n for n in self.needles if n)
+
+        if HAS_AHOCORASICK and searchable:
+            self._automaton = ahocorasick.Automaton()
+            for needle in searchable:
+                self._automaton.add_word(needle, needle)
+            self._automaton.make_automaton()
+            self._find = self._find_native
+        else:
+            self._automaton = _Automaton(searchable)
+            self._find = self._automaton.find
+
+    def matches(self, value: Any) -> FrozenSet[str]:
+        """Return the needles contained in ``value`` (none if it is not a string)."""
+        if not isinstance(value, str):
+            return _NO_MATCH
+        found = self._cache.get(value)
+        if found is None:
+            found = self._find(value) | self._always
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[value] = found
+        return found
+
+    def _find_native(self, text: str) -> FrozenSet[str]:
+        return frozenset(needle for _, needle in self._automaton.iter(text))
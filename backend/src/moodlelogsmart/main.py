@@ -1,23 +1,39 @@
 """FastAPI application for MoodleLogSmart."""
 
 import asyncio
+import csv
+import functools
+import json
 import logging
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 import tempfile
-import zipfile
+import time
 from datetime import datetime, timedelta
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks, Depends, Request
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Query, Request
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.datastructures import Headers
 from starlette.middleware.base import BaseHTTPMiddleware
 
+from moodlelogsmart import metrics
 from moodlelogsmart.api.models import UploadResponse, StatusResponse, ErrorResponse
 from moodlelogsmart.api.job_manager import get_job_manager, Job
+from moodlelogsmart.api.job_store import PROCESS_HEARTBEAT_SECONDS
+from moodlelogsmart.api.progress import event_from_job
+from moodlelogsmart.api.worker_pool import get_worker_pool, JobTimeoutError
+from moodlelogsmart.api.scheduler import get_scheduler, QueueFullError, QUEUE_RETRY_AFTER_SECONDS
+from moodlelogsmart.api.result_cache import get_result_cache
 from moodlelogsmart.api.auth import verify_api_key
-from moodlelogsmart.api.validators import validate_csv_content, validate_job_id
+from moodlelogsmart.api.classify_stream import classify_stream, is_ndjson
+from moodlelogsmart.api.upload_stream import MultipartCSVReceiver, ReceivedUpload
+from moodlelogsmart.api.validators import validate_job_id
+from moodlelogsmart.core.auto_detect.csv_detector import CSVDetector, CSVFormat
+from moodlelogsmart.core.export.zip_package import iter_zip, result_members
+from moodlelogsmart.core.pipeline.runner import PipelineResult, result_options
+from moodlelogsmart.core.rules.ruleset_cache import get_ruleset_cache
 
 # Try to import slowapi (optional for rate limiting)
 try:
@@ -28,12 +44,6 @@ try:
 except ImportError:
     logger.warning("slowapi not installed - rate limiting disabled")
     RATE_LIMITING_AVAILABLE = False
-from moodlelogsmart.core.auto_detect.csv_detector import CSVDetector
-from moodlelogsmart.core.auto_detect.column_mapper import ColumnMapper
-from moodlelogsmart.core.auto_detect.timestamp_detector import TimestampDetector
-from moodlelogsmart.core.clean.data_cleaner import DataCleaner
-from moodlelogsmart.core.rules.bloom_classifier import BloomClassifier
-from moodlelogsmart.core.export.exporter import CSVExporter, XESExporter
 
 logger = logging.getLogger(__name__)
 
@@ -70,6 +80,48 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
         return response
 
 
+class UploadSizeLimitMiddleware:
+    """Reject upload bodies over MAX_FILE_SIZE_MB as they are received.
+
+    The limit is applied to the request stream, ahead of the endpoint's own
+    multipart parsing: a larger Content-Length is refused before anything
+    is read, and a body without one is cut off as soon as it passes the
+    limit.
+    """
+
+    def __init__(self, app, paths: Tuple[str, ...] = ("/api/upload",)):
+        self.app = app
+        self.paths = paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        # The form around the file (boundaries, part headers) adds a little
+        limit = MAX_FILE_SIZE_MB * 1024 * 1024 + MULTIPART_OVERHEAD_BYTES
+
+        content_length = Headers(scope=scope).get("content-length", "")
+        if content_length.isdigit() and int(content_length) > limit:
+            error = upload_too_large_error()
+            response = JSONResponse({"detail": error.detail}, status_code=error.status_code)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise upload_too_large_error()
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
 # Create FastAPI app
 app = FastAPI(
     title="MoodleLogSmart API",
@@ -104,6 +156,9 @@ app.add_middleware(
 
 logger.info(f"CORS configured for origins: {ALLOWED_ORIGINS}")
 
+# Refuse oversized uploads before they are parsed
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # Apply security headers middleware
 app.add_middleware(SecurityHeadersMiddleware)
 logger.info("Security headers middleware enabled")
@@ -111,10 +166,27 @@ logger.info("Security headers middleware enabled")
 # Get job manager
 job_manager = get_job_manager()
 
+# Get worker pool (processes are started in startup_event)
+worker_pool = get_worker_pool()
+
+# Get scheduler (limits concurrent jobs, orders the queue)
+scheduler = get_scheduler()
+
+# Get result cache (None when disabled)
+result_cache = get_result_cache()
+
+# Get ruleset cache (compiled rules, selected per API key)
+rulesets = get_ruleset_cache()
+
 # Temporary directory for uploads
 TEMP_DIR = Path(tempfile.gettempdir()) / "moodlelogsmart"
 TEMP_DIR.mkdir(parents=True, exist_ok=True)
 
+# Upload size limit (large files are processed in streaming mode)
+MAX_FILE_SIZE_MB = int(os.getenv("MAX_FILE_SIZE_MB", "500"))
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Bytes of the upload validated and written at a time
+MULTIPART_OVERHEAD_BYTES = 64 * 1024  # Request bytes allowed beyond MAX_FILE_SIZE_MB
+
 
 @app.on_event("startup")
 async def startup_event():
@@ -122,80 +194,291 @@ async def startup_event():
     logger.info("MoodleLogSmart API starting up")
     TEMP_DIR.mkdir(parents=True, exist_ok=True)
 
+    # Fail jobs left unfinished by a previous run (or a stopped API process)
+    orphaned = await asyncio.to_thread(job_manager.fail_orphaned_jobs)
+    if orphaned:
+        logger.warning(f"Marked {orphaned} interrupted jobs as failed")
+
+    # Warm up the worker processes before accepting jobs
+    await asyncio.to_thread(worker_pool.start)
+
+    # Tell other API processes sharing the job store that this one is alive
+    asyncio.create_task(send_heartbeats())
+
     # Start cleanup background task
     asyncio.create_task(cleanup_old_jobs())
     logger.info("Cleanup task started (runs every hour)")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop worker processes on shutdown."""
+    logger.info("MoodleLogSmart API shutting down")
+    await asyncio.to_thread(worker_pool.shutdown)
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
 
-@app.post("/api/upload", response_model=UploadResponse)
+@app.post(
+    "/api/upload",
+    response_model=UploadResponse,
+    # The body is parsed by save_upload, so the form is documented by hand
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": ["file"],
+                        "properties": {"file": {"type": "string", "format": "binary"}},
+                    }
+                }
+            },
+        }
+    },
+)
 async def upload_csv(
     request: Request,
-    file: UploadFile = File(...),
     background_tasks: BackgroundTasks = BackgroundTasks(),
     api_key_id: str = Depends(verify_api_key)
 ) -> UploadResponse:
     """Upload CSV file for processing.
 
+    The multipart body holds the CSV in its ``file`` field (max
+    MAX_FILE_SIZE_MB); it is read from the request stream by save_upload.
+
     Args:
-        file: CSV file to process (max 50MB)
+        request: Incoming request
         background_tasks: FastAPI background tasks
 
     Returns:
-        UploadResponse with job_id and status
+        UploadResponse with job_id, status and queue position
 
     Raises:
-        HTTPException: If file validation fails
+        HTTPException: If file validation fails (400/413) or the queue is full (503)
     """
-    # Validate file extension
-    if not file.filename or not file.filename.lower().endswith(".csv"):
-        raise HTTPException(status_code=400, detail="Only .csv files are allowed")
+    # Reject before reading the body if the queue is already full
+    if scheduler.is_full():
+        metrics.JOBS.labels(outcome="rejected").inc()
+        raise queue_full_error()
+
+    ruleset = rulesets.for_api_key(api_key_id)
 
     # Create job
     job_id = job_manager.create_job()
     job_manager.set_owner(job_id, api_key_id)
 
+    temp_input = TEMP_DIR / f"{job_id}_input.csv"
+    cache_key = None
+
     try:
-        # Save uploaded file temporarily
-        temp_input = TEMP_DIR / f"{job_id}_input.csv"
-        contents = await file.read()
+        # Stream the upload to the job's input file, validating and hashing each chunk
+        upload = await save_upload(request, temp_input)
+        file_size_mb = upload.size / (1024 * 1024)
+        content_hash = upload.sha256
+        metrics.UPLOAD_BYTES.observe(upload.size)
 
-        # Validate CSV content (security check)
-        validate_csv_content(contents)
+        job_manager.set_input_file(job_id, temp_input)
+        logger.info(f"Job {job_id}: Received {file_size_mb:.2f}MB CSV file")
 
-        # Validate file size (50MB limit)
-        file_size_mb = len(contents) / (1024 * 1024)
-        if file_size_mb > 50:
-            raise HTTPException(status_code=413, detail="File size exceeds 50MB limit")
+        # Reuse results of an identical upload (finished or in flight)
+        if result_cache:
+            cache_key = result_cache.key(content_hash, ruleset.version, result_options())
+            response = reuse_result(job_id, cache_key, temp_input, background_tasks)
+            if response:
+                return response
 
-        # Write to temporary file
-        with open(temp_input, "wb") as f:
-            f.write(contents)
+        # Line count orders the queue (shortest job first)
+        csv_format = await detect_csv_format(job_id, temp_input)
+        cost = csv_format.line_count if csv_format else 0
 
-        job_manager.set_input_file(job_id, temp_input)
-        logger.info(f"Job {job_id}: Received {file_size_mb:.2f}MB CSV file")
+        started = scheduler.admit(job_id, api_key_id, cost)
+        if not started:
+            job_manager.set_status(job_id, "queued")
 
-        # Start background processing with timeout
+        # Wait for a slot, then process with timeout
         background_tasks.add_task(
-            process_job_with_timeout, job_id, str(temp_input)
+            scheduler.run,
+            job_id,
+            functools.partial(
+                process_and_cache,
+                job_id,
+                str(temp_input),
+                csv_format,
+                cache_key,
+                ruleset.name,
+                content_hash,
+            ),
         )
 
-        return UploadResponse(job_id=job_id, status="processing")
+        if started:
+            return UploadResponse(job_id=job_id, status="processing")
+        return UploadResponse(
+            job_id=job_id,
+            status="queued",
+            message="File uploaded and queued for processing",
+            queue_position=scheduler.position(job_id),
+        )
 
+    except QueueFullError:
+        metrics.JOBS.labels(outcome="rejected").inc()
+        release_cache_key(cache_key, "Job queue is full")
+        job_manager.delete_job(job_id)
+        temp_input.unlink(missing_ok=True)
+        raise queue_full_error()
     except HTTPException:
+        release_cache_key(cache_key, "File validation failed")
         job_manager.mark_failed(job_id, "File validation failed")
+        temp_input.unlink(missing_ok=True)
         raise
     except Exception as e:
         logger.error(f"Job {job_id}: Upload error: {str(e)}")
+        release_cache_key(cache_key, f"Upload error: {str(e)}")
         job_manager.mark_failed(job_id, f"Upload error: {str(e)}")
+        temp_input.unlink(missing_ok=True)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+def reuse_result(
+    job_id: str, cache_key: str, temp_input: Path, background_tasks: BackgroundTasks
+) -> Optional[UploadResponse]:
+    """Complete or attach a job using results of an identical upload.
+
+    Args:
+        job_id: New job identifier
+        cache_key: Result cache key of the upload
+        temp_input: Uploaded file (deleted when not needed)
+        background_tasks: FastAPI background tasks
+
+    Returns:
+        UploadResponse if results are reused, None if the job must be processed
+        (the job is then registered as the in-flight leader for the key)
+    """
+    cached = result_cache.get(cache_key)
+    if cached:
+        result_cache.materialize(cached, result_zip_path(job_id))
+        job_manager.mark_completed(job_id, result_zip_path(job_id))
+        temp_input.unlink(missing_ok=True)
+        return UploadResponse(
+            job_id=job_id, status="completed", message="Results reused from an identical upload"
+        )
+
+    inflight = result_cache.join(cache_key, job_id)
+    if inflight:
+        leader_job_id, leader_result = inflight
+        job_manager.set_leader(job_id, leader_job_id)
+        temp_input.unlink(missing_ok=True)
+        background_tasks.add_task(follow_leader, job_id, leader_result)
+        logger.info(f"Job {job_id}: Attached to in-flight job {leader_job_id}")
+        return UploadResponse(
+            job_id=job_id,
+            status="processing",
+            message="Identical upload already processing, results will be shared",
+        )
+
+    return None
+
+
+def release_cache_key(cache_key: Optional[str], error: str) -> None:
+    """Fail jobs waiting on a key whose leader stopped before processing."""
+    if cache_key and result_cache:
+        result_cache.finish(cache_key, error=error)
+
+
+def result_zip_path(job_id: str) -> Path:
+    """Path of a job's results ZIP when it comes from the cache."""
+    return TEMP_DIR / f"{job_id}_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+
+
+async def save_upload(request: Request, destination: Path) -> ReceivedUpload:
+    """Stream the CSV of a multipart upload to disk, validating and hashing it.
+
+    The body is parsed as it arrives (see MultipartCSVReceiver), so a bad
+    file name or header is rejected after the first chunk and the file is
+    written once. UploadSizeLimitMiddleware caps the whole body at
+    MAX_FILE_SIZE_MB; the exact file size is checked here.
+
+    Args:
+        request: Upload request
+        destination: Path to write the file to
+
+    Returns:
+        ReceivedUpload with the file name, size and SHA-256 digest
+
+    Raises:
+        HTTPException: If the upload is too large or not a valid CSV
+    """
+    receiver = MultipartCSVReceiver(
+        request.headers.get("content-type"),
+        max_bytes=MAX_FILE_SIZE_MB * 1024 * 1024,
+        chunk_size=UPLOAD_CHUNK_SIZE,
+    )
+    return await receiver.receive(request.stream(), destination)
+
+
+async def detect_csv_format(job_id: str, path: Path) -> Optional[CSVFormat]:
+    """Detect the CSV format of an upload off the event loop.
+
+    Args:
+        job_id: Job identifier (for logging)
+        path: Path to the uploaded CSV
+
+    Returns:
+        Detected CSVFormat, or None if detection failed (the pipeline
+        reports the error when the job runs)
+    """
+    started = time.perf_counter()
+    try:
+        return await asyncio.to_thread(CSVDetector().detect, str(path))
+    except ValueError as e:
+        logger.warning(f"Job {job_id}: CSV format detection failed: {e}")
+        return None
+    finally:
+        metrics.STAGE_SECONDS.labels(stage="detect").observe(time.perf_counter() - started)
+
+
+def upload_too_large_error() -> HTTPException:
+    """Build the 413 response returned when an upload exceeds MAX_FILE_SIZE_MB."""
+    return HTTPException(
+        status_code=413, detail=f"File size exceeds {MAX_FILE_SIZE_MB}MB limit"
+    )
+
+
+def queue_full_error() -> HTTPException:
+    """Build the 503 response returned when the job queue is full."""
+    return HTTPException(
+        status_code=503,
+        detail="Server busy: job queue is full, try again later",
+        headers={"Retry-After": str(QUEUE_RETRY_AFTER_SECONDS)},
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Expose metrics in the Prometheus text format.
+
+    Not protected by an API key, like /health; restrict access to the
+    scraper at the network level.
+
+    Returns:
+        Metrics of all API processes (see moodlelogsmart.metrics)
+
+    Raises:
+        HTTPException: 503 if prometheus_client is missing or metrics are disabled
+    """
+    if not metrics.metrics_available():
+        raise HTTPException(status_code=503, detail="Metrics are not available")
+
+    metrics.TEMP_DIR_BYTES.set(await asyncio.to_thread(metrics.directory_size, TEMP_DIR))
+    body, content_type = metrics.render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 @app.get("/api/status/{job_id}", response_model=StatusResponse)
 async def get_status(
     job_id: str,
@@ -223,25 +506,145 @@ async def get_status(
     if not job_manager.verify_ownership(job_id, api_key_id):
         raise HTTPException(status_code=403, detail="Access denied: not your job")
 
+    # Jobs attached to an identical in-flight upload report its progress
+    progress = job.progress
+    if job.leader_job_id and job.status == "processing":
+        leader = job_manager.get_job(job.leader_job_id)
+        progress = leader.progress if leader else progress
+
     return StatusResponse(
         job_id=job.job_id,
         status=job.status,
-        progress=job.progress,
+        queue_position=scheduler.position(job_id) if job.status == "queued" else None,
+        progress=progress,
         error=job.error,
         created_at=job.created_at,
         completed_at=job.completed_at,
     )
 
 
+# Server-Sent Events: how often the job store is re-read when no event
+# arrived (jobs run by another API process), and the keep-alive interval
+SSE_POLL_SECONDS = float(os.getenv("SSE_POLL_SECONDS", "1"))
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+
+
+@app.get("/api/status/{job_id}/events")
+async def stream_status(
+    job_id: str,
+    request: Request,
+    api_key_id: str = Depends(verify_api_key)
+):
+    """Stream job progress as Server-Sent Events.
+
+    The API key and ownership are checked once; then a ``progress`` event is
+    pushed whenever the job advances (stage, rows processed, rows/s, ETA),
+    until it completes or fails.
+
+    Args:
+        job_id: Job identifier
+
+    Returns:
+        text/event-stream response
+
+    Raises:
+        HTTPException: If job not found or owned by another API key
+    """
+    job_id = validate_job_id(job_id)
+
+    job = job_manager.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    if not job_manager.verify_ownership(job_id, api_key_id):
+        raise HTTPException(status_code=403, detail="Access denied: not your job")
+
+    return StreamingResponse(
+        progress_events(job_id, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def progress_snapshot(job_id: str) -> Tuple[Optional[dict], str, int]:
+    """Build the progress event of a job.
+
+    Returns:
+        (event data or None if the job is gone, job ID whose live progress
+        is followed, sequence number of that progress)
+    """
+    job = job_manager.get_job(job_id)
+    if not job:
+        return None, job_id, 0
+
+    # Jobs attached to an identical in-flight upload report its progress
+    followed = job.leader_job_id if job.leader_job_id and job.status == "processing" else job_id
+    live = job_manager.tracker.get(followed)
+    if live is None and job.status == "processing":
+        # Run by another API process: use the progress it stored
+        leader = job if followed == job_id else job_manager.get_job(followed)
+        live = event_from_job(leader) if leader else None
+    data = {
+        "job_id": job_id,
+        "status": job.status,
+        "progress": job.progress,
+        "stage": None,
+        "rows_processed": 0,
+        "total_rows": 0,
+        "rows_per_second": None,
+        "eta_seconds": None,
+        "queue_position": scheduler.position(job_id) if job.status == "queued" else None,
+        "error": job.error,
+    }
+    if live is not None and job.status == "processing":
+        data.update(live.to_dict(), job_id=job_id, status=job.status)
+        data.pop("seq")
+    return data, followed, live.seq if live else 0
+
+
+async def progress_events(job_id: str, request: Request):
+    """Yield SSE messages for a job until it finishes or the client leaves."""
+    last = None
+    idle = 0.0
+    while not await request.is_disconnected():
+        data, followed, seq = progress_snapshot(job_id)
+        if data is None:
+            yield "event: error\ndata: {\"detail\": \"Job not found\"}\n\n"
+            return
+
+        if data != last:
+            yield f"event: progress\ndata: {json.dumps(data)}\n\n"
+            last = data
+            idle = 0.0
+        elif idle >= SSE_KEEPALIVE_SECONDS:
+            yield ": keep-alive\n\n"
+            idle = 0.0
+
+        if data["status"] in ("completed", "failed"):
+            return
+
+        started = time.monotonic()
+        await job_manager.tracker.wait(followed, seq, SSE_POLL_SECONDS)
+        idle += time.monotonic() - started
+
+
 @app.get("/api/download/{job_id}")
 async def download_results(
     job_id: str,
+    members: Optional[str] = Query(
+        None, description="Comma-separated files to include (default: all)"
+    ),
     api_key_id: str = Depends(verify_api_key)
 ):
     """Download processed results as ZIP.
 
+    A prebuilt ZIP is sent as is. When only some members are requested, or
+    the job kept its compressed members instead of a ZIP, the ZIP is built
+    while it is sent (members are copied, not recompressed).
+
     Args:
         job_id: Job identifier
+        members: Comma-separated member names to include
 
     Returns:
         ZIP file with results
@@ -266,13 +669,79 @@ async def download_results(
     if not job.output_file or not job.output_file.exists():
         raise HTTPException(status_code=404, detail="Results file not found")
 
-    return FileResponse(
-        path=job.output_file,
+    if members is None and job.output_file.is_file():
+        return FileResponse(
+            path=job.output_file,
+            media_type="application/zip",
+            filename=job.output_file.name,
+        )
+
+    available = await asyncio.to_thread(result_members, job.output_file)
+    selected = list(available) if members is None else [
+        name.strip() for name in members.split(",") if name.strip()
+    ]
+    unknown = [name for name in selected if name not in available]
+    if unknown or not selected:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown members: {', '.join(unknown)}. Available: {', '.join(available)}",
+        )
+
+    # Archives in first-requested order; each member is copied once
+    archives = list(dict.fromkeys(available[name] for name in selected))
+    filename = (
+        job.output_file.name if job.output_file.is_file() else f"{job_id}_results.zip"
+    )
+    return StreamingResponse(
+        iter_zip(archives, selected),
         media_type="application/zip",
-        filename=job.output_file.name,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
 
+@app.post("/api/classify")
+async def classify_events(
+    request: Request,
+    api_key_id: str = Depends(verify_api_key)
+):
+    """Classify events streamed in the request body, without creating a job.
+
+    The body is CSV (Moodle log columns, English or PT-BR) or NDJSON
+    (``Content-Type: application/x-ndjson``). Rows are streamed back in the
+    same format with activity_type, bloom_level and is_active added, as they
+    are classified; the body can be of any size.
+
+    Returns:
+        Streaming response with the enriched rows
+
+    Raises:
+        HTTPException: If the CSV header lacks the columns the rules use
+    """
+    content_type = request.headers.get("content-type")
+    classifier = rulesets.for_api_key(api_key_id).classifier
+    output = classify_stream(request.stream(), content_type, classifier)
+
+    # The CSV header is checked before the response starts
+    try:
+        first = await output.__anext__()
+    except StopAsyncIteration:
+        first = b""
+    except (ValueError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def body():
+        yield first
+        try:
+            async for chunk in output:
+                yield chunk
+        except (ValueError, csv.Error) as e:
+            # Too late for an error status: the response has started
+            logger.warning(f"Classify stream aborted: {e}")
+
+    media_type = "application/x-ndjson" if is_ndjson(content_type) else "text/csv; charset=utf-8"
+    return StreamingResponse(body(), media_type=media_type)
+
+
 # Configuration for cleanup and timeout
 JOB_TIMEOUT_SECONDS = int(os.getenv("JOB_TIMEOUT_SECONDS", "600"))  # 10 minutes
 CLEANUP_INTERVAL_SECONDS = int(os.getenv("CLEANUP_INTERVAL_SECONDS", "3600"))  # 1 hour
@@ -280,29 +749,114 @@ TTL_COMPLETED_HOURS = int(os.getenv("TTL_COMPLETED_HOURS", "24"))  # 24 hours
 TTL_FAILED_HOURS = int(os.getenv("TTL_FAILED_HOURS", "1"))  # 1 hour
 
 
-async def process_job_with_timeout(job_id: str, input_file: str) -> None:
+async def process_job_with_timeout(
+    job_id: str,
+    input_file: str,
+    csv_format: Optional[CSVFormat] = None,
+    ruleset: Optional[str] = None,
+) -> Optional[PipelineResult]:
     """Process job with timeout protection.
 
+    The worker pool enforces the timeout: the worker process running the
+    job is terminated and replaced, and process_job marks the job failed.
+
     Args:
         job_id: Job identifier
         input_file: Path to input CSV
+        csv_format: Format detected at upload time (optional)
+        ruleset: Name of the ruleset to classify with (optional)
+
+    Returns:
+        PipelineResult if the job completed, None otherwise
 
     Timeout: Configurable via JOB_TIMEOUT_SECONDS (default: 600s = 10 min)
     """
     try:
-        await asyncio.wait_for(
-            process_job(job_id, input_file),
-            timeout=float(JOB_TIMEOUT_SECONDS)
-        )
-    except asyncio.TimeoutError:
-        logger.error(f"Job {job_id} timed out after {JOB_TIMEOUT_SECONDS}s")
-        job_manager.mark_failed(
-            job_id,
-            f"Processing timeout ({JOB_TIMEOUT_SECONDS // 60} minutes)"
-        )
+        return await process_job(job_id, input_file, csv_format, ruleset)
     except Exception as e:
         logger.error(f"Job {job_id} failed: {e}", exc_info=True)
         job_manager.mark_failed(job_id, str(e))
+        return None
+
+
+async def process_and_cache(
+    job_id: str,
+    input_file: str,
+    csv_format: Optional[CSVFormat],
+    cache_key: Optional[str],
+    ruleset: Optional[str] = None,
+    content_hash: Optional[str] = None,
+) -> None:
+    """Process a job, then store its results and share them with attached jobs.
+
+    The ruleset may be reloaded between the upload and the moment a worker
+    classifies the job, so the results are stored under the key of the
+    ruleset version the worker actually used, not the one ``cache_key`` was
+    built from.
+
+    Args:
+        job_id: Job identifier
+        input_file: Path to input CSV
+        csv_format: Format detected at upload time (optional)
+        cache_key: Result cache key jobs attached to (None when the cache is disabled)
+        ruleset: Name of the ruleset to classify with (optional)
+        content_hash: SHA-256 of the upload, to key the results on the version used
+    """
+    result = await process_job_with_timeout(job_id, input_file, csv_format, ruleset)
+    if not cache_key:
+        return
+
+    store_key = cache_key
+    if result is not None and result.ruleset_version and content_hash:
+        store_key = result_cache.key(content_hash, result.ruleset_version, result_options())
+        if store_key != cache_key:
+            logger.info(
+                f"Job {job_id}: ruleset {ruleset or 'default'} reloaded during the job, "
+                f"caching results for version {result.ruleset_version}"
+            )
+
+    job = job_manager.get_job(job_id)
+    zip_path = None
+    error = job.error if job else "Job not found"
+    try:
+        if job and job.status == "completed":
+            zip_path = job.output_file  # Shared as-is if caching fails
+            zip_path = await asyncio.to_thread(result_cache.put, store_key, job.output_file)
+    except Exception as e:
+        logger.warning(f"Job {job_id}: Could not cache results: {e}")
+    finally:
+        result_cache.finish(cache_key, zip_path=zip_path, error=error)
+
+
+async def follow_leader(job_id: str, leader_result) -> None:
+    """Complete a job from the results of the identical job it is attached to.
+
+    Args:
+        job_id: Attached job identifier
+        leader_result: Future resolving to the leader's results ZIP
+    """
+    try:
+        cached = await asyncio.wrap_future(leader_result)
+        output_file = await asyncio.to_thread(
+            result_cache.materialize, cached, result_zip_path(job_id)
+        )
+        job_manager.mark_completed(job_id, output_file)
+    except Exception as e:
+        job_manager.mark_failed(job_id, f"Shared processing failed: {e}")
+
+
+async def send_heartbeats() -> None:
+    """Record periodically in the job store that this API process is alive.
+
+    Other API processes drop the queued jobs and in-flight uploads of a
+    process whose heartbeats stop (see PROCESS_TIMEOUT_SECONDS).
+    """
+    while True:
+        try:
+            await asyncio.to_thread(job_manager.store.heartbeat)
+        except Exception as e:
+            logger.error(f"Heartbeat error: {e}")
+        await asyncio.sleep(PROCESS_HEARTBEAT_SECONDS)
 
 
 async def cleanup_old_jobs() -> None:
@@ -310,17 +864,23 @@ async def cleanup_old_jobs() -> None:
 
     Runs every hour (configurable). Cleans up:
     - Completed jobs older than TTL_COMPLETED_HOURS (default: 24h)
-    - Failed jobs older than TTL_FAILED_HOURS (default: 1h)
+    - Failed jobs older than TTL_FAILED_HOURS (default: 1h), including jobs
+      interrupted because their API process stopped
     - Associated files (input and output)
     """
     while True:
         try:
             await asyncio.sleep(CLEANUP_INTERVAL_SECONDS)
 
+            orphaned = await asyncio.to_thread(job_manager.fail_orphaned_jobs)
+            if orphaned:
+                logger.warning(f"Cleanup: Marked {orphaned} interrupted jobs as failed")
+
             now = datetime.now()
             jobs_to_clean = []
 
-            for job_id, job in list(job_manager.jobs.items()):
+            for job in job_manager.list_jobs():
+                job_id = job.job_id
                 if not job.completed_at:
                     continue  # Skip active jobs
 
@@ -345,128 +905,64 @@ async def cleanup_old_jobs() -> None:
             for job_id, reason in jobs_to_clean:
                 logger.info(f"Cleaning up job {job_id}: {reason}")
                 job_manager.cleanup_job(job_id)
-                del job_manager.jobs[job_id]
+                job_manager.delete_job(job_id)
 
             if jobs_to_clean:
                 logger.info(f"Cleanup: Removed {len(jobs_to_clean)} old jobs")
 
+            if result_cache:
+                await asyncio.to_thread(result_cache.evict)
+
         except Exception as e:
             logger.error(f"Cleanup task error: {e}", exc_info=True)
 
 
-async def process_job(job_id: str, input_file: str) -> None:
+async def process_job(
+    job_id: str,
+    input_file: str,
+    csv_format: Optional[CSVFormat] = None,
+    ruleset: Optional[str] = None,
+) -> Optional[PipelineResult]:
     """Process CSV file in background.
 
+    The pipeline runs in the worker pool so the event loop stays responsive
+    while the job is being processed.
+
     Args:
         job_id: Job identifier
         input_file: Path to input CSV file
+        csv_format: Format detected at upload time (optional)
+        ruleset: Name of the ruleset to classify with (optional)
+
+    Returns:
+        PipelineResult if the job completed, None otherwise
     """
     try:
         logger.info(f"Job {job_id}: Starting processing")
+        job_manager.set_status(job_id, "processing")
         job_manager.update_progress(job_id, 10)
 
-        input_path = Path(input_file)
-        if not input_path.exists():
-            raise FileNotFoundError(f"Input file not found: {input_file}")
-
-        # Step 1: Detect CSV format
-        logger.info(f"Job {job_id}: Detecting CSV format")
-        detector = CSVDetector()
-        csv_format = detector.detect(input_file)
-        job_manager.update_progress(job_id, 20)
-
-        # Step 2: Load and detect columns
-        logger.info(f"Job {job_id}: Mapping columns")
-        import pandas as pd
-
-        df = pd.read_csv(
+        result = await worker_pool.run(
+            job_id,
             input_file,
-            encoding=csv_format.encoding,
-            delimiter=csv_format.delimiter,
+            TEMP_DIR,
+            timeout=float(JOB_TIMEOUT_SECONDS),
+            csv_format=csv_format,
+            ruleset=ruleset,
         )
 
-        column_mapper = ColumnMapper()
-        mapped_columns = column_mapper.map_columns(df.columns.tolist())
-
-        # Rename columns to internal schema
-        rename_dict = column_mapper.rename_dataframe_columns(df.columns.tolist(), mapped_columns)
-        df = df.rename(columns=rename_dict)
-        job_manager.update_progress(job_id, 30)
-
-        # Step 3: Detect timestamp format
-        logger.info(f"Job {job_id}: Detecting timestamp format")
-        timestamp_detector = TimestampDetector()
-
-        # Extract timestamp column and detect format
-        timestamps = df['time'].astype(str).tolist()
-        timestamp_format = timestamp_detector.detect_format(timestamps)
-        job_manager.update_progress(job_id, 40)
-
-        # Step 4: Clean data
-        logger.info(f"Job {job_id}: Cleaning data")
-        cleaner = DataCleaner()
-
-        # Convert DataFrame to list of dicts for cleaner
-        events_list = df.to_dict('records')
-        cleaned_events = cleaner.clean(events_list)
-        cleaned_df = pd.DataFrame(cleaned_events)
-        job_manager.update_progress(job_id, 60)
-
-        # Step 5: Apply rules (Bloom's Taxonomy)
-        logger.info(f"Job {job_id}: Enriching with Bloom taxonomy")
-        classifier = BloomClassifier()
-        enriched_df = classifier.apply_rules(cleaned_df)
-        job_manager.update_progress(job_id, 75)
-
-        # Step 6: Export results
-        logger.info(f"Job {job_id}: Exporting results")
-        output_dir = TEMP_DIR / f"{job_id}_output"
-        output_dir.mkdir(exist_ok=True)
-
-        # Convert to list of dicts for exporters
-        events = enriched_df.to_dict("records")
-
-        # Export CSV formats
-        csv_exporter = CSVExporter()
-        csv_exporter.export(events, str(output_dir / "enriched_log.csv"))
-
-        # Export XES if available
-        try:
-            xes_exporter = XESExporter()
-            xes_exporter.export(events, str(output_dir / "enriched_log.xes"))
-        except Exception as e:
-            logger.warning(f"Job {job_id}: XES export skipped: {e}")
-
-        # Export bloom-only versions
-        bloom_only = [e for e in events if e.get("bloom_level") not in [None, "N/A"]]
-        if bloom_only:
-            csv_exporter.export(bloom_only, str(output_dir / "enriched_log_bloom_only.csv"))
-            try:
-                xes_exporter = XESExporter()
-                xes_exporter.export(
-                    bloom_only, str(output_dir / "enriched_log_bloom_only.xes")
-                )
-            except Exception as e:
-                logger.warning(f"Job {job_id}: Bloom XES export skipped: {e}")
-
-        job_manager.update_progress(job_id, 85)
-
-        # Step 7: Create ZIP package
-        logger.info(f"Job {job_id}: Creating ZIP package")
-        zip_filename = (
-            f"results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
-        )
-        zip_path = TEMP_DIR / f"{job_id}_{zip_filename}"
-
-        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-            for file in output_dir.glob("*"):
-                zipf.write(file, arcname=file.name)
-
-        job_manager.update_progress(job_id, 95)
-
         # Mark job as completed
-        job_manager.mark_completed(job_id, zip_path)
+        job_manager.mark_completed(job_id, result.zip_path)
+        metrics.observe_pipeline(result)
         logger.info(f"Job {job_id}: Processing completed successfully")
+        return result
+
+    except JobTimeoutError:
+        logger.error(f"Job {job_id} timed out after {JOB_TIMEOUT_SECONDS}s")
+        job_manager.mark_failed(
+            job_id,
+            f"Processing timeout ({JOB_TIMEOUT_SECONDS // 60} minutes)"
+        )
 
     except Exception as e:
         logger.error(f"Job {job_id}: Processing failed: {str(e)}", exc_info=True)
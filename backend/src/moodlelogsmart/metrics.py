@@ -0,0 +1,155 @@
+"""Prometheus metrics for the API and the processing pipeline.
+
+prometheus_client is optional: without it (or with METRICS_ENABLED=false)
+every metric is a no-op and ``/metrics`` is unavailable.
+
+Pipeline stages run in worker processes, but their durations travel back
+in ``PipelineResult.stage_seconds`` and are observed in the API process.
+When the API itself runs several processes (e.g. ``uvicorn --workers``),
+set PROMETHEUS_MULTIPROC_DIR to an empty directory shared by them so that
+``/metrics`` aggregates all processes.
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Tuple
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+    HAS_PROMETHEUS = True
+except ImportError:
+    HAS_PROMETHEUS = False
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+STAGES = ("detect", "map", "timestamp", "clean", "classify", "export", "zip")
+
+
+class _NoopMetric:
+    """Stands in for a metric when prometheus_client is not available."""
+
+    def labels(self, *args, **kwargs) -> "_NoopMetric":
+        return self
+
+    def inc(self, amount: float = 1) -> None:
+        pass
+
+    def set(self, value: float) -> None:
+        pass
+
+    def observe(self, value: float) -> None:
+        pass
+
+
+def metrics_available() -> bool:
+    """Whether metrics are collected and can be exported."""
+    return HAS_PROMETHEUS and METRICS_ENABLED
+
+
+def _metric(kind: str, name: str, documentation: str, labelnames=(), **kwargs):
+    """Create a metric of the given prometheus_client class, or a no-op."""
+    if not metrics_available():
+        return _NoopMetric()
+    return getattr(prometheus_client, kind)(name, documentation, labelnames, **kwargs)
+
+
+STAGE_SECONDS = _metric(
+    "Histogram",
+    "moodlelogsmart_stage_duration_seconds",
+    "Time spent in each pipeline stage per job",
+    ["stage"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+JOB_ROWS_PER_SECOND = _metric(
+    "Histogram",
+    "moodlelogsmart_job_rows_per_second",
+    "Input rows processed per second of pipeline time, per job",
+    buckets=(100, 1_000, 5_000, 10_000, 25_000, 50_000, 100_000, 250_000, 500_000, 1_000_000),
+)
+ROWS_PROCESSED = _metric(
+    "Counter", "moodlelogsmart_rows_processed_total", "Input rows processed by the pipeline"
+)
+UPLOAD_BYTES = _metric(
+    "Histogram",
+    "moodlelogsmart_upload_size_bytes",
+    "Size of accepted uploads",
+    buckets=(1e4, 1e5, 1e6, 1e7, 5e7, 1e8, 5e8, 1e9),
+)
+JOBS = _metric(
+    "Counter", "moodlelogsmart_jobs_total", "Finished jobs by outcome", ["outcome"]
+)
+QUEUE_DEPTH = _metric(
+    "Gauge", "moodlelogsmart_queue_depth", "Jobs waiting for a slot", multiprocess_mode="livesum"
+)
+ACTIVE_JOBS = _metric(
+    "Gauge", "moodlelogsmart_active_jobs", "Jobs being processed", multiprocess_mode="livesum"
+)
+CACHE_REQUESTS = _metric(
+    "Counter",
+    "moodlelogsmart_result_cache_requests_total",
+    "Result cache lookups by result (hit, miss, join)",
+    ["result"],
+)
+TEMP_DIR_BYTES = _metric(
+    "Gauge",
+    "moodlelogsmart_temp_dir_bytes",
+    "Disk space used by uploads, outputs and cached results",
+    multiprocess_mode="max",
+)
+
+
+# Export every stage from the start, before the first job finishes
+for _stage in STAGES:
+    STAGE_SECONDS.labels(stage=_stage)
+
+
+def observe_pipeline(result) -> None:
+    """Record stage durations and throughput of a finished pipeline run.
+
+    Args:
+        result: PipelineResult of the job
+    """
+    for stage, seconds in result.stage_seconds.items():
+        STAGE_SECONDS.labels(stage=stage).observe(seconds)
+
+    total = sum(result.stage_seconds.values())
+    ROWS_PROCESSED.inc(result.events_in)
+    if total > 0:
+        JOB_ROWS_PER_SECOND.observe(result.events_in / total)
+
+
+def directory_size(path: Path) -> int:
+    """Return the total size in bytes of the files under a directory."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.stat(os.path.join(root, name)).st_size
+            except OSError:
+                pass  # Removed while walking
+    return total
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Serialize all metrics in the Prometheus text format.
+
+    Returns:
+        (body, content type)
+
+    Raises:
+        RuntimeError: If metrics are not available
+    """
+    if not metrics_available():
+        raise RuntimeError("Metrics are disabled or prometheus_client is not installed")
+
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
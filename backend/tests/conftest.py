@@ -1,8 +1,13 @@
 """Pytest configuration and shared fixtures."""
 
+import os
+
 import pytest
 from pathlib import Path
 
+# Keep API tests independent of results cached by earlier runs
+os.environ.setdefault("RESULT_CACHE_ENABLED", "false")
+
 
 @pytest.fixture
 def fixtures_dir():
@@ -33,3 +38,25 @@ def sample_csv_tab_delimited(tmp_path):
     csv_file = tmp_path / "sample_tab.csv"
     csv_file.write_text("Name\tAge\tCity\nJohn\t30\tNYC\nJane\t25\tLA\n", encoding='utf-8')
     return str(csv_file)
+
+
+MOODLE_HEADER = (
+    "Time,User full name,Affected user,Event context,Component,"
+    "Event name,Description,Origin,IP address"
+)
+
+MOODLE_ROWS = [
+    "15/01/24 10:30:45,John Doe,-,Course: Math,File,Course module viewed,User viewed file,web,10.0.0.1",
+    "15/01/24 10:31:00,John Doe,-,Course: Math,Assignment,Submission created,User submitted,web,10.0.0.1",
+    "15/01/24 10:32:10,Jane Roe,-,Course: Math,Forum,Post created,User posted,web,10.0.0.2",
+]
+
+
+@pytest.fixture
+def moodle_csv(tmp_path):
+    """Create a Moodle log export with all required columns."""
+    csv_file = tmp_path / "moodle_log.csv"
+    csv_file.write_text(
+        "\n".join([MOODLE_HEADER] + MOODLE_ROWS) + "\n", encoding="utf-8"
+    )
+    return str(csv_file)
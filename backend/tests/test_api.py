@@ -202,19 +202,22 @@ async def test_job_timeout():
     from unittest.mock import patch
     from moodlelogsmart.main import process_job_with_timeout
     from moodlelogsmart.api.job_manager import get_job_manager
+    from moodlelogsmart.api.worker_pool import JobTimeoutError
 
     job_manager = get_job_manager()
 
     # Create a job
     job_id = job_manager.create_job()
 
-    # Mock process_job to take longer than timeout
-    async def slow_job(job_id, input_file):
-        await asyncio.sleep(5)  # 5 seconds
+    # The worker pool aborts the job when the timeout passes
+    async def slow_run(job_id, input_file, work_dir, timeout=None, **kwargs):
+        assert timeout == 1
+        await asyncio.sleep(0.01)
+        raise JobTimeoutError(f"Job {job_id} exceeded its deadline")
 
     # Set very short timeout for testing (1 second)
     with patch("moodlelogsmart.main.JOB_TIMEOUT_SECONDS", 1):
-        with patch("moodlelogsmart.main.process_job", slow_job):
+        with patch("moodlelogsmart.main.worker_pool.run", slow_run):
             await process_job_with_timeout(job_id, "test.csv")
 
     # Verify job marked as failed with timeout
@@ -224,6 +227,37 @@ async def test_job_timeout():
     assert "timeout" in job.error.lower()
 
 
+@pytest.mark.asyncio
+async def test_process_job_runs_off_event_loop(moodle_csv):
+    """Test pipeline runs in the worker pool without blocking the loop."""
+    import asyncio
+    from moodlelogsmart.main import process_job
+    from moodlelogsmart.api.job_manager import get_job_manager
+
+    job_manager = get_job_manager()
+    job_id = job_manager.create_job()
+
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker_task = asyncio.create_task(ticker())
+    try:
+        await process_job(job_id, moodle_csv)
+    finally:
+        ticker_task.cancel()
+
+    job = job_manager.get_job(job_id)
+    assert job.status == "completed", job.error
+    assert job.output_file.exists()
+    assert ticks > 0
+    assert not Path(moodle_csv).exists(), "Input file must be deleted"
+
+
 def test_cleanup_job_manager():
     """Test JobManager cleanup_job method (Story 2.6)."""
     import tempfile
@@ -379,6 +413,100 @@ def test_csv_validation_rejects_too_many_columns(client):
     assert "Too many columns" in response.json()["detail"]
 
 
+def test_upload_size_limit_enforced_while_streaming(client, moodle_csv):
+    """Test uploads over MAX_FILE_SIZE_MB are rejected with 413."""
+    from unittest.mock import patch
+
+    with patch("moodlelogsmart.main.MAX_FILE_SIZE_MB", 0):
+        with open(moodle_csv, "rb") as f:
+            response = client.post(
+                "/api/upload",
+                files={"file": f},
+                headers={"X-API-Key": TEST_API_KEY}
+            )
+
+    assert response.status_code == 413
+    assert "exceeds" in response.json()["detail"]
+
+
+def test_upload_size_limit_enforced_before_parsing(client):
+    """Test oversized bodies are refused before the form is parsed."""
+    from unittest.mock import AsyncMock, patch
+
+    body = b"a,b\n" + b"1,2\n" * 40000  # Over the 64KB allowed for the form
+    boundary = "limit-test"
+    form = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; "
+        f"filename=\"big.csv\"\r\nContent-Type: text/csv\r\n\r\n"
+    ).encode() + body + f"\r\n--{boundary}--\r\n".encode()
+    headers = {
+        "X-API-Key": TEST_API_KEY,
+        "Content-Type": f"multipart/form-data; boundary={boundary}",
+    }
+
+    def chunked():  # No Content-Length: the stream is cut off instead
+        for start in range(0, len(form), 8192):
+            yield form[start:start + 8192]
+
+    save_upload = AsyncMock()
+    with patch("moodlelogsmart.main.MAX_FILE_SIZE_MB", 0), \
+            patch("moodlelogsmart.main.save_upload", save_upload):
+        declared = client.post("/api/upload", content=form, headers=headers)
+    save_upload.assert_not_awaited()
+
+    with patch("moodlelogsmart.main.MAX_FILE_SIZE_MB", 0):
+        streamed = client.post("/api/upload", content=chunked(), headers=headers)
+
+    for response in (declared, streamed):
+        assert response.status_code == 413
+        assert response.json()["detail"] == "File size exceeds 0MB limit"
+
+
+def test_upload_over_streaming_threshold_accepted(client, moodle_csv, tmp_path):
+    """Test an upload big enough to be streamed passes the default size limit."""
+    from unittest.mock import patch
+    from moodlelogsmart.core.pipeline import runner
+
+    threshold = runner.STREAMING_THRESHOLD_MB * 1024 * 1024
+    content = Path(moodle_csv).read_bytes()
+    header, rows = content.split(b"\n", 1)
+    big_csv = tmp_path / "big.csv"
+    big_csv.write_bytes(header + b"\n" + rows * (threshold // len(rows) + 1))
+    assert big_csv.stat().st_size > threshold
+
+    processed = {}
+
+    async def record_job(job_id, input_file, csv_format, cache_key, ruleset=None, content_hash=None):
+        processed["size"] = Path(input_file).stat().st_size
+        Path(input_file).unlink()
+
+    with patch("moodlelogsmart.main.process_and_cache", record_job):
+        with open(big_csv, "rb") as f:
+            response = client.post(
+                "/api/upload",
+                files={"file": f},
+                headers={"X-API-Key": TEST_API_KEY}
+            )
+
+    assert response.status_code == 200, response.text
+    # The pipeline streams inputs over the threshold
+    assert processed["size"] > threshold
+
+
+def test_stream_validator_rejects_utf8_split_at_end():
+    """Test incremental validation catches a truncated UTF-8 sequence."""
+    from fastapi import HTTPException
+    from moodlelogsmart.api.validators import CSVStreamValidator
+
+    validator = CSVStreamValidator(max_bytes=1024)
+    validator.feed("Nome,Descrição\nJoão,ação".encode("utf-8"))
+    validator.feed("ç".encode("utf-8")[:1])  # Upload ends mid-character
+
+    with pytest.raises(HTTPException) as exc_info:
+        validator.finish()
+    assert "UTF-8" in exc_info.value.detail
+
+
 def test_invalid_job_id_format_status(client):
     """Test invalid job ID returns 400 in status endpoint (Story 2.7)."""
     response = client.get(
@@ -433,3 +561,272 @@ def test_cors_configuration(client):
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
+
+
+# ============================================================================
+# Job scheduling
+# ============================================================================
+
+
+def test_upload_rejected_when_queue_full(client, sample_csv):
+    """Test upload returns 503 with Retry-After when the queue is full."""
+    from unittest.mock import patch
+    from moodlelogsmart.api.scheduler import JobScheduler
+
+    with patch("moodlelogsmart.main.scheduler", JobScheduler(max_concurrent=0, max_queued=0)):
+        with open(sample_csv, "rb") as f:
+            response = client.post(
+                "/api/upload",
+                files={"file": f},
+                headers={"X-API-Key": TEST_API_KEY}
+            )
+
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+
+
+@pytest.mark.asyncio
+async def test_status_reports_queue_position(client):
+    """Test StatusResponse exposes queued status and queue position."""
+    from unittest.mock import patch
+    from moodlelogsmart.api.auth import get_api_key_hash
+    from moodlelogsmart.api.job_manager import get_job_manager
+    from moodlelogsmart.api.scheduler import JobScheduler
+
+    job_manager = get_job_manager()
+    scheduler = JobScheduler(max_concurrent=0, max_queued=5)
+    job_ids = []
+    for _ in range(2):
+        job_id = job_manager.create_job()
+        job_manager.set_owner(job_id, get_api_key_hash(TEST_API_KEY))
+        job_manager.set_status(job_id, "queued")
+        scheduler.admit(job_id, "owner", 100)
+        job_ids.append(job_id)
+
+    with patch("moodlelogsmart.main.scheduler", scheduler):
+        response = client.get(
+            f"/api/status/{job_ids[1]}",
+            headers={"X-API-Key": TEST_API_KEY}
+        )
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "queued"
+    assert response.json()["queue_position"] == 2
+
+
+def test_identical_upload_reuses_cached_result(client, moodle_csv, tmp_path):
+    """Test a re-upload of the same file is served from the result cache."""
+    from unittest.mock import patch
+    from moodlelogsmart.api.result_cache import ResultCache
+
+    cache = ResultCache(cache_dir=str(tmp_path / "cache"))
+    content = Path(moodle_csv).read_bytes()
+
+    with patch("moodlelogsmart.main.result_cache", cache):
+        first = client.post(
+            "/api/upload",
+            files={"file": ("log.csv", content)},
+            headers={"X-API-Key": TEST_API_KEY}
+        ).json()
+        second = client.post(
+            "/api/upload",
+            files={"file": ("log.csv", content)},
+            headers={"X-API-Key": TEST_API_KEY}
+        ).json()
+
+    assert first["status"] == "processing"
+    assert second["status"] == "completed"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    response = client.get(
+        f"/api/download/{second['job_id']}",
+        headers={"X-API-Key": TEST_API_KEY}
+    )
+    assert response.status_code == 200
+    assert response.content[:2] == b"PK"
+
+
+def test_cached_result_not_reused_across_output_settings(client, moodle_csv, tmp_path):
+    """Test export settings are part of the result cache key."""
+    from unittest.mock import patch
+    from moodlelogsmart.api.result_cache import ResultCache
+
+    cache = ResultCache(cache_dir=str(tmp_path / "cache"))
+    content = Path(moodle_csv).read_bytes()
+
+    def upload():
+        return client.post(
+            "/api/upload",
+            files={"file": ("log.csv", content)},
+            headers={"X-API-Key": TEST_API_KEY}
+        ).json()
+
+    with patch("moodlelogsmart.main.result_cache", cache):
+        first = upload()
+        with patch("moodlelogsmart.core.pipeline.runner.EXPORT_FEATHER", True), \
+                patch("moodlelogsmart.core.pipeline.runner.PREBUILD_RESULT_ZIP", False):
+            other_settings = upload()
+        same_settings = upload()
+
+    assert first["status"] == "processing"
+    assert other_settings["status"] == "processing"
+    assert same_settings["status"] == "completed"
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_cached_result_keyed_on_ruleset_version_used(client, moodle_csv, tmp_path):
+    """Test results are cached under the ruleset version the job was classified with."""
+    import dataclasses
+    import hashlib
+    from unittest.mock import patch
+    from moodlelogsmart import main
+    from moodlelogsmart.api.result_cache import ResultCache
+
+    cache = ResultCache(cache_dir=str(tmp_path / "cache"))
+    content = Path(moodle_csv).read_bytes()
+    # Version current at upload time, replaced by a reload before the job runs
+    stale = dataclasses.replace(main.rulesets.get(), version="0" * 16)
+
+    def upload():
+        return client.post(
+            "/api/upload",
+            files={"file": ("log.csv", content)},
+            headers={"X-API-Key": TEST_API_KEY}
+        ).json()
+
+    with patch("moodlelogsmart.main.result_cache", cache):
+        with patch.object(main.rulesets, "for_api_key", return_value=stale):
+            first = upload()
+        second = upload()
+
+    assert first["status"] == "processing"
+    assert second["status"] == "completed"
+    stale_key = cache.key(hashlib.sha256(content).hexdigest(), stale.version, main.result_options())
+    assert cache.get(stale_key) is None
+
+
+def test_download_selected_members_streamed(client, moodle_csv):
+    """Test a ZIP with only the requested members is streamed."""
+    import io
+    import zipfile
+
+    with open(moodle_csv, "rb") as f:
+        job_id = client.post(
+            "/api/upload",
+            files={"file": ("log.csv", f)},
+            headers={"X-API-Key": TEST_API_KEY}
+        ).json()["job_id"]
+
+    response = client.get(
+        f"/api/download/{job_id}?members=enriched_log.csv,enriched_log.xes",
+        headers={"X-API-Key": TEST_API_KEY}
+    )
+    assert response.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(response.content)) as zf:
+        assert zf.testzip() is None
+        assert sorted(zf.namelist()) == ["enriched_log.csv", "enriched_log.xes"]
+
+    response = client.get(
+        f"/api/download/{job_id}?members=missing.csv",
+        headers={"X-API-Key": TEST_API_KEY}
+    )
+    assert response.status_code == 400
+
+
+def test_status_events_stream(client, moodle_csv):
+    """Test the SSE stream reports the finished job and closes."""
+    import json
+
+    with open(moodle_csv, "rb") as f:
+        job_id = client.post(
+            "/api/upload",
+            files={"file": ("log.csv", f)},
+            headers={"X-API-Key": TEST_API_KEY}
+        ).json()["job_id"]
+
+    with client.stream(
+        "GET", f"/api/status/{job_id}/events", headers={"X-API-Key": TEST_API_KEY}
+    ) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        body = "".join(response.iter_text())
+
+    data = json.loads(body.split("data: ", 1)[1].split("\n", 1)[0])
+    assert body.startswith("event: progress\n")
+    assert data["status"] == "completed"
+    assert data["progress"] == 100
+
+
+def test_classify_streams_csv(client):
+    """Test CSV rows come back with their classification."""
+    import csv
+    import io
+
+    body = (
+        "Hora;Nome completo;Componente;Nome do evento\n"
+        "22/08/24, 13:43:23;Ana;Quiz;Quiz attempt submitted\n"
+        "22/08/24, 13:44:00;\"Silva; Ana\";System;Curso visto\n"
+    )
+    response = client.post(
+        "/api/classify",
+        content=body.encode("utf-8"),
+        headers={"X-API-Key": TEST_API_KEY, "Content-Type": "text/csv"},
+    )
+    assert response.status_code == 200
+    rows = list(csv.reader(io.StringIO(response.text), delimiter=";"))
+    assert rows[0][-3:] == ["activity_type", "bloom_level", "is_active"]
+    assert rows[1][-3:] == ["Eval_A", "Apply", "True"]
+    assert rows[2][1] == "Silva; Ana"
+    assert rows[2][-2] == "Remember"
+
+
+def test_classify_streams_ndjson(client):
+    """Test NDJSON objects are enriched and bad lines reported inline."""
+    import json
+
+    body = (
+        '{"component": "Forum", "event_name": "Post created", "id": 1}\n'
+        "not json\n"
+        '{"Component": "File", "Event name": "Course module viewed", "id": 2}'
+    )
+    response = client.post(
+        "/api/classify",
+        content=body.encode("utf-8"),
+        headers={"X-API-Key": TEST_API_KEY, "Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line.get("id") for line in lines] == [1, None, 2]
+    assert lines[1]["line"] == 2
+    assert lines[2]["bloom_level"] == "Remember"
+    assert lines[0]["bloom_level"] == "Create"
+
+
+def test_classify_csv_with_literal_and_bad_quotes(client):
+    """Test literal quotes are classified and malformed rows are a 400."""
+    header = "Time,Component,Event name,Description\n"
+    response = client.post(
+        "/api/classify",
+        content=(header + '1,Forum,Post created,He bought a 5" screen\n2,Quiz,x,ok\n').encode(),
+        headers={"X-API-Key": TEST_API_KEY, "Content-Type": "text/csv"},
+    )
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == 3
+
+    response = client.post(
+        "/api/classify",
+        content=(header + "1,Forum,Post\rcreated,ok\n").encode(),
+        headers={"X-API-Key": TEST_API_KEY, "Content-Type": "text/csv"},
+    )
+    assert response.status_code == 400
+    assert "CSV inválido" in response.json()["detail"]
+
+
+def test_classify_rejects_csv_without_rule_columns(client):
+    """Test a CSV header without the columns the rules use is a 400."""
+    response = client.post(
+        "/api/classify",
+        content=b"Foo,Bar\n1,2\n",
+        headers={"X-API-Key": TEST_API_KEY, "Content-Type": "text/csv"},
+    )
+    assert response.status_code == 400
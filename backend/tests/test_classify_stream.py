@@ -0,0 +1,82 @@
+"""Tests for streaming classification of request bodies."""
+
+import asyncio
+import csv
+import io
+
+import pytest
+
+from moodlelogsmart.api.classify_stream import RecordSplitter, body_encoding, classify_stream
+
+
+def _run(chunks, content_type="text/csv"):
+    async def body():
+        for chunk in chunks:
+            yield chunk
+
+    async def collect():
+        return b"".join([out async for out in classify_stream(body(), content_type)])
+
+    return asyncio.run(collect()).decode("utf-8")
+
+
+class TestRecordSplitter:
+    """Tests for RecordSplitter."""
+
+    def test_quoted_newline_across_pieces(self):
+        """Test a newline inside quotes does not end the record."""
+        splitter = RecordSplitter(quoted=True)
+        assert splitter.feed('a,"line one\n') == []
+        assert splitter.feed('line ""two""",b\r\nc,d') == ['a,"line one\nline ""two""",b']
+        assert splitter.close() == ["c,d"]
+
+    def test_quote_inside_unquoted_field_is_literal(self):
+        """Test a quote that does not start a field does not join records."""
+        splitter = RecordSplitter(quoted=True)
+        body = 'Time,User,Description\n1,a,He bought a 5" screen\n2,b,ok\n3,c,"x, ""y"""\n'
+
+        assert splitter.feed(body) == [
+            "Time,User,Description", '1,a,He bought a 5" screen', "2,b,ok", '3,c,"x, ""y"""',
+        ]
+        assert splitter.close() == []
+
+    def test_record_size_is_bounded(self):
+        """Test an unterminated record is rejected instead of buffered."""
+        splitter = RecordSplitter(quoted=True, max_record_bytes=100)
+        with pytest.raises(ValueError):
+            splitter.feed('"' + "x" * 200)
+
+
+class TestClassifyStream:
+    """Tests for classify_stream()."""
+
+    def test_csv_split_mid_row_and_mid_character(self):
+        """Test rows and UTF-8 characters split across chunks are rebuilt."""
+        body = (
+            "﻿Time,User full name,Component,Event name\n"
+            '2024-01-15 10:30:45,"João\nSilva",File,Course module viewed\n'
+            "2024-01-15 10:31:00,Ana,Forum,Post created\n"
+        ).encode("utf-8")
+        chunks = [body[i:i + 7] for i in range(0, len(body), 7)]
+
+        rows = list(csv.reader(io.StringIO(_run(chunks))))
+
+        assert rows[0] == [
+            "Time", "User full name", "Component", "Event name",
+            "activity_type", "bloom_level", "is_active",
+        ]
+        assert rows[1][1] == "João\nSilva"
+        assert rows[1][-2:] == ["Remember", "False"]
+        assert rows[2][-2:] == ["Create", "True"]
+
+    def test_empty_csv_body(self):
+        """Test an empty body is an error."""
+        with pytest.raises(ValueError):
+            _run([])
+
+    def test_charset_from_content_type(self):
+        """Test a declared charset is used and an unknown one rejected."""
+        assert body_encoding("text/csv; charset=ISO-8859-1") == "ISO-8859-1"
+        assert body_encoding("text/csv") == "utf-8-sig"
+        with pytest.raises(ValueError):
+            body_encoding("text/csv; charset=klingon")
@@ -0,0 +1,76 @@
+"""Tests for the batch processing command line."""
+
+import zipfile
+
+import pytest
+
+from moodlelogsmart.cli import expand_inputs, main, output_names
+
+from conftest import MOODLE_HEADER, MOODLE_ROWS
+
+
+def _write_log(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("\n".join([MOODLE_HEADER] + MOODLE_ROWS) + "\n", encoding="utf-8")
+    return path
+
+
+class TestExpandInputs:
+    """Tests for input resolution."""
+
+    def test_files_globs_and_directories(self, tmp_path):
+        """Test each kind of input is expanded once, in order."""
+        a = _write_log(tmp_path / "a.csv")
+        b = _write_log(tmp_path / "course" / "b.csv")
+        (tmp_path / "course" / "notes.md").write_text("not a log")
+
+        files = expand_inputs([str(a), str(tmp_path / "course"), str(tmp_path / "*.csv")])
+
+        assert files == [a, b]
+
+    def test_unmatched_pattern(self, tmp_path):
+        """Test a pattern matching nothing is an error."""
+        with pytest.raises(FileNotFoundError):
+            expand_inputs([str(tmp_path / "*.csv")])
+
+    def test_output_names_are_distinct(self, tmp_path):
+        """Test inputs with the same name get distinct outputs."""
+        files = [tmp_path / "a" / "log.csv", tmp_path / "b" / "log.csv"]
+        assert list(output_names(files).values()) == ["log", "log_2"]
+
+
+class TestMain:
+    """Tests for main()."""
+
+    def test_writes_results_per_input(self, tmp_path, capsys):
+        """Test every input gets its results ZIP and a summary line."""
+        _write_log(tmp_path / "in" / "math.csv")
+        _write_log(tmp_path / "in" / "physics.csv")
+        out = tmp_path / "out"
+
+        status = main([str(tmp_path / "in"), "-o", str(out), "--workers", "0"])
+
+        assert status == 0
+        assert sorted(p.name for p in out.iterdir()) == [
+            "math_results.zip",
+            "physics_results.zip",
+        ]
+        with zipfile.ZipFile(out / "math_results.zip") as zf:
+            assert "enriched_log.csv" in zf.namelist()
+        assert "2/2 files processed" in capsys.readouterr().out
+
+    def test_failed_file_is_reported(self, tmp_path, capsys):
+        """Test a bad input fails alone and sets the exit status."""
+        good = _write_log(tmp_path / "good.csv")
+        bad = tmp_path / "bad.csv"
+        bad.write_text("Foo,Bar\n1,2\n", encoding="utf-8")
+
+        status = main(
+            [str(good), str(bad), "-o", str(tmp_path / "out"), "-w", "0", "--streaming", "--no-zip"]
+        )
+
+        assert status == 1
+        assert (tmp_path / "out" / "good_results" / "enriched_log.csv.part.zip").exists()
+        output = capsys.readouterr().out
+        assert "1/2 files processed" in output
+        assert "FAILED" in output
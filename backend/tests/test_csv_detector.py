@@ -0,0 +1,130 @@
+"""Tests for CSVDetector format detection."""
+
+import csv
+
+import pytest
+
+from moodlelogsmart.core.auto_detect.csv_detector import CSVDetector
+
+
+def _csv_records(path, encoding="utf-8", delimiter=","):
+    """Reference record count using csv.reader."""
+    with open(path, "r", encoding=encoding, newline="") as f:
+        return sum(1 for _ in csv.reader(f, delimiter=delimiter))
+
+
+class TestCSVDetector:
+    """Tests for CSVDetector.detect()."""
+
+    def test_detects_utf8_comma(self, sample_csv_utf8):
+        """Test comma-delimited file with ASCII-only content."""
+        fmt = CSVDetector().detect(sample_csv_utf8)
+
+        assert fmt.encoding == "ascii"
+        assert fmt.delimiter == ","
+        assert fmt.has_header is True
+        assert fmt.line_count == 3
+
+    def test_detects_tab_delimiter(self, sample_csv_tab_delimited):
+        """Test tab-delimited file."""
+        fmt = CSVDetector().detect(sample_csv_tab_delimited)
+
+        assert fmt.delimiter == "\t"
+        assert fmt.line_count == 3
+
+    def test_quoted_newlines_are_not_records(self, tmp_path):
+        """Test newlines inside quoted fields do not count as records."""
+        path = tmp_path / "quoted.csv"
+        path.write_text(
+            'Time,Description\n'
+            '1,"multi\nline ""quoted"" text"\n'
+            '2,"plain"\n'
+            '3,no trailing newline',
+            encoding="utf-8",
+        )
+
+        fmt = CSVDetector().detect(str(path))
+
+        assert fmt.line_count == _csv_records(path) == 4
+
+    def test_quoted_fields_across_scan_blocks(self, tmp_path, monkeypatch):
+        """Test quote state carries over block boundaries."""
+        monkeypatch.setattr(CSVDetector, "SCAN_BLOCK_SIZE", 64)
+
+        path = tmp_path / "blocks.csv"
+        lines = ["id,description"] + [f'{i},"row ""{i}""\nsecond line, {i}"' for i in range(50)]
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+        fmt = CSVDetector().detect(str(path))
+
+        assert fmt.line_count == _csv_records(path) == 51
+
+    def test_row_offsets_are_record_starts(self, tmp_path, monkeypatch):
+        """Test every stride-th record start is recorded, skipping quoted newlines."""
+        monkeypatch.setattr(CSVDetector, "SCAN_BLOCK_SIZE", 64)
+        monkeypatch.setattr(CSVDetector, "OFFSET_STRIDE", 4)
+
+        path = tmp_path / "offsets.csv"
+        lines = ["id,description"] + [f'{i},"row {i}\nsecond line"' for i in range(18)]
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+        fmt = CSVDetector().detect(str(path))
+
+        data = path.read_bytes()
+        assert fmt.offset_stride == 4
+        assert [data[o:].split(b",", 1)[0] for o in fmt.row_offsets] == [
+            b"0", b"4", b"8", b"12", b"16"
+        ]
+
+    def test_no_row_offsets_without_scan(self, tmp_path):
+        """Test files counted with csv.reader carry no offsets."""
+        path = tmp_path / "unpaired.csv"
+        path.write_text('id,text\n1,"open\n2,b\n', encoding="utf-8")
+
+        fmt = CSVDetector().detect(str(path))
+
+        assert fmt.row_offsets == [] and fmt.offset_stride == 0
+
+    @pytest.mark.parametrize("body", [
+        '1,a,He bought a 5" screen\n2,b,ok\n3,c,ok\n',
+        '1,a,5" screen\n2,b,7" tablet\n3,c,ok\n',
+        '1,a, "spaced"\n2,b,ok\n3,c,ok\n',
+    ])
+    def test_quotes_inside_unquoted_fields_are_literal(self, tmp_path, body):
+        """Test quotes not at the start of a field do not join records."""
+        path = tmp_path / "stray.csv"
+        path.write_text("Time,User,Description\n" + body, encoding="utf-8")
+
+        fmt = CSVDetector().detect(str(path))
+
+        assert fmt.line_count == _csv_records(path) == 4
+
+    def test_non_ascii_beyond_samples(self, tmp_path, monkeypatch):
+        """Test non-ASCII text missed by the samples still sets the encoding."""
+        monkeypatch.setattr(CSVDetector, "SAMPLE_SIZE", 200)
+
+        path = tmp_path / "late.csv"
+        rows = [f"{i},aluno,Curso visto" for i in range(200)]
+        rows[60] = "60,João Conceição,Módulo do curso visualizado"
+        path.write_text("\n".join(["Hora,Nome,Evento"] + rows) + "\n", encoding="utf-8")
+
+        fmt = CSVDetector().detect(str(path))
+
+        assert fmt.encoding == "utf-8"
+        assert fmt.line_count == 201
+
+    def test_header_only_is_rejected(self, tmp_path):
+        """Test a file without data rows is invalid."""
+        path = tmp_path / "header.csv"
+        path.write_text("a,b,c\n", encoding="utf-8")
+
+        with pytest.raises(ValueError):
+            CSVDetector().detect(str(path))
+
+    def test_empty_file_is_rejected(self, tmp_path):
+        """Test an empty file is invalid."""
+        path = tmp_path / "empty.csv"
+        path.write_bytes(b"")
+
+        with pytest.raises(ValueError):
+            CSVDetector().detect(str(path))
@@ -0,0 +1,65 @@
+"""Tests for DataCleaner and its filters."""
+
+import numpy as np
+import pandas as pd
+
+from moodlelogsmart.core.clean.data_cleaner import DataCleaner, EventFilter
+
+
+def _events():
+    return pd.DataFrame({
+        "time": pd.to_datetime(
+            ["2024-01-15 10:00", "2024-01-15 10:01", None, "2024-01-15 10:03", "2024-01-15 10:04"]
+        ),
+        "event_name": [
+            "Course viewed", "Course updated", "Post created", None, "Course backup created",
+        ],
+        "component": ["System", "System", "Forum", "Quiz", "System"],
+    }, index=[10, 11, 12, 13, 14])
+
+
+class TestDataCleaner:
+    """Tests for DataCleaner."""
+
+    def test_clean_frame_matches_list_cleaning(self):
+        """Test the DataFrame path keeps the same events as the list path."""
+        df = _events()
+        # The list path only drops a missing time when it is None
+        records = [
+            {**event, "time": None if pd.isna(event["time"]) else event["time"]}
+            for event in df.to_dict("records")
+        ]
+
+        cleaned = DataCleaner().clean_frame(df)
+
+        expected = pd.DataFrame(DataCleaner().clean(records))
+        pd.testing.assert_frame_equal(cleaned, expected)
+        assert cleaned["component"].tolist() == ["System", "Quiz"]
+        assert cleaned.index.tolist() == [0, 1]
+
+    def test_clean_frame_without_time_column(self):
+        """Test events without a time column are all dropped, as in clean()."""
+        df = pd.DataFrame({"event_name": ["Course viewed"]})
+
+        assert len(DataCleaner().clean_frame(df)) == 0
+        assert DataCleaner().clean([{"event_name": "Course viewed"}]) == []
+
+
+class TestEventFilter:
+    """Tests for EventFilter."""
+
+    def test_filters_agree_on_missing_and_unhashable_values(self):
+        """Test NaN, None and unhashable event names are kept by both paths."""
+        event_filter = EventFilter(["Course updated"])
+        events = [
+            {"event_name": "Course updated"},
+            {"event_name": np.nan},
+            {"event_name": None},
+            {"event_name": ["Course updated"]},
+            {"component": "Forum"},
+        ]
+
+        assert event_filter.filter(events) == events[1:]
+        frame = event_filter.filter_frame(pd.DataFrame({"event_name": ["Course updated", None]}))
+        assert frame.index.tolist() == [1]
+        assert event_filter.filter_frame(pd.DataFrame({"component": ["Forum"]})).shape == (1, 1)
@@ -0,0 +1,255 @@
+"""Tests for the CSV, Parquet and XES exporters."""
+
+import csv
+import gzip
+import xml.etree.ElementTree as ET
+
+import pandas as pd
+import pytest
+
+from moodlelogsmart.core.export import exporter
+from moodlelogsmart.core.export.exporter import (
+    CSVExporter,
+    CSVStreamWriter,
+    ParquetExporter,
+    ParquetStreamWriter,
+    XESExporter,
+    XESSpillWriter,
+)
+
+
+def _tricky_frame():
+    """Events whose text fields need RFC 4180 quoting."""
+    return pd.DataFrame({
+        "userid": [1, 2, 3],
+        "time": pd.to_datetime(["2025-01-15 10:00:00", "2025-01-15 10:05:00", None]),
+        "description": ['Said "hi", then left', "line one\nline two", None],
+        "is_active": [True, False, True],
+    })
+
+
+def _read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+@pytest.fixture(params=["arrow", "pandas"])
+def writer_backend(request, monkeypatch):
+    """Run each test with the pyarrow fast path and with the pandas fallback."""
+    if request.param == "arrow" and not exporter.HAS_PYARROW:
+        pytest.skip("pyarrow not installed")
+    if request.param == "pandas":
+        monkeypatch.setattr(exporter, "HAS_PYARROW", False)
+    return request.param
+
+
+class TestCSVStreamWriter:
+    """Tests for CSVStreamWriter and CSVExporter.export_frame()."""
+
+    def test_quoting_round_trips(self, tmp_path, writer_backend):
+        """Test commas, quotes and newlines survive a csv.reader round trip."""
+        path = tmp_path / "out.csv"
+        CSVExporter().export_frame(_tricky_frame(), str(path))
+
+        rows = _read_rows(path)
+        assert [r["description"] for r in rows] == [
+            'Said "hi", then left', "line one\nline two", ""
+        ]
+        assert [r["is_active"] for r in rows] == ["True", "False", "True"]
+        assert rows[0]["time"] == "2025-01-15 10:00:00"
+        assert rows[2]["time"] == ""
+
+    def test_append_writes_header_once(self, tmp_path, writer_backend):
+        """Test appending reuses the existing header and column order."""
+        path = tmp_path / "out.csv"
+        df = _tricky_frame()
+        CSVExporter().export_frame(df, str(path))
+        CSVExporter().export_frame(df[["is_active", "userid", "description", "time"]],
+                                   str(path), append=True)
+
+        rows = _read_rows(path)
+        assert len(rows) == 6
+        assert list(rows[0].keys()) == ["userid", "time", "description", "is_active"]
+        assert [r["userid"] for r in rows] == ["1", "2", "3"] * 2
+
+    def test_list_of_dicts_adapter(self, tmp_path, writer_backend):
+        """Test export() still accepts a list of event dicts."""
+        path = tmp_path / "out.csv"
+        events = [{"userid": 1, "event_name": "Course viewed"}]
+        CSVExporter().export(events, str(path))
+
+        assert _read_rows(path) == [{"userid": "1", "event_name": "Course viewed"}]
+
+    @pytest.mark.skipif(not exporter.HAS_PYARROW, reason="pyarrow not installed")
+    def test_arrow_output_matches_pandas(self, tmp_path, monkeypatch):
+        """Test the pyarrow path writes the same bytes as pandas to_csv."""
+        df = _tricky_frame().assign(
+            empty=["", "x\ry", " padded "],
+            score=[1.0, 0.1, None],
+            level=pd.Categorical(["Apply", "Apply, Analyze", None]),
+            day=pd.to_datetime(["2025-01-15", "2025-01-16", None]),
+            mixed=[1, "a", None],
+        ).rename(columns={"description": 'description, "full"'})
+        assert CSVStreamWriter._render_arrow(df) is not None
+
+        arrow_path, pandas_path = tmp_path / "arrow.csv", tmp_path / "pandas.csv"
+        with CSVStreamWriter(str(arrow_path)) as writer:
+            writer.write(df)
+            writer.write(df)
+        monkeypatch.setattr(exporter, "HAS_PYARROW", False)
+        with CSVStreamWriter(str(pandas_path)) as writer:
+            writer.write(df)
+            writer.write(df)
+
+        assert arrow_path.read_bytes() == pandas_path.read_bytes()
+
+    def test_chunks_counted(self, tmp_path, writer_backend):
+        """Test rows_written accumulates over several writes."""
+        with CSVStreamWriter(str(tmp_path / "out.csv")) as writer:
+            writer.write(_tricky_frame())
+            writer.write(_tricky_frame())
+
+        assert writer.rows_written == 6
+        assert len(_read_rows(tmp_path / "out.csv")) == 6
+
+
+def _xes_frame():
+    """Two users with out-of-order events and XML special characters."""
+    return pd.DataFrame({
+        "user_full_name": ["Ana <A&B>", "Bruno", "Ana <A&B>", None],
+        "time": pd.to_datetime([
+            "2025-01-15 10:05:00", "2025-01-15 09:00:00", "2025-01-15 10:00:00", None
+        ]),
+        "event_name": ["Quiz attempt submitted", "Course viewed", "Course viewed", "x"],
+        "activity_type": ["Assess", 'Say "hi"', "Study", None],
+        "component": ["Quiz", "System", "System", None],
+        "bloom_level": ["Evaluate", "N/A", "Remember", "N/A"],
+    })
+
+
+def _read_traces(path):
+    """Parse an XES file into {trace name: [(event name, timestamp), ...]}."""
+    root = ET.parse(path).getroot()
+    traces = {}
+    for trace in root.findall("trace"):
+        name = trace.find("string[@key='concept:name']").get("value")
+        traces[name] = [
+            (
+                event.find("string[@key='concept:name']").get("value"),
+                getattr(event.find("date[@key='time:timestamp']"), "attrib", {}).get("value"),
+            )
+            for event in trace.findall("event")
+        ]
+    return traces
+
+
+class TestXESExporter:
+    """Tests for the streaming XES writer."""
+
+    def test_traces_grouped_and_time_ordered(self, tmp_path):
+        """Test one trace per user, events sorted by time, text escaped."""
+        path = tmp_path / "log.xes"
+        trace_count = XESExporter().export_frame(_xes_frame(), str(path))
+
+        assert trace_count == 3
+        assert _read_traces(path) == {
+            "Ana <A&B>": [
+                ("Study", "2025-01-15T10:00:00.000+00:00"),
+                ("Assess", "2025-01-15T10:05:00.000+00:00"),
+            ],
+            "Bruno": [('Say "hi"', "2025-01-15T09:00:00.000+00:00")],
+            "Unknown": [("x", None)],
+        }
+
+    def test_gzip_output(self, tmp_path):
+        """Test .gz paths are compressed and decompress to the plain file."""
+        XESExporter().export_frame(_xes_frame(), str(tmp_path / "log.xes"))
+        XESExporter().export_frame(_xes_frame(), str(tmp_path / "log.xes.gz"))
+
+        with gzip.open(tmp_path / "log.xes.gz", "rb") as f:
+            assert f.read() == (tmp_path / "log.xes").read_bytes()
+
+    def test_parallel_blocks_match_serial(self, tmp_path):
+        """Test blocks serialized in worker processes give the same file."""
+        df = pd.concat([_xes_frame()] * 5, ignore_index=True)
+        df["user_full_name"] = [f"user{i % 7}" for i in range(len(df))]
+
+        XESExporter().export_frame(df, str(tmp_path / "serial.xes"))
+        XESExporter(workers=2, block_events=3).export_frame(df, str(tmp_path / "parallel.xes"))
+
+        assert (tmp_path / "parallel.xes").read_bytes() == (tmp_path / "serial.xes").read_bytes()
+
+    def test_spilled_chunks_match_single_export(self, tmp_path):
+        """Test chunks spilled to several partitions give the same file."""
+        df = pd.concat([_xes_frame()] * 5, ignore_index=True)
+        df["user_full_name"] = [f"user{(i * 3) % 7}" for i in range(len(df))]
+        df.loc[4, "time"] = pd.NaT
+
+        XESExporter().export_frame(df, str(tmp_path / "whole.xes"))
+        with XESSpillWriter(tmp_path / "spill", partitions=3) as spill:
+            for start in range(0, len(df), 6):
+                spill.write(df.iloc[start:start + 6])
+            assert len(list((tmp_path / "spill").glob("*.pkl"))) == 3
+            trace_count = spill.write_to(str(tmp_path / "spilled.xes"))
+
+        assert trace_count == 7
+        assert (tmp_path / "spilled.xes").read_bytes() == (tmp_path / "whole.xes").read_bytes()
+        assert not (tmp_path / "spill").exists()
+
+    def test_empty_frame_rejected(self, tmp_path):
+        """Test exporting no events raises ValueError."""
+        with pytest.raises(ValueError):
+            XESExporter().export_frame(pd.DataFrame(), str(tmp_path / "log.xes"))
+
+
+@pytest.mark.skipif(not exporter.HAS_PYARROW, reason="pyarrow not installed")
+class TestParquetExporter:
+    """Tests for Parquet / Feather export."""
+
+    def test_schema_and_round_trip(self, tmp_path):
+        """Test dtypes survive: timestamp time, bool is_active, dictionary strings."""
+        import pyarrow.parquet as pq
+
+        df = _tricky_frame()
+        written = ParquetExporter(feather=True).export_frame(df, str(tmp_path / "log.parquet"))
+
+        assert [p.name for p in written] == ["log.parquet", "log.feather"]
+        schema = pq.read_schema(tmp_path / "log.parquet")
+        assert str(schema.field("time").type) == "timestamp[ns]"
+        assert str(schema.field("is_active").type) == "bool"
+        assert str(schema.field("description").type) == "dictionary<values=string, indices=int32, ordered=0>"
+
+        for path in written:
+            loaded = pd.read_parquet(path) if path.suffix == ".parquet" else pd.read_feather(path)
+            assert loaded["time"].dtype == "datetime64[ns]"
+            assert loaded["is_active"].tolist() == [True, False, True]
+            assert loaded["description"].tolist()[:2] == df["description"].tolist()[:2]
+
+    def test_subset_filtered_from_same_table(self, tmp_path):
+        """Test subsets are written as separate files and empty ones skipped."""
+        df = _tricky_frame()
+        mask = df["is_active"]
+        written = ParquetExporter().export_frame(
+            df,
+            str(tmp_path / "log.parquet"),
+            subsets={
+                str(tmp_path / "active.parquet"): mask,
+                str(tmp_path / "none.parquet"): mask & False,
+            },
+        )
+
+        assert [p.name for p in written] == ["log.parquet", "active.parquet"]
+        assert pd.read_parquet(tmp_path / "active.parquet")["userid"].tolist() == ["1", "3"]
+
+    def test_stream_writer_matches_single_write(self, tmp_path):
+        """Test chunked writes produce the same data as one export."""
+        df = pd.concat([_tricky_frame()] * 3, ignore_index=True)
+        ParquetExporter().export_frame(df, str(tmp_path / "whole.parquet"))
+
+        with ParquetStreamWriter(str(tmp_path / "chunked.parquet")) as writer:
+            for start in range(0, len(df), 2):
+                writer.write(df.iloc[start:start + 2])
+
+        pd.testing.assert_frame_equal(
+            pd.read_parquet(tmp_path / "chunked.parquet"), pd.read_parquet(tmp_path / "whole.parquet")
+        )
@@ -0,0 +1,187 @@
+"""Tests for job storage backends."""
+
+import sqlite3
+import threading
+from pathlib import Path
+
+import pytest
+
+from moodlelogsmart.api.job_manager import JobManager
+from moodlelogsmart.api.job_store import (
+    InMemoryJobStore,
+    JobStore,
+    SQLiteJobStore,
+    create_job_store,
+)
+
+
+class OtherProcessStore(SQLiteJobStore):
+    """SQLite store seen as another API process."""
+
+    process_id = "other-host:1:0"
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def manager(request, tmp_path):
+    """JobManager on each store backend."""
+    return JobManager(store=create_job_store(request.param, str(tmp_path / "jobs.db")))
+
+
+class TestJobManagerBackends:
+    """JobManager behaves the same on every backend."""
+
+    def test_job_lifecycle(self, manager, tmp_path):
+        """Test create, owner, input file, progress and completion round trip."""
+        job_id = manager.create_job()
+        manager.set_owner(job_id, "owner-a")
+        manager.set_input_file(job_id, tmp_path / "in.csv")
+        manager.update_progress(job_id, 40)
+
+        job = manager.get_job(job_id)
+        assert job.status == "processing"
+        assert job.progress == 40
+        assert job.input_file == tmp_path / "in.csv"
+        assert manager.verify_ownership(job_id, "owner-a")
+        assert not manager.verify_ownership(job_id, "owner-b")
+
+        manager.mark_completed(job_id, tmp_path / "out.zip")
+        manager.update_progress(job_id, 60)  # Late message from a worker
+
+        job = manager.get_job(job_id)
+        assert job.status == "completed"
+        assert job.progress == 100
+        assert job.output_file == tmp_path / "out.zip"
+        assert job.completed_at is not None
+
+    def test_progress_details_stored(self, manager):
+        """Test stage and row counts are stored for streams of other processes."""
+        job_id = manager.create_job()
+        manager.set_status(job_id, "processing")
+        manager.update_progress(job_id, 55, "classify", rows_processed=1000, total_rows=3000)
+
+        job = manager.get_job(job_id)
+        assert (job.stage, job.rows_processed, job.total_rows) == ("classify", 1000, 3000)
+        assert job.started_at is not None
+        assert job.process_id == manager.store.process_id
+
+    def test_list_and_delete(self, manager):
+        """Test filtering by owner/status and deleting records."""
+        a = manager.create_job()
+        b = manager.create_job()
+        manager.set_owner(a, "owner-a")
+        manager.set_owner(b, "owner-b")
+        manager.mark_failed(b, "boom")
+
+        assert [j.job_id for j in manager.list_jobs(owner="owner-a")] == [a]
+        assert [j.job_id for j in manager.list_jobs(status="failed")] == [b]
+        assert manager.get_job(b).error == "boom"
+
+        manager.delete_job(a)
+        assert manager.get_job(a) is None
+        assert manager.get_job("missing") is None
+
+
+class TestSQLiteJobStore:
+    """SQLite-specific behaviour."""
+
+    def test_shared_between_instances(self, tmp_path):
+        """Test jobs written by one store are visible to another (other process)."""
+        db_path = str(tmp_path / "jobs.db")
+        first = JobManager(store=SQLiteJobStore(db_path))
+        second = JobManager(store=SQLiteJobStore(db_path))
+
+        job_id = first.create_job()
+        first.mark_completed(job_id, Path("/tmp/out.zip"))
+
+        assert second.get_job(job_id).status == "completed"
+        journal_mode = sqlite3.connect(db_path).execute("PRAGMA journal_mode").fetchone()[0]
+        assert journal_mode == "wal"
+
+    def test_missing_columns_added(self, tmp_path):
+        """Test a database from an older schema gains new Job fields."""
+        db_path = tmp_path / "jobs.db"
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE jobs (job_id TEXT PRIMARY KEY, status, progress)")
+        conn.execute("INSERT INTO jobs VALUES ('old', 'completed', 100)")
+        conn.commit()
+        conn.close()
+
+        store = SQLiteJobStore(str(db_path))
+        job = store.get("old")
+
+        assert job.status == "completed"
+        assert job.owner is None
+        store.update("old", owner="owner-a")
+        assert store.get("old").owner == "owner-a"
+
+    def test_stopped_process_not_live(self, tmp_path):
+        """Test a process whose heartbeats stopped is no longer live."""
+        db_path = str(tmp_path / "jobs.db")
+        store = SQLiteJobStore(db_path)
+        other = OtherProcessStore(db_path)
+
+        assert store.live_processes() == {store.process_id, other.process_id}
+        store.connection().execute(
+            "UPDATE api_processes SET heartbeat = 0 WHERE process_id = ?", (other.process_id,)
+        )
+        assert store.live_processes() == {store.process_id}
+
+    def test_jobs_of_stopped_process_failed(self, tmp_path):
+        """Test jobs left unfinished by a stopped API process are failed on startup."""
+        db_path = str(tmp_path / "jobs.db")
+        previous = JobManager(store=OtherProcessStore(db_path))
+        input_file = tmp_path / "in.csv"
+        input_file.write_text("x")
+        running = previous.create_job()
+        previous.set_input_file(running, input_file)
+        queued = previous.create_job()
+        previous.set_status(queued, "queued")
+        done = previous.create_job()
+        previous.mark_completed(done)
+
+        manager = JobManager(store=SQLiteJobStore(db_path))
+        assert manager.fail_orphaned_jobs() == 0  # Its heartbeat is still recent
+
+        manager.store.connection().execute("UPDATE api_processes SET heartbeat = 0")
+        assert manager.fail_orphaned_jobs() == 2
+        for job_id in (running, queued):
+            job = manager.get_job(job_id)
+            assert job.status == "failed"
+            assert job.completed_at is not None  # Aged out by cleanup
+        assert manager.get_job(done).status == "completed"
+        assert not input_file.exists()
+
+    def test_threads_use_own_connections(self, tmp_path):
+        """Test concurrent progress updates from several threads."""
+        manager = JobManager(store=SQLiteJobStore(str(tmp_path / "jobs.db")))
+        job_ids = [manager.create_job() for _ in range(4)]
+
+        def work(job_id):
+            for progress in range(0, 101, 5):
+                manager.update_progress(job_id, progress)
+
+        threads = [threading.Thread(target=work, args=(job_id,)) for job_id in job_ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert [manager.get_job(job_id).progress for job_id in job_ids] == [100] * 4
+
+
+def test_unknown_backend_rejected():
+    """Test an unknown JOB_STORE value raises ValueError."""
+    with pytest.raises(ValueError):
+        create_job_store("redis")
+    assert isinstance(create_job_store("memory"), InMemoryJobStore)
+
+
+def test_incomplete_backend_rejected():
+    """Test a backend missing part of the JobStore interface cannot be created."""
+
+    class PartialStore(JobStore):
+        def add(self, job) -> None:
+            pass
+
+    with pytest.raises(TypeError):
+        PartialStore()
@@ -0,0 +1,45 @@
+"""Tests for Prometheus metrics."""
+
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from moodlelogsmart import metrics
+from moodlelogsmart.core.pipeline import PipelineResult
+from moodlelogsmart.main import app
+
+
+def test_observe_pipeline_accepts_results():
+    """Test recording a result works with or without prometheus_client."""
+    result = PipelineResult(
+        zip_path=Path("results.zip"),
+        events_in=1000,
+        events_out=990,
+        stage_seconds={"map": 0.5, "classify": 1.5},
+    )
+    metrics.observe_pipeline(result)
+
+
+def test_directory_size(tmp_path):
+    """Test file sizes are summed recursively."""
+    (tmp_path / "a").write_bytes(b"x" * 10)
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b").write_bytes(b"x" * 5)
+    assert metrics.directory_size(tmp_path) == 15
+
+
+@pytest.mark.skipif(not metrics.metrics_available(), reason="prometheus_client not installed")
+def test_metrics_endpoint():
+    """Test /metrics exposes the stage histograms and gauges."""
+    response = TestClient(app).get("/metrics")
+
+    assert response.status_code == 200
+    assert 'moodlelogsmart_stage_duration_seconds_count{stage="classify"}' in response.text
+    assert "moodlelogsmart_temp_dir_bytes" in response.text
+
+
+@pytest.mark.skipif(metrics.metrics_available(), reason="prometheus_client installed")
+def test_metrics_endpoint_unavailable():
+    """Test /metrics answers 503 without prometheus_client."""
+    assert TestClient(app).get("/metrics").status_code == 503
@@ -0,0 +1,175 @@
+"""Tests for the processing pipeline runner."""
+
+import io
+import json
+import zipfile
+
+import pandas as pd
+import pytest
+
+from moodlelogsmart.core.auto_detect.csv_detector import CSVDetector
+from moodlelogsmart.core.export.exporter import HAS_PYARROW, XESSpillWriter
+from moodlelogsmart.core.export.zip_package import iter_zip, result_members
+from moodlelogsmart.core.pipeline import run_pipeline
+
+from conftest import MOODLE_HEADER, MOODLE_ROWS
+
+
+def _write_log(path, repeat):
+    """Write a Moodle log with MOODLE_ROWS repeated ``repeat`` times."""
+    path.write_text(
+        "\n".join([MOODLE_HEADER] + MOODLE_ROWS * repeat) + "\n", encoding="utf-8"
+    )
+    return str(path)
+
+
+class TestRunPipeline:
+    """Tests for run_pipeline()."""
+
+    def test_in_memory_produces_zip(self, moodle_csv, tmp_path):
+        """Test in-memory mode packages the enriched CSV."""
+        progress = []
+        result = run_pipeline("job-a", moodle_csv, tmp_path, progress=progress.append)
+
+        assert result.zip_path.exists()
+        assert result.events_in == 3
+        assert result.events_out == 3
+        assert progress == sorted(progress)
+
+        with zipfile.ZipFile(result.zip_path) as zf:
+            assert "enriched_log.csv" in zf.namelist()
+
+    def test_stage_progress_reports_rows(self, tmp_path):
+        """Test stage callbacks carry stage names and rows processed."""
+        stages = []
+        run_pipeline(
+            "job-s",
+            _write_log(tmp_path / "s.csv", 10),
+            tmp_path,
+            streaming=True,
+            chunk_rows=10,
+            stage_progress=lambda *args: stages.append(args),
+        )
+
+        assert stages[0] == ("detect", 0, 0)
+        assert ("classify", 10, 30) in stages
+        assert stages[-1] == ("zip", 30, 30)
+
+    def test_stage_seconds_recorded(self, moodle_csv, tmp_path):
+        """Test the time of every stage is returned with the result."""
+        result = run_pipeline("job-t", moodle_csv, tmp_path)
+
+        assert set(result.stage_seconds) == {
+            "detect", "map", "timestamp", "clean", "classify", "export", "zip"
+        }
+        assert all(seconds >= 0 for seconds in result.stage_seconds.values())
+
+    @pytest.mark.parametrize("offset_stride", [None, 5])
+    def test_streaming_matches_in_memory(self, tmp_path, monkeypatch, offset_stride):
+        """Test streaming mode writes the same rows as in-memory mode."""
+        # XES traces spread over several spill partitions
+        monkeypatch.setattr(XESSpillWriter, "partitions_for", staticmethod(lambda events: 4))
+        if offset_stride:
+            # Chunks cut at the detected row offsets instead of pandas' chunked reader
+            monkeypatch.setattr(CSVDetector, "OFFSET_STRIDE", offset_stride)
+        input_a = _write_log(tmp_path / "a.csv", 50)
+        input_b = _write_log(tmp_path / "b.csv", 50)
+
+        in_memory = run_pipeline("job-mem", input_a, tmp_path, streaming=False)
+        streamed = run_pipeline(
+            "job-stream", input_b, tmp_path, streaming=True, chunk_rows=7
+        )
+
+        assert streamed.events_in == in_memory.events_in == 150
+        assert streamed.events_out == in_memory.events_out
+
+        with zipfile.ZipFile(in_memory.zip_path) as expected, zipfile.ZipFile(
+            streamed.zip_path
+        ) as actual:
+            assert actual.namelist() == expected.namelist()
+            pd.testing.assert_frame_equal(
+                pd.read_csv(actual.open("enriched_log.csv")),
+                pd.read_csv(expected.open("enriched_log.csv")),
+            )
+
+            if HAS_PYARROW:
+                pd.testing.assert_frame_equal(
+                    pd.read_parquet(io.BytesIO(actual.read("enriched_log.parquet"))),
+                    pd.read_parquet(io.BytesIO(expected.read("enriched_log.parquet"))),
+                )
+
+            for xes in ("enriched_log.xes", "enriched_log_bloom_only.xes"):
+                assert actual.read(xes) == expected.read(xes)
+
+    def test_zip_members_use_configured_codecs(self, moodle_csv, tmp_path):
+        """Test each output is compressed with its format's codec."""
+        result = run_pipeline("job-z", moodle_csv, tmp_path)
+
+        with zipfile.ZipFile(result.zip_path) as zf:
+            assert zf.testzip() is None
+            infos = {info.filename: info for info in zf.infolist()}
+
+        assert infos["enriched_log.csv"].compress_type == zipfile.ZIP_DEFLATED
+        assert infos["enriched_log.xes"].compress_type == zipfile.ZIP_DEFLATED
+        if HAS_PYARROW:
+            assert infos["enriched_log.parquet"].compress_type == zipfile.ZIP_STORED
+
+    def test_members_kept_without_prebuilt_zip(self, moodle_csv, tmp_path):
+        """Test the ZIP can be streamed from the members when not prebuilt."""
+        result = run_pipeline("job-n", moodle_csv, tmp_path, build_zip=False)
+
+        assert result.zip_path.is_dir()
+        members = result_members(result.zip_path)
+        assert "enriched_log.csv" in members
+
+        data = b"".join(iter_zip(set(members.values()), ["enriched_log.csv"]))
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            assert zf.namelist() == ["enriched_log.csv"]
+            assert len(pd.read_csv(zf.open("enriched_log.csv"))) == 3
+
+    def test_unparseable_timestamps_quarantined(self, tmp_path):
+        """Test rows with bad timestamps go to quarantined_rows.csv."""
+        path = tmp_path / "bad_time.csv"
+        rows = MOODLE_ROWS * 10 + [MOODLE_ROWS[0].replace("15/01/24 10:30:45", "yesterday")]
+        path.write_text("\n".join([MOODLE_HEADER] + rows) + "\n", encoding="utf-8")
+
+        result = run_pipeline("job-q", str(path), tmp_path)
+
+        assert result.events_quarantined == 1
+        assert result.events_out == 30
+        with zipfile.ZipFile(result.zip_path) as zf:
+            quarantined = pd.read_csv(zf.open("quarantined_rows.csv"))
+            enriched = pd.read_csv(zf.open("enriched_log.csv"))
+        assert quarantined["time"].tolist() == ["yesterday"]
+        assert enriched["time"].iloc[0] == "2024-01-15 10:30:45"
+
+    def test_rule_profile_and_rule_id_column(self, tmp_path):
+        """Test both modes write the same rule profile and matched_rule_id codes."""
+        reports, codes = [], []
+        for name, streaming in (("mem", False), ("stream", True)):
+            result = run_pipeline(
+                f"job-{name}", _write_log(tmp_path / f"{name}.csv", 20), tmp_path,
+                streaming=streaming, chunk_rows=7, profile_rules=True, rule_id_column=True,
+            )
+            with zipfile.ZipFile(result.zip_path) as zf:
+                reports.append(json.loads(zf.read("rule_profile.json")))
+                codes.append(pd.read_csv(zf.open("enriched_log.csv"))["matched_rule_id"])
+
+        memory, streamed = reports
+        assert memory["events"] == streamed["events"] == 60
+        assert [r["hits"] for r in memory["rules"]] == [r["hits"] for r in streamed["rules"]]
+        assert sum(r["hits"] for r in memory["rules"]) + memory["default_events"] == 60
+        assert all("seconds" in r for r in memory["rules"])
+        pd.testing.assert_series_equal(codes[0], codes[1])
+
+        by_code = {r["code"]: r for r in memory["rules"]}
+        assert by_code[codes[0].iloc[0]]["id"] == "R01"  # File viewed
+        assert by_code[codes[0].iloc[0]]["hits"] == 20
+
+    def test_no_rule_outputs_by_default(self, moodle_csv, tmp_path):
+        """Test profiling outputs are opt-in."""
+        result = run_pipeline("job-d", moodle_csv, tmp_path)
+
+        with zipfile.ZipFile(result.zip_path) as zf:
+            assert "rule_profile.json" not in zf.namelist()
+            assert "matched_rule_id" not in pd.read_csv(zf.open("enriched_log.csv")).columns
@@ -0,0 +1,69 @@
+"""Tests for live job progress tracking."""
+
+import asyncio
+
+import pytest
+
+from moodlelogsmart.api.job_manager import Job
+from moodlelogsmart.api.progress import ProgressTracker, event_from_job
+
+
+class TestProgressTracker:
+    """Tests for ProgressTracker."""
+
+    def test_throughput_and_eta(self, monkeypatch):
+        """Test rows/s and ETA are derived from rows processed."""
+        clock = iter([100.0, 100.0, 102.0])
+        monkeypatch.setattr("moodlelogsmart.api.progress.time.monotonic", lambda: next(clock))
+
+        tracker = ProgressTracker()
+        tracker.update("job", 10, "detect")
+        tracker.update("job", 55, "classify", rows_processed=1000, total_rows=3000)
+
+        event = tracker.get("job")
+        assert event.stage == "classify"
+        assert event.rows_per_second == 500.0
+        assert event.eta_seconds == 4.0
+
+    def test_finished_job_ignores_late_reports(self):
+        """Test progress after completion does not reopen the job."""
+        tracker = ProgressTracker()
+        tracker.update("job", 50, "clean")
+        tracker.finish("job", "completed")
+        tracker.update("job", 60, "classify")
+
+        event = tracker.get("job")
+        assert (event.status, event.progress) == ("completed", 100)
+
+    @pytest.mark.asyncio
+    async def test_wait_wakes_on_update_from_thread(self):
+        """Test a waiting stream is woken by an update from another thread."""
+        tracker = ProgressTracker()
+        tracker.update("job", 10, "detect")
+        seq = tracker.get("job").seq
+
+        waiter = asyncio.create_task(tracker.wait("job", seq, timeout=5))
+        await asyncio.sleep(0.01)
+        await asyncio.to_thread(tracker.update, "job", 20, "map")
+
+        await asyncio.wait_for(waiter, timeout=1)
+        assert tracker.get("job").stage == "map"
+
+
+def test_event_from_stored_job():
+    """Test streams of other processes get rates from the stored job."""
+    from datetime import datetime, timedelta
+
+    job = Job(
+        job_id="job",
+        progress=55,
+        started_at=datetime.now() - timedelta(seconds=2),
+        stage="classify",
+        rows_processed=1000,
+        total_rows=3000,
+    )
+    event = event_from_job(job)
+
+    assert (event.stage, event.progress, event.seq) == ("classify", 55, 0)
+    assert 400 < event.rows_per_second <= 500
+    assert 3.5 < event.eta_seconds < 5.1
@@ -0,0 +1,143 @@
+"""Tests for the content-hash result cache."""
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from moodlelogsmart.api.job_store import SQLiteJobStore
+from moodlelogsmart.api.result_cache import ResultCache
+
+
+class OtherProcessStore(SQLiteJobStore):
+    """SQLite store seen as another API process."""
+
+    process_id = "other-host:1:0"
+
+
+def _zip(path, size=10):
+    path.write_bytes(b"x" * size)
+    return path
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(cache_dir=str(tmp_path / "cache"), max_bytes=1000, max_age_seconds=3600)
+
+
+class TestResultCache:
+    """Tests for ResultCache."""
+
+    def test_key_depends_on_content_rules_and_options(self):
+        """Test any input to the key changes it."""
+        base = ResultCache.key("abc", "rules-1")
+        assert base == ResultCache.key("abc", "rules-1", {})
+        assert base != ResultCache.key("abd", "rules-1")
+        assert base != ResultCache.key("abc", "rules-2")
+        assert base != ResultCache.key("abc", "rules-1", {"streaming": True})
+
+    def test_hit_and_miss_counted(self, cache, tmp_path):
+        """Test get() counts misses before put() and hits after."""
+        assert cache.get("k") is None
+        cache.put("k", _zip(tmp_path / "job.zip"))
+
+        assert cache.get("k").read_bytes() == b"x" * 10
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_job_cleanup_keeps_cache_entry(self, cache, tmp_path):
+        """Test deleting a job's ZIP does not remove the cached copy."""
+        job_zip = _zip(tmp_path / "job.zip")
+        cached = cache.put("k", job_zip)
+        copy = cache.materialize(cached, tmp_path / "other_job.zip")
+
+        job_zip.unlink()
+        copy.unlink()
+        assert cache.get("k") is not None
+
+    def test_expired_entries_evicted(self, cache, tmp_path):
+        """Test entries older than max_age are misses and get removed."""
+        cached = cache.put("old", _zip(tmp_path / "job.zip"))
+        stale = time.time() - 7200
+        os.utime(cached, (stale, stale))
+
+        assert cache.get("old") is None
+        cache.evict()
+        assert not cached.exists()
+
+    def test_size_limit_evicts_least_recently_used(self, cache, tmp_path):
+        """Test the oldest entries go first when over max_bytes."""
+        for i, key in enumerate(["a", "b"]):
+            cached = cache.put(key, _zip(tmp_path / f"{key}.zip", size=400))
+            os.utime(cached, (time.time() - 100 + i, time.time() - 100 + i))
+        cache.get("a")  # Recently used again
+        cache.put("c", _zip(tmp_path / "c.zip", size=400))
+
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+        assert cache.evictions >= 1
+
+    @pytest.mark.asyncio
+    async def test_single_flight(self, cache, tmp_path):
+        """Test the second job for a key waits for the first one's result."""
+        assert cache.join("k", "leader") is None
+        leader_job_id, result = cache.join("k", "follower")
+        assert leader_job_id == "leader"
+        assert cache.joins == 1
+
+        waiter = asyncio.ensure_future(asyncio.wrap_future(result))
+        cached = cache.put("k", _zip(tmp_path / "job.zip"))
+        cache.finish("k", zip_path=cached)
+
+        assert await waiter == cached
+        assert cache.join("k", "next") is None  # Key is free again
+
+    def test_failed_leader_fails_followers(self, cache):
+        """Test followers see the leader's error."""
+        cache.join("k", "leader")
+        _, result = cache.join("k", "follower")
+        cache.finish("k", error="boom")
+
+        with pytest.raises(RuntimeError, match="boom"):
+            result.result(timeout=1)
+
+
+class TestSharedSingleFlight:
+    """Tests for single flight across API processes (SQLite job store)."""
+
+    @pytest.fixture
+    def caches(self, tmp_path):
+        """Result caches of two API processes sharing a directory and database."""
+        db_path = str(tmp_path / "jobs.db")
+        return [
+            ResultCache(cache_dir=str(tmp_path / "cache"), store=store, poll_seconds=0.01)
+            for store in (SQLiteJobStore(db_path), OtherProcessStore(db_path))
+        ]
+
+    def test_follower_in_other_process_gets_result(self, caches, tmp_path):
+        """Test a job attaches to a leader running in another process."""
+        leader, follower = caches
+        assert leader.join("k", "leader") is None
+        leader_job_id, result = follower.join("k", "follower")
+        assert leader_job_id == "leader"
+
+        cached = leader.put("k", _zip(tmp_path / "job.zip"))
+        leader.finish("k", zip_path=cached)
+
+        assert result.result(timeout=5) == cached
+        assert follower.join("k", "next") is None  # Finished key is free again
+
+    def test_stopped_leader_process_fails_followers(self, caches):
+        """Test followers give up when the leader's process stops."""
+        follower, leader = caches
+        assert leader.join("k", "leader") is None
+        _, result = follower.join("k", "follower")
+
+        follower.store.connection().execute(
+            "UPDATE api_processes SET heartbeat = 0 WHERE process_id = ?",
+            (leader.store.process_id,),
+        )
+        with pytest.raises(RuntimeError, match="stopped"):
+            result.result(timeout=5)
+        assert follower.join("k", "retry") is None
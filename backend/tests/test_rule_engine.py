@@ -0,0 +1,313 @@
+"""Tests for RuleEngine evaluation paths."""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from moodlelogsmart.core.rules.bloom_classifier import BloomClassifier
+from moodlelogsmart.core.rules.rule_engine import RuleEngine, Rule, RuleCondition, RuleAction
+
+COMPONENTS = [
+    "File", "Folder", "Page", "Book", "URL", "Resource", "Forum", "Quiz",
+    "Questionnaire", "Assignment", "Wiki", "Workshop", "Glossary", "Database",
+    "Chat", "System", None, np.nan,
+]
+
+EVENT_NAMES = [
+    "Course module viewed", "Course viewed", "Curso visto", "Discussion viewed",
+    "Discussion created", "Post created", "Post updated", "Quiz attempt started",
+    "Quiz attempt submitted", "Submission created", "Submission updated", "submitted",
+    "Page created", "Page updated", "Submission assessed", "Entry created",
+    "Entry updated", "Record created", "Message sent", "User logged in", None,
+]
+
+
+def _event_frame():
+    """Build one event for every (component, event_name) combination."""
+    rows = [
+        {
+            "user_full_name": "Test User",
+            "component": component,
+            "event_name": event_name,
+            "event_context": "Course: Test",
+        }
+        for component, event_name in itertools.product(COMPONENTS, EVENT_NAMES)
+    ]
+    return pd.DataFrame(rows)
+
+
+def _evaluate_rows(engine, df):
+    """Reference classification: evaluate() on each row dict."""
+    return pd.DataFrame([engine.evaluate(row) for row in df.to_dict("records")])
+
+
+class TestEvaluateFrame:
+    """Tests for the vectorized RuleEngine.evaluate_frame()."""
+
+    def test_matches_row_evaluation_for_shipped_rules(self):
+        """Test vectorized results equal evaluate() for bloom_taxonomy.yaml."""
+        engine = RuleEngine()
+        df = _event_frame()
+
+        expected = _evaluate_rows(engine, df)
+        actual = engine.evaluate_frame(df)
+
+        for column in ["activity_type", "bloom_level", "is_active"]:
+            assert actual[column].tolist() == expected[column].tolist(), column
+
+    def test_default_and_missing_field(self):
+        """Test fallthrough default and conditions on missing columns."""
+        engine = RuleEngine(rules=[
+            Rule(
+                id="X1",
+                name="Needs origin",
+                priority=1,
+                conditions=[RuleCondition(field="origin", operator="equals", value="web")],
+                action=RuleAction(activity_type="Web", bloom_level="Apply", is_active=True),
+            ),
+        ])
+        df = pd.DataFrame({"event_name": ["a", "b"]})
+
+        result = engine.evaluate_frame(df)
+
+        assert result["activity_type"].tolist() == ["Other", "Other"]
+        assert result["bloom_level"].tolist() == ["Unknown", "Unknown"]
+        assert result["is_active"].dtype == bool
+
+    def test_contains_on_non_string_column(self):
+        """Test contains never matches non-string values."""
+        engine = RuleEngine(rules=[
+            Rule(
+                id="X1",
+                name="Contains",
+                priority=1,
+                conditions=[RuleCondition(field="event_name", operator="contains", value="1")],
+                action=RuleAction(activity_type="Hit", bloom_level="Apply"),
+            ),
+        ])
+        df = pd.DataFrame({"event_name": [1, 11, 2]})
+
+        result = engine.evaluate_frame(df)
+
+        assert result["activity_type"].tolist() == ["Other", "Other", "Other"]
+
+    def test_preserves_columns_and_resets_index(self):
+        """Test input columns are kept and index is reset like apply_rules()."""
+        engine = RuleEngine()
+        df = _event_frame().iloc[::-1]
+
+        result = engine.evaluate_frame(df)
+
+        assert list(result.columns[:4]) == list(df.columns)
+        assert result.index.tolist() == list(range(len(df)))
+
+
+class TestContainsAutomaton:
+    """Tests for the shared substring matcher behind contains conditions."""
+
+    @staticmethod
+    def _contains_engine(needles):
+        return RuleEngine(rules=[
+            Rule(
+                id=f"S{i}", name=f"Substring {needle!r}", priority=i,
+                conditions=[RuleCondition(field="event_name", operator="contains", value=needle)],
+                action=RuleAction(activity_type=f"Hit_{needle}", bloom_level="Apply"),
+            )
+            for i, needle in enumerate(needles)
+        ])
+
+    def test_overlapping_needles_match_linear_scan(self):
+        """Test nested and overlapping needles give first-match results in both paths."""
+        needles = ["attempt submitted", "submitted", "mitted", "sub", "he", "she", "hers"]
+        engine = self._contains_engine(needles)
+        values = [
+            "Quiz attempt submitted", "Assignment submitted", "resubmit", "ushers",
+            "she sells", "permitted", "", None, 3,
+        ]
+
+        expected = [
+            _linear_classification(engine, {"event_name": value}) for value in values
+        ]
+        assert [engine.evaluate({"event_name": v})["activity_type"] for v in values] == expected
+        frame = engine.evaluate_frame(pd.DataFrame({"event_name": values}))
+        assert frame["activity_type"].tolist() == expected
+        assert expected[:4] == [
+            "Hit_attempt submitted", "Hit_submitted", "Hit_sub", "Hit_he",
+        ]
+
+    def test_many_substring_rules(self):
+        """Test hundreds of contains rules share one matcher per field."""
+        needles = [f"course{i:03d}" for i in range(300)]
+        engine = self._contains_engine(needles)
+
+        assert list(engine._matchers) == ["event_name"]
+        for i in range(0, 300, 13):
+            event = {"event_name": f"Viewed course{i:03d} page"}
+            assert engine.evaluate(event)["activity_type"] == f"Hit_course{i:03d}"
+
+
+def _linear_classification(engine, event):
+    """Reference: check every rule in priority order."""
+    for rule in engine.rules:
+        if engine._matches_all_conditions(event, rule.conditions):
+            return rule.action.activity_type
+    return "Other"
+
+
+class TestIndexedDispatch:
+    """Tests for hash-indexed rule dispatch in RuleEngine.evaluate()."""
+
+    def test_shipped_rules_match_linear_scan(self):
+        """Test indexed dispatch agrees with a linear scan of all rules."""
+        engine = RuleEngine()
+
+        for event in _event_frame().to_dict("records"):
+            expected = _linear_classification(engine, event)
+            assert engine.evaluate(event)["activity_type"] == expected, event
+
+    def test_priority_order_across_buckets(self):
+        """Test first match wins when candidates come from different buckets."""
+        engine = RuleEngine(rules=[
+            Rule(
+                id="A", name="Component rule", priority=2,
+                conditions=[RuleCondition(field="component", operator="equals", value="Quiz")],
+                action=RuleAction(activity_type="ByComponent", bloom_level="Apply"),
+            ),
+            Rule(
+                id="B", name="Event rule", priority=1,
+                conditions=[RuleCondition(field="event_name", operator="in", values=["x", "y"])],
+                action=RuleAction(activity_type="ByEvent", bloom_level="Apply"),
+            ),
+            Rule(
+                id="C", name="Unindexed", priority=3,
+                conditions=[RuleCondition(field="event_name", operator="contains", value="z")],
+                action=RuleAction(activity_type="ByContains", bloom_level="Apply"),
+            ),
+        ])
+
+        assert engine.evaluate({"component": "Quiz", "event_name": "x"})["activity_type"] == "ByEvent"
+        assert engine.evaluate({"component": "Quiz", "event_name": "z"})["activity_type"] == "ByComponent"
+        assert engine.evaluate({"component": "Forum", "event_name": "z"})["activity_type"] == "ByContains"
+        assert engine.evaluate({"component": ["unhashable"], "event_name": "q"})["activity_type"] == "Other"
+
+    def test_many_department_rules(self):
+        """Test hundreds of per-department rules keep first-match semantics."""
+        rules = [r for r in RuleEngine().rules if r.conditions]  # Drop catch-all R13
+        for i in range(300):
+            rules.append(Rule(
+                id=f"D{i}", name=f"Dept {i}", priority=50 + i,
+                conditions=[
+                    RuleCondition(field="component", operator="equals", value=f"Dept{i % 40}"),
+                    RuleCondition(field="event_name", operator="in", values=[f"Event {i}"]),
+                ],
+                action=RuleAction(activity_type=f"Dept_{i}", bloom_level="Apply"),
+            ))
+        engine = RuleEngine(rules=rules)
+
+        for i in range(0, 300, 7):
+            event = {"component": f"Dept{i % 40}", "event_name": f"Event {i}"}
+            assert engine.evaluate(event)["activity_type"] == f"Dept_{i}"
+            assert engine.evaluate(event)["activity_type"] == _linear_classification(engine, event)
+
+
+class TestFactorizedClassification:
+    """Tests for BloomClassifier classifying unique combinations once."""
+
+    def test_apply_rules_matches_row_evaluation(self):
+        """Test broadcast results equal per-row evaluation."""
+        classifier = BloomClassifier()
+        df = pd.concat([_event_frame()] * 5, ignore_index=True).sample(frac=1, random_state=3)
+        df["description"] = [f"row {i}" for i in range(len(df))]
+
+        expected = _evaluate_rows(classifier.rule_engine, df)
+        actual = classifier.apply_rules(df)
+
+        for column in ["activity_type", "bloom_level", "is_active"]:
+            assert actual[column].tolist() == expected[column].tolist(), column
+        assert actual["description"].tolist() == df["description"].tolist()
+
+    def test_classify_memoizes_event_shapes(self):
+        """Test repeated event shapes are served from the LRU memo."""
+        classifier = BloomClassifier()
+        event = {"component": "Forum", "event_name": "Post created", "description": "a"}
+
+        first = classifier.classify(event)
+        second = classifier.classify({**event, "description": "b"})
+
+        assert first["activity_type"] == second["activity_type"] == "Collab_A"
+        assert second["description"] == "b"
+        info = classifier.cache_info()
+        assert info.hits == 1 and info.misses == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
+
+
+class TestRuleProfile:
+    """Tests for RuleProfile statistics and matched rule codes."""
+
+    @staticmethod
+    def _expected_codes(engine, df):
+        """Reference: 1-based position of the first matching rule, 0 if none."""
+        codes = []
+        for event in df.to_dict("records"):
+            code = next(
+                (i + 1 for i, rule in enumerate(engine.rules)
+                 if engine._matches_all_conditions(event, rule.conditions)),
+                0,
+            )
+            codes.append(code)
+        return np.array(codes)
+
+    def test_codes_and_counts_match_row_evaluation(self):
+        """Test deduplicated classification reports per-event hits and evaluations."""
+        classifier = BloomClassifier()
+        df = pd.concat([_event_frame()] * 3 + [_event_frame().iloc[:40]], ignore_index=True)
+        expected = self._expected_codes(classifier.rule_engine, df)
+        profile = classifier.new_profile()
+
+        result = classifier.apply_rules(df, rule_code=True, profile=profile)
+
+        assert result["matched_rule_id"].tolist() == expected.tolist()
+        assert profile.events == len(df)
+        assert profile.rows_evaluated < len(df)
+        hits = np.bincount(expected, minlength=len(classifier.rule_engine.rules) + 1)
+        assert profile.hits.tolist() == hits.tolist()
+        for position in range(len(classifier.rule_engine.rules)):
+            reached = ((expected == 0) | (expected > position)).sum()
+            assert profile.evaluations()[position] == reached
+
+    def test_report(self):
+        """Test the report lists rules in priority order with rates and dead rules."""
+        engine = RuleEngine(rules=[
+            Rule(
+                id="A", name="Views", priority=1,
+                conditions=[RuleCondition(field="event_name", operator="contains", value="viewed")],
+                action=RuleAction(activity_type="View", bloom_level="Remember"),
+            ),
+            Rule(
+                id="B", name="Never", priority=2,
+                conditions=[RuleCondition(field="event_name", operator="equals", value="x")],
+                action=RuleAction(activity_type="X", bloom_level="Apply"),
+            ),
+        ])
+        classifier = BloomClassifier(rules=engine.rules)
+        profile = classifier.new_profile(timed=False)
+        df = pd.DataFrame({"event_name": ["Course viewed"] * 3 + ["Post created"]})
+
+        classifier.apply_rules(df, profile=profile)
+        report = profile.to_dict()
+
+        assert report["events"] == 4
+        assert report["default_events"] == 1
+        assert report["default_rate"] == 0.25
+        assert report["never_fired"] == ["B"]
+        assert [(r["code"], r["id"], r["evaluations"], r["hits"]) for r in report["rules"]] == [
+            (1, "A", 4, 3), (2, "B", 1, 0),
+        ]
+        assert report["rules"][0]["hit_rate"] == 0.75
+        assert "seconds" not in report["rules"][0]
+        assert "matched_rule_id" not in classifier.apply_rules(df).columns
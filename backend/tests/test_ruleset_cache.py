@@ -0,0 +1,125 @@
+"""Tests for the process-wide compiled ruleset cache."""
+
+import os
+
+import pytest
+
+from moodlelogsmart.core.rules.ruleset_cache import RulesetCache, parse_mapping
+
+RULES = """
+rules:
+  - id: "T01"
+    name: "Quiz"
+    priority: 1
+    conditions:
+      - field: "event_name"
+        operator: "contains"
+        value: "Quiz"
+    action:
+      activity_type: "Eval_A"
+      bloom_level: "{level}"
+      is_active: true
+"""
+
+QUIZ = {"event_name": "Quiz attempt submitted", "component": "Quiz"}
+
+
+def write_rules(path, level="Apply", mtime=None):
+    path.write_text(RULES.format(level=level), encoding="utf-8")
+    if mtime is not None:
+        os.utime(path, ns=(mtime, mtime))
+    return path
+
+
+@pytest.fixture
+def rules_file(tmp_path):
+    return write_rules(tmp_path / "custom.yaml", mtime=1_000_000_000)
+
+
+class TestRulesetCache:
+    """Tests for RulesetCache."""
+
+    def test_unchanged_file_compiled_once(self, rules_file):
+        """Test repeated loads share one compiled ruleset."""
+        cache = RulesetCache(check_interval=0)
+        first = cache.load(rules_file)
+
+        assert cache.load(rules_file) is first
+        assert first.name == "custom"
+        assert first.classifier.classify(QUIZ)["bloom_level"] == "Apply"
+
+    def test_changed_file_reloaded(self, rules_file):
+        """Test a modified file is compiled again with a new version."""
+        cache = RulesetCache(check_interval=0)
+        first = cache.load(rules_file)
+
+        write_rules(rules_file, level="Analyze", mtime=2_000_000_000)
+        second = cache.load(rules_file)
+
+        assert second.version != first.version
+        assert second.classifier.classify(QUIZ)["bloom_level"] == "Analyze"
+
+    def test_reverted_file_reuses_compilation(self, rules_file):
+        """Test going back to earlier content reuses its classifier."""
+        cache = RulesetCache(check_interval=0)
+        first = cache.load(rules_file)
+        write_rules(rules_file, level="Analyze", mtime=2_000_000_000)
+        cache.load(rules_file)
+        write_rules(rules_file, level="Apply", mtime=3_000_000_000)
+
+        reverted = cache.load(rules_file)
+
+        assert reverted.version == first.version
+        assert reverted.classifier is first.classifier
+
+    def test_check_interval_skips_stat(self, rules_file):
+        """Test changes are not seen until the check interval elapses."""
+        cache = RulesetCache(check_interval=3600)
+        first = cache.load(rules_file)
+        write_rules(rules_file, level="Analyze", mtime=2_000_000_000)
+
+        assert cache.load(rules_file) is first
+
+    def test_invalid_change_keeps_previous_version(self, rules_file):
+        """Test a file that stops parsing keeps serving the last good version."""
+        cache = RulesetCache(check_interval=0)
+        first = cache.load(rules_file)
+        rules_file.write_text("rules: [", encoding="utf-8")
+        os.utime(rules_file, ns=(2_000_000_000, 2_000_000_000))
+
+        assert cache.load(rules_file) is first
+
+    def test_invalid_file_never_loaded_raises(self, tmp_path):
+        """Test an unparseable file with no earlier version is an error."""
+        path = tmp_path / "broken.yaml"
+        path.write_text("rules: []", encoding="utf-8")
+
+        with pytest.raises(ValueError, match="no rules"):
+            RulesetCache().load(path)
+
+    def test_named_rulesets_and_api_keys(self, rules_file):
+        """Test API keys get their assigned ruleset and others the default."""
+        cache = RulesetCache(
+            rulesets={"custom": str(rules_file)},
+            api_key_rulesets={"key-a": "custom"},
+        )
+
+        assert cache.for_api_key("key-a").name == "custom"
+        assert cache.for_api_key("key-b").name == "default"
+        assert cache.for_api_key(None) is cache.get()
+        assert cache.get().classifier.classify(QUIZ)["bloom_level"] == "Apply"
+
+    def test_unknown_ruleset(self, rules_file):
+        """Test unknown ruleset names are rejected."""
+        with pytest.raises(KeyError):
+            RulesetCache().get("missing")
+        with pytest.raises(ValueError, match="missing"):
+            RulesetCache(api_key_rulesets={"key-a": "missing"})
+
+
+def test_parse_mapping():
+    """Test name=value lists are parsed, ignoring blanks and spaces."""
+    assert parse_mapping("") == {}
+    assert parse_mapping(" a = /x.yaml , b=/y.yaml,") == {"a": "/x.yaml", "b": "/y.yaml"}
+    with pytest.raises(ValueError):
+        parse_mapping("a")
@@ -0,0 +1,149 @@
+"""Tests for the job scheduler."""
+
+import asyncio
+
+import pytest
+
+from moodlelogsmart.api.job_store import SQLiteJobStore
+from moodlelogsmart.api.scheduler import JobScheduler, QueueFullError, SharedJobScheduler
+
+
+class OtherProcessStore(SQLiteJobStore):
+    """SQLite store seen as another API process."""
+
+    process_id = "other-host:1:0"
+
+
+async def _run_all(scheduler, jobs):
+    """Run admitted jobs; return the order in which they started."""
+    started = []
+
+    def job(job_id):
+        async def run():
+            started.append(job_id)
+            await asyncio.sleep(0)
+
+        return run
+
+    await asyncio.gather(*(scheduler.run(job_id, job(job_id)) for job_id in jobs))
+    return started
+
+
+class TestJobScheduler:
+    """Tests for JobScheduler ordering and limits."""
+
+    @pytest.mark.asyncio
+    async def test_shortest_job_first(self):
+        """Test waiting jobs start in order of line count."""
+        scheduler = JobScheduler(max_concurrent=1, max_queued=10)
+        assert scheduler.admit("first", "a", 500)
+        assert not scheduler.admit("big", "a", 1000)
+        assert not scheduler.admit("small", "a", 10)
+
+        assert scheduler.position("small") == 1
+        assert scheduler.position("big") == 2
+        assert scheduler.position("first") is None
+
+        started = await _run_all(scheduler, ["first", "big", "small"])
+        assert started == ["first", "small", "big"]
+        assert scheduler.stats() == {"running": 0, "queued": 0}
+
+    @pytest.mark.asyncio
+    async def test_owner_fairness(self):
+        """Test an owner without running jobs goes ahead of a busy owner."""
+        scheduler = JobScheduler(max_concurrent=1, max_queued=10)
+        scheduler.admit("a1", "a", 10)
+        scheduler.admit("a2", "a", 1)
+        scheduler.admit("b1", "b", 100)
+
+        assert scheduler.position("b1") == 1
+
+    @pytest.mark.asyncio
+    async def test_long_wait_overrides_size(self):
+        """Test a job waiting past max_wait_seconds is not starved."""
+        scheduler = JobScheduler(max_concurrent=1, max_queued=10, max_wait_seconds=60)
+        scheduler.admit("running", "a", 1)
+        scheduler.admit("big", "a", 1000)
+        scheduler.admit("small", "a", 1)
+        scheduler._queued["big"].queued_at -= 120
+
+        assert scheduler.position("big") == 1
+
+    @pytest.mark.asyncio
+    async def test_queue_full(self):
+        """Test admission fails once the queue is full."""
+        scheduler = JobScheduler(max_concurrent=1, max_queued=1)
+        scheduler.admit("running", "a", 1)
+        scheduler.admit("waiting", "a", 1)
+
+        assert scheduler.is_full()
+        with pytest.raises(QueueFullError):
+            scheduler.admit("rejected", "b", 1)
+
+    @pytest.mark.asyncio
+    async def test_failed_job_releases_slot(self):
+        """Test a job raising an error still hands its slot on."""
+        scheduler = JobScheduler(max_concurrent=1, max_queued=10)
+        scheduler.admit("broken", "a", 1)
+        scheduler.admit("next", "a", 1)
+
+        async def broken():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            await scheduler.run("broken", broken)
+
+        assert scheduler.position("next") is None
+        assert scheduler.stats() == {"running": 1, "queued": 0}
+
+
+class TestSharedJobScheduler:
+    """Tests for SharedJobScheduler across API processes."""
+
+    @pytest.fixture
+    def schedulers(self, tmp_path):
+        """Schedulers of two API processes sharing one job database."""
+        db_path = str(tmp_path / "jobs.db")
+        return [
+            SharedJobScheduler(store, max_concurrent=1, max_queued=1, poll_seconds=0.01)
+            for store in (SQLiteJobStore(db_path), OtherProcessStore(db_path))
+        ]
+
+    @pytest.mark.asyncio
+    async def test_limits_and_queue_shared(self, schedulers):
+        """Test a slot freed in one process starts the job queued by the other."""
+        here, other = schedulers
+        assert here.admit("first", "a", 10)
+        assert not other.admit("second", "b", 10)
+
+        assert here.is_full()
+        assert here.position("second") == 1
+        with pytest.raises(QueueFullError):
+            here.admit("rejected", "a", 1)
+
+        started = []
+
+        def job(job_id):
+            async def run():
+                started.append(job_id)
+
+            return run
+
+        await asyncio.gather(here.run("first", job("first")), other.run("second", job("second")))
+        assert started == ["first", "second"]
+        assert here.stats() == {"running": 0, "queued": 0}
+
+    @pytest.mark.asyncio
+    async def test_stopped_process_frees_slots(self, schedulers):
+        """Test jobs of a process without heartbeats are dropped."""
+        here, other = schedulers
+        assert other.admit("orphan", "b", 10)
+        assert not here.admit("waiting", "a", 10)
+
+        here.store.connection().execute(
+            "UPDATE api_processes SET heartbeat = 0 WHERE process_id = ?",
+            (other.store.process_id,),
+        )
+        assert not here.admit("next", "a", 100)  # Orphan dropped, "waiting" got the slot
+        assert here.stats() == {"running": 1, "queued": 1}
+        assert here.position("waiting") is None
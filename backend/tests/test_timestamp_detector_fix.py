@@ -3,6 +3,7 @@
 Validates that detect_format() method works correctly with Portuguese CSV data.
 """
 
+import pandas as pd
 import pytest
 from moodlelogsmart.core.auto_detect.timestamp_detector import TimestampDetector
 
@@ -108,3 +109,45 @@ class TestTimestampDetectorFix:
 
         # Should still detect format ignoring None values
         assert detected == "%d/%m/%y, %H:%M:%S"
+
+
+class TestTimestampColumnStage:
+    """Test vectorized timestamp column detection and parsing."""
+
+    def test_brazilian_column_parsed_to_datetime64(self):
+        """Test BR format column converts to datetime64[ns]."""
+        df = pd.DataFrame({"time": ["22/01/26, 23:26:24", "21/01/26, 13:00:32"]})
+
+        detector = TimestampDetector()
+        fmt = detector.detect_series_format(df["time"])
+        converted, quarantined = detector.convert_column(df, fmt)
+
+        assert fmt == "%d/%m/%y, %H:%M:%S"
+        assert converted["time"].dtype == "datetime64[ns]"
+        assert converted["time"].iloc[0] == pd.Timestamp(2026, 1, 22, 23, 26, 24)
+        assert len(quarantined) == 0
+
+    def test_epoch_seconds(self):
+        """Test Moodle integer epoch timestamps (numeric and string)."""
+        detector = TimestampDetector()
+
+        for values in ([1706000000, 1706000060], ["1706000000", "1706000060"]):
+            series = pd.Series(values)
+            fmt = detector.detect_series_format(series)
+            parsed = detector.parse_series(series, fmt)
+
+            assert fmt == TimestampDetector.EPOCH_FORMAT
+            assert parsed.iloc[0] == pd.Timestamp("2024-01-23 08:53:20")
+
+    def test_unparseable_rows_quarantined(self):
+        """Test rows that do not match the format are quarantined in bulk."""
+        rows = ["22/01/26, 23:26:24"] * 20 + ["not a date", None]
+        df = pd.DataFrame({"time": rows, "event_name": range(len(rows))})
+
+        detector = TimestampDetector()
+        fmt = detector.detect_series_format(df["time"])
+        converted, quarantined = detector.convert_column(df, fmt)
+
+        assert len(converted) == 20
+        assert quarantined["event_name"].tolist() == [20, 21]
+        assert quarantined["time"].iloc[0] == "not a date"
@@ -0,0 +1,80 @@
+"""Tests for streaming multipart upload reception."""
+
+import hashlib
+
+import pytest
+from fastapi import HTTPException
+
+from moodlelogsmart.api.upload_stream import MultipartCSVReceiver
+
+BOUNDARY = "upload-test"
+CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+
+
+def _form(csv, filename="log.csv"):
+    """Multipart body with a text field followed by the CSV file."""
+    return (
+        f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"note\"\r\n\r\nhello\r\n"
+        f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"file\"; "
+        f"filename=\"{filename}\"\r\nContent-Type: text/csv\r\n\r\n"
+    ).encode() + csv + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+async def _chunks(data, size, sent=None):
+    for start in range(0, len(data), size):
+        if sent is not None:
+            sent.append(start)
+        yield data[start:start + size]
+
+
+class TestMultipartCSVReceiver:
+    """Tests for MultipartCSVReceiver."""
+
+    @pytest.mark.asyncio
+    async def test_file_written_once_and_hashed(self, tmp_path):
+        """Test the CSV part is written as sent, whatever the chunking."""
+        csv = b"userid,time\n" + b"1,2024-01-15 10:30:45\n" * 5000
+        destination = tmp_path / "input.csv"
+
+        receiver = MultipartCSVReceiver(CONTENT_TYPE, max_bytes=10 ** 7, chunk_size=4096)
+        upload = await receiver.receive(_chunks(_form(csv), 1000), destination)
+
+        assert destination.read_bytes() == csv
+        assert upload.filename == "log.csv"
+        assert upload.size == len(csv)
+        assert upload.sha256 == hashlib.sha256(csv).hexdigest()
+
+    @pytest.mark.asyncio
+    async def test_bad_header_rejected_after_first_chunk(self, tmp_path):
+        """Test an unsafe header stops reading once the first chunk is validated."""
+        csv = b"=cmd,b\n" + b"1,2\n" * 100000
+        sent = []
+
+        receiver = MultipartCSVReceiver(CONTENT_TYPE, max_bytes=10 ** 7, chunk_size=4096)
+        with pytest.raises(HTTPException) as exc:
+            await receiver.receive(_chunks(_form(csv), 8192, sent), tmp_path / "input.csv")
+
+        assert exc.value.status_code == 400
+        assert len(sent) == 1
+        assert (tmp_path / "input.csv").stat().st_size == 0
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("body, detail", [
+        (_form(b"a,b\n1,2\n", filename="log.txt"), "Only .csv"),
+        (_form(b"a,b\n1,2\n").replace(b'name="file"', b'name="other"'), "No CSV file"),
+        (_form(b"a,b\n1,2\n" * 10), "exceeds"),
+    ])
+    async def test_invalid_uploads(self, tmp_path, body, detail):
+        """Test wrong names, missing files and oversized files are refused."""
+        receiver = MultipartCSVReceiver(CONTENT_TYPE, max_bytes=50, chunk_size=16)
+        with pytest.raises(HTTPException) as exc:
+            await receiver.receive(_chunks(body, 64), tmp_path / "input.csv")
+
+        assert detail in exc.value.detail
+
+    def test_non_multipart_rejected(self):
+        """Test a request without a multipart boundary is refused."""
+        with pytest.raises(HTTPException) as exc:
+            MultipartCSVReceiver("text/csv", max_bytes=50, chunk_size=16)
+
+        assert exc.value.status_code == 400
@@ -0,0 +1,85 @@
+"""Tests for the pipeline worker pool."""
+
+import os
+import time
+
+import pytest
+
+from moodlelogsmart.api.job_manager import get_job_manager
+from moodlelogsmart.api.worker_pool import JobTimeoutError, WorkerPool
+
+
+@pytest.fixture
+def pool():
+    pool = WorkerPool(max_workers=1, max_jobs_per_worker=0)
+    yield pool
+    pool.shutdown()
+
+
+def _wait_for_idle(pool, count=1):
+    deadline = time.monotonic() + 60
+    while len(pool._idle) < count:
+        assert time.monotonic() < deadline, "replacement worker did not start"
+        time.sleep(0.05)
+    return pool._idle
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+class TestWorkerPool:
+    """Tests for WorkerPool."""
+
+    @pytest.mark.asyncio
+    async def test_timeout_terminates_worker(self, pool, moodle_csv, tmp_path):
+        """Test a job past its timeout kills its worker and a new one is started."""
+        job_manager = get_job_manager()
+
+        job_id = job_manager.create_job()
+        await pool.run(job_id, moodle_csv, tmp_path)
+        (worker,) = pool._idle
+        assert job_manager.get_job(job_id).progress > 10  # Forwarded from the worker
+
+        with pytest.raises(JobTimeoutError):
+            await pool.run(job_manager.create_job(), moodle_csv, tmp_path, timeout=0.001)
+
+        assert not worker.process.is_alive()
+        assert not _pid_alive(worker.pid)
+        (replacement,) = _wait_for_idle(pool)
+        assert replacement.pid != worker.pid
+
+        result = await pool.run(job_manager.create_job(), moodle_csv, tmp_path, timeout=60)
+        assert result.zip_path.exists()
+        assert pool._idle == [replacement]
+
+    def test_start_warms_up_workers(self):
+        """Test start() brings the pool to full size before the first job."""
+        pool = WorkerPool(max_workers=2, max_jobs_per_worker=0)
+        try:
+            pool.start()
+            assert len(pool._idle) == 2
+            assert all(w.process.is_alive() for w in pool._idle)
+            pool.start()  # Already full
+            assert len(pool._workers) == 2
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_worker_recycled_after_max_jobs(self, moodle_csv, tmp_path):
+        """Test a worker is replaced once it has run its quota of jobs."""
+        pool = WorkerPool(max_workers=1, max_jobs_per_worker=1)
+        job_manager = get_job_manager()
+        try:
+            pool.start()
+            (first,) = pool._idle
+            await pool.run(job_manager.create_job(), moodle_csv, tmp_path)
+            (second,) = _wait_for_idle(pool)
+            assert second.pid != first.pid
+            await pool.run(job_manager.create_job(), moodle_csv, tmp_path)
+        finally:
+            pool.shutdown()
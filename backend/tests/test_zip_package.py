@@ -0,0 +1,120 @@
+"""Tests for ZIP packaging of pipeline outputs."""
+
+import io
+import zipfile
+
+import pytest
+
+from moodlelogsmart.core.export.zip_package import (
+    Codec,
+    ResultPackage,
+    codec_for,
+    parse_codec,
+)
+
+
+class _NonSeekable(io.RawIOBase):
+    """Write-only stream, like an HTTP response body."""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.data += b
+        return len(b)
+
+
+@pytest.fixture
+def package(tmp_path):
+    package = ResultPackage(tmp_path / "out")
+    with package.open("enriched_log.csv") as out:
+        out.write(b"user,time\n" + b"Ana,2024-01-15 10:30:45\n" * 1000)
+    with package.open("enriched_log.parquet") as out:
+        out.write(b"PAR1 not really")
+    with package.open("relatório.xes", Codec(zipfile.ZIP_LZMA)) as out:
+        out.write(b"<log/>")
+    return package
+
+
+class TestCodecs:
+    """Tests for codec configuration."""
+
+    def test_parse_codec(self):
+        """Test names and levels are parsed."""
+        assert parse_codec("deflate:1") == Codec(zipfile.ZIP_DEFLATED, 1)
+        assert parse_codec("xz") == Codec(zipfile.ZIP_LZMA)
+        assert parse_codec("stored") == Codec(zipfile.ZIP_STORED)
+
+    def test_unknown_codec(self):
+        """Test an unknown codec is rejected."""
+        with pytest.raises(ValueError):
+            parse_codec("rar")
+
+    def test_defaults_by_extension(self):
+        """Test text formats are deflated and columnar formats stored."""
+        assert codec_for("enriched_log.csv").compression == zipfile.ZIP_DEFLATED
+        assert codec_for("enriched_log.parquet").compression == zipfile.ZIP_STORED
+        assert codec_for("notes.txt").compression == zipfile.ZIP_DEFLATED
+
+
+class TestResultPackage:
+    """Tests for ResultPackage."""
+
+    def test_assemble_copies_members(self, package, tmp_path):
+        """Test the assembled ZIP is valid and keeps each member's codec."""
+        package.assemble(tmp_path / "results.zip")
+
+        with zipfile.ZipFile(tmp_path / "results.zip") as zf:
+            assert zf.testzip() is None
+            assert zf.namelist() == ["enriched_log.csv", "enriched_log.parquet", "relatório.xes"]
+            types = [info.compress_type for info in zf.infolist()]
+            assert types == [zipfile.ZIP_DEFLATED, zipfile.ZIP_STORED, zipfile.ZIP_LZMA]
+            assert zf.read("relatório.xes") == b"<log/>"
+
+    def test_members_get_date_permissions_and_level(self, package, tmp_path):
+        """Test members carry the write date, 0644 permissions and the codec level."""
+        package.assemble(tmp_path / "results.zip")
+
+        with zipfile.ZipFile(tmp_path / "results.zip") as zf:
+            for info in zf.infolist():
+                assert info.date_time[0] >= 2024
+                assert info.external_attr >> 16 == 0o644
+
+        data = bytes(range(256)) * 64 + b"Ana,2024-01-15 10:30:45\n" * 2000
+        sizes = []
+        for level in (1, 9):
+            with package.open(f"level{level}.csv", Codec(zipfile.ZIP_DEFLATED, level)) as out:
+                out.write(data)
+            with zipfile.ZipFile(package.part_path(f"level{level}.csv")) as zf:
+                sizes.append(zf.infolist()[0].compress_size)
+        assert sizes[0] > sizes[1]
+
+    def test_assemble_to_non_seekable_stream(self, package):
+        """Test a subset of members can be streamed."""
+        out = _NonSeekable()
+        package.assemble(out, members=["enriched_log.csv"])
+
+        with zipfile.ZipFile(io.BytesIO(bytes(out.data))) as zf:
+            assert zf.testzip() is None
+            assert zf.namelist() == ["enriched_log.csv"]
+
+    def test_failed_member_is_discarded(self, package):
+        """Test a member whose writer raises is left out."""
+        with pytest.raises(RuntimeError):
+            with package.open("broken.csv") as out:
+                out.write(b"partial")
+                raise RuntimeError("export failed")
+
+        assert "broken.csv" not in package.members()
+
+    def test_read_and_add_file(self, package, tmp_path):
+        """Test members can be read back and files added."""
+        source = tmp_path / "quarantined_rows.csv"
+        source.write_bytes(b"time\nyesterday\n")
+        package.add_file(source)
+
+        with package.read("quarantined_rows.csv") as f:
+            assert f.read() == b"time\nyesterday\n"